@@ -1,5 +1,6 @@
 import os
 import json
+import functools
 import logging
 from dotenv import load_dotenv, find_dotenv
 from flask import Flask, current_app
@@ -9,10 +10,16 @@ from alembic.config import Config
 from alembic import command
 
 from .extensions import db, login_manager
-from .database import get_assessment_messages
+from . import routing
+from .database import get_assessment_messages, hot_queries, explain, upsert_assessment_messages, script_heads, database_revisions
+from .pooling import build_engine_options, build_sqlite_options, install_pool_metrics, install_sqlite_pragmas
 
 
-def create_app():
+@functools.lru_cache(maxsize=256)
+def _parse_json(value):
+    return json.loads(value)
+
+def create_app(test_config=None):
     load_dotenv(find_dotenv(".env"))
     load_dotenv(find_dotenv(".env.development.local"))
     
@@ -27,6 +34,16 @@ def create_app():
     )
     app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', os.urandom(24))
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Compute forecasts and loan schedules in exact integer cents (see logic/money.py).
+    # This costs throughput: `python -m benchmarks.bench_money` measures loan
+    # schedules at about 75% and forecasts at about 65% of the float path's rate.
+    app.config['MONEY_FIXED_POINT'] = os.environ.get('MONEY_FIXED_POINT') == '1'
+    # XLSX export: 'template' writes values into a cached workbook skeleton
+    # (utils/export_template.py); 'builder' styles the whole workbook each time.
+    app.config['EXPORT_MODE'] = os.environ.get('EXPORT_MODE', 'template')
+    # Write a new account's default data on its first visit instead of at
+    # signup (see app/provisioning.py)
+    app.config['DEFER_USER_SEEDING'] = os.environ.get('DEFER_USER_SEEDING') == '1'
 
     # --- Database Configuration ---
     load_dotenv() # ensure env vars are loaded
@@ -47,20 +64,38 @@ def create_app():
         if 'sslmode' not in db_url and not is_development:
             db_url += "?sslmode=require"
         app.config['SQLALCHEMY_DATABASE_URI'] = db_url
-        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-            "pool_pre_ping": True,
-            "pool_recycle": 280,
-            "pool_size": 5,
-            "max_overflow": 10,
-            "connect_args": {
-                "connect_timeout": 30
-            }
-        }
+        # Pool mode and sizing come from DB_POOL_* env vars (see app/pooling.py)
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(db_url)
     else:
         # Local development with SQLite
         db_path = os.path.join(app.instance_path, 'bizstarter.db')
         app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
 
+    # Optional read replica: read-only requests are routed to it (see app/routing.py)
+    replica_url = os.environ.get('DATABASE_REPLICA_URL')
+    if replica_url:
+        if replica_url.startswith("postgres://"):
+            replica_url = replica_url.replace("postgres://", "postgresql://")
+        if replica_url.startswith("postgresql") and 'sslmode' not in replica_url and not is_development:
+            replica_url += "?sslmode=require"
+        app.config['SQLALCHEMY_BINDS'] = {
+            'replica': {'url': replica_url, **build_engine_options(replica_url)}
+        }
+
+    if test_config is not None:
+        app.config.update(test_config)
+
+    # SQLite file databases: SQLITE_PROFILE pragmas, one writer connection and
+    # a pool of readers serving read-only requests (see app/pooling.py)
+    sqlite_options, sqlite_reader = build_sqlite_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    if sqlite_options:
+        app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {**sqlite_options, **app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {})}
+        binds = app.config.setdefault('SQLALCHEMY_BINDS', {})
+        if routing.REPLICA_BIND not in binds:
+            binds[routing.REPLICA_BIND] = sqlite_reader
+            # Readers share the primary's file, so there is no lag to wait out
+            app.config.setdefault('DB_REPLICA_STICKY_SECONDS', 0)
+
     # --- Logging Configuration ---
     if not app.debug and not app.testing:
         # In production, log to stderr.
@@ -71,6 +106,13 @@ def create_app():
     # Initialize extensions
     db.init_app(app)
     Migrate(app, db)
+    routing.init_app(app)
+    with app.app_context():
+        app.extensions['pool_metrics'] = {
+            bind_key: install_pool_metrics(engine) for bind_key, engine in db.engines.items()
+        }
+        for bind_key, engine in db.engines.items():
+            install_sqlite_pragmas(engine, read_only=bind_key == routing.REPLICA_BIND)
 
     @app.teardown_appcontext
     def shutdown_session(exception=None):
@@ -80,7 +122,8 @@ def create_app():
     @app.after_request
     def after_request_func(response):
         """Ensure responses aren't cached, useful for development."""
-        if app.debug:
+        # Fingerprinted assets keep their long-lived caching even in debug mode.
+        if app.debug and 'immutable' not in response.headers.get('Cache-Control', ''):
             response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
             response.headers["Pragma"] = "no-cache"
             response.headers["Expires"] = "0"
@@ -90,11 +133,27 @@ def create_app():
     # Register custom template filter
     @app.template_filter('fromjson')
     def fromjson_filter(value):
-        return json.loads(value)
+        # JSON columns arrive already parsed; strings are parsed once per distinct value.
+        if not isinstance(value, str):
+            return value
+        return _parse_json(value)
+
+    from .serialization import to_columnar
+    app.add_template_filter(to_columnar, 'columnar')
+
+    # Emit fingerprinted URLs for built static assets
+    from . import assets
+    app.jinja_env.globals['url_for'] = assets.asset_url_for
+
+    # {% cache %} blocks for the parts of pages that rarely change (see app/fragment_cache.py)
+    from . import fragment_cache
+    fragment_cache.init_app(app)
 
     # Register Blueprints
     from . import auth
     from . import main_routes
+    from . import api
+    from . import health
 
     # --- Configure Flask-Login ---
     login_manager.init_app(app)
@@ -105,50 +164,104 @@ def create_app():
 
     app.register_blueprint(auth.bp)
     app.register_blueprint(main_routes.bp)
+    app.register_blueprint(api.bp)
+    app.register_blueprint(assets.bp)
+    app.register_blueprint(health.bp)
+
+    # Concurrency and rate limits for expensive endpoints (see app/admission.py)
+    from . import admission
+    admission.init_app(app)
+
+    # Opt-in profiling of slow requests (see app/profiling.py)
+    from . import profiling
+    profiling.init_app(app)
 
     # Register CLI commands
     app.cli.add_command(init_db_command)
+    app.cli.add_command(db_explain_command)
+    app.cli.add_command(purge_users_command)
+    app.cli.add_command(assets.build_assets_command)
 
     return app
 
 def seed_initial_data():
     """Seeds the database with initial data."""
-    from .models import AssessmentMessage
     print("Seeding assessment_messages table...")
     try:
         with current_app.open_resource('../assessment_messages.json') as f:
             messages_data = json.load(f)
-            for risk_level, data in messages_data.items():
-                # Check if a message for this risk level already exists
-                existing_message = AssessmentMessage.query.filter_by(risk_level=risk_level).first()
-                if not existing_message:
-                    print(f"  - Adding message for '{risk_level}'...")
-                    message = AssessmentMessage(
-                        risk_level=risk_level,
-                        status=data['status'],
-                        caption=data['caption'],
-                        status_class=data['status_class'],
-                        dscr_status=data['dscr_status']
-                    )
-                    db.session.add(message)
-            db.session.commit()
-            print("Assessment messages seeding complete.")
+        written = upsert_assessment_messages(messages_data)
+        print(f"Assessment messages seeding complete ({written} added or updated).")
     except Exception as e:
         print(f"Error seeding assessment messages: {e}")
         db.session.rollback()
 
 @click.command('init-db')
-def init_db_command():
-    """Clear the existing data and create new tables."""
+@click.option('--force', is_flag=True, help='Run Alembic even when the database is already at the head revision.')
+def init_db_command(force):
+    """Apply pending migrations and seed the initial data."""
     with current_app.app_context():
-        click.echo("Applying database migrations...")
-        try:
-            migrations_dir = os.path.join(os.path.dirname(current_app.root_path), 'migrations')
-            alembic_cfg = Config(os.path.join(migrations_dir, "alembic.ini"))
-            alembic_cfg.set_main_option("script_location", migrations_dir)
-            alembic_cfg.set_main_option('sqlalchemy.url', current_app.config['SQLALCHEMY_DATABASE_URI'])
-            command.upgrade(alembic_cfg, 'head')
-            click.echo("Database migrations applied successfully.")
-            seed_initial_data()
-        except Exception as e:
-            click.echo(f"Error applying migrations: {e}", err=True)
\ No newline at end of file
+        migrations_dir = os.path.join(os.path.dirname(current_app.root_path), 'migrations')
+        # Alembic opens a connection of its own, and under the tuned SQLite
+        # profile the primary has just one: don't hold it in the session.
+        db.session.close()
+        # Fast path: one query against alembic_version, with the head read from
+        # the scripts' source, so a current database never loads Alembic.
+        heads = script_heads(os.path.join(migrations_dir, 'versions'))
+        if not force and heads and database_revisions() == heads:
+            click.echo(f"Database is at head revision {', '.join(sorted(heads))}; skipping migrations.")
+        else:
+            click.echo("Applying database migrations...")
+            try:
+                alembic_cfg = Config(os.path.join(migrations_dir, "alembic.ini"))
+                alembic_cfg.set_main_option("script_location", migrations_dir)
+                alembic_cfg.set_main_option('sqlalchemy.url', current_app.config['SQLALCHEMY_DATABASE_URI'])
+                command.upgrade(alembic_cfg, 'head')
+                click.echo("Database migrations applied successfully.")
+            except Exception as e:
+                click.echo(f"Error applying migrations: {e}", err=True)
+                return
+        seed_initial_data()
+
+@click.command('db-explain')
+@click.option('--user-id', type=int, default=None, help='User to plan the queries for (defaults to the first user).')
+@click.option('--analyze', is_flag=True, help='Run EXPLAIN ANALYZE on PostgreSQL (executes the queries).')
+def db_explain_command(user_id, analyze):
+    """Show the query plan for each per-user hot query."""
+    from .models import User, Product, Expense
+    if user_id is None:
+        user_id = db.session.scalar(db.select(User.id).order_by(User.id).limit(1)) or 1
+
+    # Use a real description/item so the plans reflect typical selectivity.
+    description = db.session.scalar(db.select(Product.description).where(Product.user_id == user_id).limit(1)) or ''
+    item = db.session.scalar(db.select(Expense.item).where(Expense.user_id == user_id).limit(1)) or ''
+
+    for label, statement in hot_queries(user_id, description, item):
+        click.echo(f"== {label} (user {user_id}) ==")
+        for line in explain(statement, analyze=analyze):
+            click.echo(f"  {line}")
+    db.session.rollback()
+
+
+@click.command('purge-users')
+@click.option('--username', 'usernames', multiple=True, help='Delete this account (repeatable).')
+@click.option('--inactive-days', type=int, default=None, help='Delete accounts with no login in this many days.')
+@click.option('--batch-size', type=int, default=None, help='Users deleted per statement (default PURGE_BATCH_SIZE).')
+@click.option('--dry-run', is_flag=True, help='Only report how many accounts would be deleted.')
+def purge_users_command(usernames, inactive_days, batch_size, dry_run):
+    """Delete user accounts and all of their data."""
+    from datetime import datetime, timedelta, timezone
+    from . import services
+    from .models import User
+    if not usernames and inactive_days is None:
+        raise click.UsageError('Pass --username and/or --inactive-days.')
+
+    if usernames:
+        user_ids = db.session.scalars(db.select(User.id).where(User.username.in_(usernames))).all()
+        count = len(user_ids) if dry_run else services.delete_users(user_ids)
+        click.echo(f"{'Would delete' if dry_run else 'Deleted'} {count} of {len(usernames)} named account(s).")
+
+    if inactive_days is not None:
+        cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=inactive_days)
+        count = services.purge_inactive_users(cutoff, batch_size or services.PURGE_BATCH_SIZE, dry_run=dry_run)
+        click.echo(f"{'Would delete' if dry_run else 'Deleted'} {count} account(s) inactive since {cutoff:%Y-%m-%d}.")
@@ -0,0 +1,286 @@
+"""
+Admission control for expensive endpoints.
+
+Each limited endpoint gets a concurrency limit with a bounded wait queue:
+up to `concurrency` requests run at once, up to `queue` more wait for at most
+`timeout` seconds, and the rest are turned away at once with 503 and
+Retry-After. An optional per-user token bucket (`per_minute`, `burst`; keyed
+by client address before login) answers 429 with Retry-After, which stops one
+client's recalculation storm from filling the queue for everyone. Cheap pages
+are never limited, so they stay responsive while the expensive ones shed load.
+
+A queued request holds its worker thread while it waits, so the defaults
+are derived from the threads per worker (WORKER_THREADS, which
+gunicorn.conf.py sets): expensive endpoints run on at most `threads - 1` of
+them, leaving one for cheap pages, and wait queues are short. A sync worker
+has a single thread and serves one request at a time, so there only the rate
+limits take effect.
+
+Limits are per process, token buckets included: with several workers a
+client's effective rate is up to `workers x per_minute`, depending on which
+worker serves each request. ADMISSION_LIMITS (JSON) overrides the defaults per
+endpoint, e.g. {"main.export_forecast": {"concurrency": 1}}; set an endpoint
+to null to lift its limit, or ADMISSION_CONTROL=off to disable all of them.
+Counters are served at /health/admission, behind ADMIN_API_TOKEN. The async handlers in app/asgi.py
+apply the same limits through Admission.admit_async.
+"""
+import asyncio
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app, g, jsonify, request
+from flask_login import current_user
+
+# ADMISSION_CONTROL values:
+#   on  - enforce ADMISSION_LIMITS (the default)
+#   off - admit every request
+ADMISSION_MODES = ('on', 'off')
+
+def default_limits(threads):
+    """
+    Endpoint -> limit settings (see Admission for the keys) for a worker with
+    `threads` threads. A queued request blocks its thread for up to `timeout`,
+    so running and queued requests of an endpoint together take at most
+    `threads - 1` threads, and queues hold one request for a few seconds.
+    """
+    slots = max(1, threads - 1)
+
+    def share(concurrency, timeout, **settings):
+        concurrency = max(1, min(concurrency, slots - 1))
+        return {'concurrency': concurrency, 'queue': min(1, slots - concurrency), 'timeout': timeout, **settings}
+
+    return {
+        # openpyxl workbook or CSV zip, streamed
+        'main.export_forecast': share(slots // 2, 5, per_minute=10, burst=3),
+        # several writes plus the forecast
+        'main.recalculate_forecast': share(slots, 2, per_minute=60, burst=10),
+        # password hashing; the login form itself is cheap
+        'auth.login': share(slots, 2, methods=['POST']),
+        'auth.register': share(slots // 2, 2, methods=['POST']),
+    }
+
+# Clients whose token buckets are kept per endpoint; the least recently seen are dropped.
+MAX_BUCKETS = int(os.environ.get('ADMISSION_MAX_BUCKETS', 10000))
+
+class Rejected(Exception):
+    """A request turned away, with its HTTP status and Retry-After seconds."""
+
+    def __init__(self, status, retry_after, reason):
+        super().__init__(reason)
+        self.status = status
+        self.retry_after = retry_after
+        self.reason = reason
+
+class ConcurrencyLimit:
+    """A semaphore with a bounded, time-limited wait queue and counters."""
+
+    def __init__(self, concurrency, queue=0, timeout=0):
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+        self.concurrency = concurrency
+        self.queue = queue
+        self.timeout = timeout
+        self._cond = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.admitted = 0
+        self.queue_full = 0
+        self.timed_out = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def acquire(self):
+        """
+        Takes a slot, waiting in the queue if there is room. Raises Rejected
+        (503) otherwise. The caller's thread is blocked while it waits.
+        """
+        retry_after = max(1, math.ceil(self.timeout))
+        with self._cond:  # reentrant, so try_acquire can take it again
+            if self.try_acquire():
+                return
+            if self.waiting >= self.queue:
+                self.queue_full += 1
+                raise Rejected(503, retry_after, 'queue_full')
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+            started = time.perf_counter()
+            try:
+                admitted = self._cond.wait_for(lambda: self.active < self.concurrency, self.timeout)
+            finally:
+                self.waiting -= 1
+            waited = time.perf_counter() - started
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+            if not admitted:
+                self.timed_out += 1
+                raise Rejected(503, retry_after, 'timeout')
+            self.active += 1
+            self.admitted += 1
+
+    def try_acquire(self):
+        """Takes a free slot without waiting. Returns False if the request would have to queue."""
+        with self._cond:
+            if self.active < self.concurrency and not self.waiting:
+                self.active += 1
+                self.admitted += 1
+                return True
+            return False
+
+    def release(self):
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def snapshot(self):
+        with self._cond:
+            return {
+                'concurrency': self.concurrency,
+                'queue': self.queue,
+                'active': self.active,
+                'queue_depth': self.waiting,
+                'max_queue_depth': self.max_waiting,
+                'admitted': self.admitted,
+                'rejected_queue_full': self.queue_full,
+                'rejected_timeout': self.timed_out,
+                'wait_avg_ms': (self.wait_total / self.admitted * 1000) if self.admitted else 0.0,
+                'wait_max_ms': self.wait_max * 1000,
+            }
+
+class TokenBuckets:
+    """Per-client token buckets refilled at `per_minute`, holding at most `burst` tokens."""
+
+    def __init__(self, per_minute, burst, max_clients=MAX_BUCKETS):
+        self.rate = per_minute / 60
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self.limited = 0
+
+    def take(self, key, now=None):
+        """Takes a token for `key`. Raises Rejected (429) with the wait until the next token."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+            else:
+                self._buckets[key] = (tokens, now)
+                self.limited += 1
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        if tokens < 1:
+            raise Rejected(429, max(1, math.ceil((1 - tokens) / self.rate)), 'rate_limited')
+
+class Admission:
+    """
+    The limits for one endpoint.
+
+    :param concurrency: Requests that may run at once.
+    :param queue: Requests that may wait for a slot.
+    :param timeout: Seconds a queued request waits before a 503.
+    :param per_minute: Sustained requests per client per minute, per process; None for no rate limit.
+    :param burst: Requests a client may make at once before the rate applies.
+    :param methods: Only these HTTP methods are limited; all if None.
+    """
+
+    def __init__(self, concurrency, queue=0, timeout=0, per_minute=None, burst=1, methods=None):
+        self.limit = ConcurrencyLimit(concurrency, queue, timeout)
+        self.buckets = TokenBuckets(per_minute, burst) if per_minute else None
+        self.methods = tuple(m.upper() for m in methods) if methods else None
+
+    def applies_to(self, method):
+        return self.methods is None or method in self.methods
+
+    def admit(self, client_key):
+        """Checks the rate limit, then takes a concurrency slot. Raises Rejected."""
+        if self.buckets is not None:
+            self.buckets.take(client_key)
+        self.limit.acquire()
+
+    async def admit_async(self, client_key):
+        """
+        `admit` for asyncio handlers. A request that has to queue waits in a
+        thread of the loop's default executor, not on the event loop.
+        """
+        if self.buckets is not None:
+            self.buckets.take(client_key)
+        if self.limit.try_acquire():
+            return
+        waiter = asyncio.get_running_loop().run_in_executor(None, self.limit.acquire)
+        try:
+            await asyncio.shield(waiter)
+        except asyncio.CancelledError:
+            # The client went away; hand back the slot if the wait still gets one
+            waiter.add_done_callback(lambda f: f.cancelled() or f.exception() or self.limit.release())
+            raise
+
+    def snapshot(self):
+        data = self.limit.snapshot()
+        data['rejected_rate_limited'] = self.buckets.limited if self.buckets is not None else 0
+        return data
+
+def build_admissions(limits):
+    """Builds an Admission per endpoint from `limits`, skipping endpoints set to None."""
+    return {endpoint: Admission(**settings) for endpoint, settings in limits.items() if settings is not None}
+
+def _client_key():
+    if current_user.is_authenticated:
+        return f"user:{current_user.get_id()}"
+    return f"addr:{request.remote_addr}"
+
+def _admit():
+    admission = current_app.extensions['admission'].get(request.endpoint)
+    if admission is None or not admission.applies_to(request.method):
+        return None
+    try:
+        admission.admit(_client_key())
+    except Rejected as e:
+        current_app.logger.warning(f"Rejected {request.method} {request.path}: {e.reason}")
+        response = jsonify({'error': rejection_message(e)})
+        response.status_code = e.status
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+    g.admission_release = admission.limit.release
+    return None
+
+def rejection_message(rejected):
+    """The error message sent with a 429 or 503."""
+    message = 'Too many requests' if rejected.status == 429 else 'Server busy'
+    return f'{message}, retry in {rejected.retry_after}s'
+
+def _hand_off_release(response):
+    # A streamed body (the zip export) is built after the request ends, so
+    # hold its slot until the response is closed.
+    if response.is_streamed:
+        release = g.pop('admission_release', None)
+        if release is not None:
+            response.call_on_close(release)
+    return response
+
+def _release(exception=None):
+    release = g.pop('admission_release', None)
+    if release is not None:
+        release()
+
+def init_app(app):
+    """Builds the per-endpoint limits and registers the admission hooks, unless ADMISSION_CONTROL is off."""
+    app.config.setdefault('ADMISSION_CONTROL', os.environ.get('ADMISSION_CONTROL', 'on').strip().lower())
+    mode = app.config['ADMISSION_CONTROL']
+    if mode not in ADMISSION_MODES:
+        raise ValueError(f"ADMISSION_CONTROL must be one of {', '.join(ADMISSION_MODES)}, got '{mode}'")
+    # Threads per worker; the gunicorn default with GUNICORN_IO_WAIT=0.5
+    app.config.setdefault('WORKER_THREADS', int(os.environ.get('WORKER_THREADS', 2)))
+    limits = default_limits(app.config['WORKER_THREADS'])
+    app.config.setdefault('ADMISSION_LIMITS', {**limits, **json.loads(os.environ.get('ADMISSION_LIMITS') or '{}')})
+
+    app.extensions['admission'] = build_admissions(app.config['ADMISSION_LIMITS']) if mode == 'on' else {}
+    if app.extensions['admission']:
+        app.before_request(_admit)
+        app.after_request(_hand_off_release)
+        app.teardown_request(_release)
@@ -0,0 +1,105 @@
+import hmac
+import os
+import threading
+from collections import OrderedDict
+from functools import wraps
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import current_user
+
+from . import services
+from .serialization import serialize, encoded_response, to_columnar
+
+bp = Blueprint('api', __name__, url_prefix='/api')
+
+# Serialized snapshots keyed by input fingerprint, so repeated polls of an
+# unchanged forecast skip the recompute even without If-None-Match.
+_SNAPSHOT_CACHE_SIZE = 256
+_snapshot_cache = OrderedDict()
+_snapshot_cache_lock = threading.Lock()
+
+def bearer_token_matches(env_var, auth_header):
+    """Checks an Authorization header value against the bearer token configured in `env_var`."""
+    expected = os.environ.get(env_var)
+    if not expected or not auth_header.startswith('Bearer '):
+        return False
+    return hmac.compare_digest(auth_header[len('Bearer '):].strip(), expected)
+
+def _has_valid_token(env_var):
+    """Checks the request's bearer token against the token configured in `env_var`."""
+    return bearer_token_matches(env_var, request.headers.get('Authorization', ''))
+
+def token_required(env_var):
+    """Allows the request only if it carries the bearer token configured in `env_var`."""
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if not _has_valid_token(env_var):
+                return jsonify({'error': 'authentication required'}), 401
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
+
+def token_or_owner_required(env_var):
+    """
+    Allows the request if it carries the bearer token configured in `env_var`,
+    or if the logged-in user is the one named by the `user_id` view argument.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            if _has_valid_token(env_var):
+                return view(*args, **kwargs)
+            if not current_user.is_authenticated:
+                return jsonify({'error': 'authentication required'}), 401
+            if kwargs.get('user_id') is not None and kwargs['user_id'] != current_user.id:
+                return jsonify({'error': 'forbidden'}), 403
+            return view(*args, **kwargs)
+        return wrapped
+    return decorator
+
+def _cached_snapshot(key):
+    with _snapshot_cache_lock:
+        body = _snapshot_cache.get(key)
+        if body is not None:
+            _snapshot_cache.move_to_end(key)
+        return body
+
+def _store_snapshot(key, body):
+    with _snapshot_cache_lock:
+        _snapshot_cache[key] = body
+        _snapshot_cache.move_to_end(key)
+        while len(_snapshot_cache) > _SNAPSHOT_CACHE_SIZE:
+            _snapshot_cache.popitem(last=False)
+
+@bp.route("/forecast/<int:user_id>", methods=["GET"])
+@token_or_owner_required('DASHBOARD_API_TOKEN')
+def forecast_snapshot(user_id):
+    """
+    Read-only JSON snapshot of a user's forecast and ratios.
+
+    The ETag is the fingerprint of the forecast inputs, so a poll with a matching
+    If-None-Match header is answered with 304 before anything is recomputed.
+    Pass `?layout=columnar` for the compact one-array-per-metric form.
+    """
+    inputs = services.get_forecast_inputs(user_id)
+    if inputs is None:
+        return jsonify({'error': 'forecast not found'}), 404
+
+    columnar = request.args.get('layout') == 'columnar'
+    fingerprint = services.forecast_fingerprint(*inputs)
+    etag = f'{fingerprint}-columnar' if columnar else fingerprint
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        body, serialize_ms = _cached_snapshot(etag), None
+        if body is None:
+            forecast, _ = services.compute_forecast(*inputs)
+            if columnar:
+                forecast = to_columnar(forecast)
+            body, serialize_ms = serialize({'user_id': user_id, 'fingerprint': fingerprint, 'forecast': forecast}, compact=columnar)
+            _store_snapshot(etag, body)
+        response = encoded_response(body, serialize_ms)
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
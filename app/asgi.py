@@ -0,0 +1,424 @@
+"""
+ASGI application that serves the JSON hot paths with async database access.
+
+POST /recalculate-forecast, POST /save-product-details and
+GET /api/forecast/<user_id> are handled here on async SQLAlchemy (asyncpg on
+PostgreSQL, aiosqlite on SQLite), so a request waiting on the database does not
+hold a thread. The forecast calculation and its serialization run in a thread
+pool. The write handlers are subject to the same admission limits as their
+Flask routes (see app/admission.py). Every other request, and any hot-path
+request these handlers cannot authenticate, is passed to the Flask app through
+asgiref's WSGI adapter.
+
+Run with an ASGI server, e.g. `uvicorn asgi:app` (see requirements-asgi.txt).
+"""
+import asyncio
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+
+from flask.sessions import SecureCookieSession
+from itsdangerous import BadSignature
+from sqlalchemy import bindparam, delete, exists, func, insert, or_, select, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from werkzeug.http import dump_cookie, parse_accept_header, parse_cookie, parse_etags
+
+from . import provisioning, services
+from .admission import Rejected, rejection_message
+from .api import bearer_token_matches, _cached_snapshot, _store_snapshot
+from .compression import choose_encoding, compress
+from .models import User, Product, Expense, Asset, Liability, FinancialParams
+from .pooling import TimedQueuePool, build_engine_options
+from .routing import REPLICA_BIND, STICKY_SESSION_KEY
+from .serialization import COMPRESSION_MIN_BYTES, DYNAMIC_COMPRESSION_LEVELS, dumps, round_cents, serialize, to_columnar
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError:  # pragma: no cover - asgiref is only needed for the ASGI entry point
+    WsgiToAsgi = None
+
+# Async drivers used in place of the configured sync ones.
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+
+user_table = User.__table__
+product_table = Product.__table__
+expense_table = Expense.__table__
+asset_table = Asset.__table__
+liability_table = Liability.__table__
+params_table = FinancialParams.__table__
+
+def async_database_url(db_url):
+    """Rewrites a sync database URL to use the matching async driver."""
+    url = make_url(db_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for '{backend}' databases")
+    url = url.set(drivername=ASYNC_DRIVERS[backend])
+    if backend == 'postgresql' and 'sslmode' in url.query:
+        # asyncpg takes libpq's sslmode as `ssl`
+        url = url.update_query_dict({'ssl': url.query['sslmode']}).difference_update_query(['sslmode'])
+    return url
+
+def async_engine_options(url, environ=os.environ):
+    """
+    Adapts build_engine_options to an async engine: the pool must be asyncio
+    compatible, and asyncpg names its connect timeout `timeout`.
+    """
+    options = build_engine_options(url.render_as_string(hide_password=False), environ)
+    if options.get('poolclass') is TimedQueuePool:
+        del options['poolclass']  # create_async_engine defaults to AsyncAdaptedQueuePool
+    connect_args = options.pop('connect_args', {})
+    if 'connect_timeout' in connect_args:
+        options['connect_args'] = {'timeout': connect_args['connect_timeout']}
+    return options
+
+class _Request:
+    """The parts of an ASGI HTTP scope the handlers need."""
+
+    def __init__(self, scope, receive):
+        self.receive = receive
+        self.headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+        self.args = {k: v[0] for k, v in parse_qs(scope.get('query_string', b'').decode('latin-1')).items()}
+
+    async def json(self):
+        chunks, more_body = [], True
+        while more_body:
+            message = await self.receive()
+            chunks.append(message.get('body', b''))
+            more_body = message.get('more_body', False)
+        return json.loads(b''.join(chunks) or b'{}')
+
+class AsyncForecastApp:
+    """Routes the hot paths to async handlers and everything else to Flask."""
+
+    def __init__(self, flask_app, engine, executor):
+        self.flask_app = flask_app
+        self.engine = engine
+        self.executor = executor
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.routes = [
+            ('POST', re.compile(r'/recalculate-forecast'), self.recalculate_forecast),
+            ('POST', re.compile(r'/save-product-details'), self.save_product_details),
+            ('GET', re.compile(r'/api/forecast/(?P<user_id>\d+)'), self.forecast_snapshot),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] == 'http':
+            for method, pattern, handler in self.routes:
+                match = pattern.fullmatch(scope['path'])
+                if match and scope['method'] == method:
+                    # Handlers return None, before reading the body, to hand the request to Flask.
+                    response = await handler(_Request(scope, receive), **match.groupdict())
+                    if response is not None:
+                        return await _send(send, *response)
+                    break
+        return await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _run(self, func, *args):
+        """Runs CPU-bound work in the executor so the event loop keeps serving other requests."""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def _admitted(self, endpoint, method, user_id, handler, *args):
+        """
+        Runs `handler` under the Admission of the Flask `endpoint` it stands in
+        for, answering 429 or 503 as admission._admit does.
+        """
+        admission = self.flask_app.extensions.get('admission', {}).get(endpoint)
+        if admission is None or not admission.applies_to(method):
+            return await handler(*args)
+        try:
+            await admission.admit_async(f"user:{user_id}")
+        except Rejected as e:
+            self.flask_app.logger.warning(f"Rejected {method} {endpoint}: {e.reason}")
+            status, headers, body = _json_error(e.status, rejection_message(e))
+            return status, headers + [('Retry-After', str(e.retry_after))], body
+        try:
+            return await handler(*args)
+        finally:
+            admission.limit.release()
+
+    # --- Session ---
+
+    def _session(self, request):
+        """Decodes the signed Flask session cookie; None if it is missing or invalid."""
+        app = self.flask_app
+        value = parse_cookie(request.headers.get('cookie', '')).get(app.config['SESSION_COOKIE_NAME'])
+        serializer = app.session_interface.get_signing_serializer(app)
+        if not value or serializer is None:
+            return None
+        try:
+            return serializer.loads(value, max_age=int(app.permanent_session_lifetime.total_seconds()))
+        except BadSignature:
+            return None
+
+    def _session_user_id(self, request):
+        """The id Flask-Login stored in the session, or None if nobody is logged in."""
+        try:
+            return int(self._session(request)['_user_id'])
+        except (TypeError, KeyError, ValueError):
+            return None
+
+    def _sticky_cookie(self, request):
+        """
+        Pins the client to the primary after a write, like routing._remember_write.
+        Returns a Set-Cookie header, or None when there is no read replica.
+        """
+        app = self.flask_app
+        if REPLICA_BIND not in app.config.get('SQLALCHEMY_BINDS', {}):
+            return None
+        session = SecureCookieSession(self._session(request) or {})
+        session[STICKY_SESSION_KEY] = time.time() + app.config['DB_REPLICA_STICKY_SECONDS']
+        interface = app.session_interface
+        value = interface.get_signing_serializer(app).dumps(dict(session))
+        return ('Set-Cookie', dump_cookie(
+            app.config['SESSION_COOKIE_NAME'], value,
+            expires=interface.get_expiration_time(app, session),
+            domain=interface.get_cookie_domain(app), path=interface.get_cookie_path(app),
+            secure=interface.get_cookie_secure(app), httponly=interface.get_cookie_httponly(app),
+            samesite=interface.get_cookie_samesite(app)
+        ))
+
+    # --- Queries ---
+
+    async def _load_params(self, conn, user_id):
+        row = (await conn.execute(select(params_table).where(params_table.c.user_id == user_id))).first()
+        return SimpleNamespace(**row._mapping) if row is not None else None
+
+    async def _ensure_provisioned(self, conn, user_id):
+        """
+        Async counterpart of provisioning.ensure_provisioned: writes a deferred
+        user's default rows in the current transaction if they have no data.
+        """
+        with self.flask_app.app_context():
+            inserts = provisioning.provisioning_inserts(user_id)
+        if await conn.scalar(select(or_(*(exists().where(statement.table.c.user_id == user_id) for statement, _ in inserts)))):
+            return
+        for statement, rows in inserts:
+            await conn.execute(statement, rows)
+
+    async def _load_products(self, conn, user_id):
+        result = await conn.execute(select(product_table).where(product_table.c.user_id == user_id).order_by(product_table.c.id))
+        return [dict(row._mapping) for row in result]
+
+    async def _load_forecast_inputs(self, conn, user_id):
+        """Async counterpart of services.get_forecast_inputs."""
+        params = await self._load_params(conn, user_id)
+        if params is None:
+            return None
+        products = await self._load_products(conn, user_id)
+        total_assets = await conn.scalar(
+            select(func.coalesce(func.sum(asset_table.c.amount), 0.0)).where(asset_table.c.user_id == user_id)
+        )
+        total_debt = await conn.scalar(
+            select(func.coalesce(func.sum(liability_table.c.amount), 0.0)).where(liability_table.c.user_id == user_id)
+        )
+        return params, products, float(total_assets or 0.0), float(total_debt or 0.0)
+
+    async def _user_exists(self, conn, user_id):
+        return await conn.scalar(select(user_table.c.id).where(user_table.c.id == user_id)) is not None
+
+    async def _replace_rows(self, conn, table, key, submitted, rows, user_id):
+        """
+        Deletes the user's rows whose `key` was not submitted, updates the rows
+        that still exist and inserts the new ones, one executemany per step.
+        """
+        column = table.c[key]
+        await conn.execute(delete(table).where(table.c.user_id == user_id, ~column.in_(submitted)))
+        existing = set((await conn.scalars(select(column).where(table.c.user_id == user_id))).all())
+
+        updates = [
+            {'b_user_id': user_id, 'b_key': row[key], **{k: v for k, v in row.items() if k != key}}
+            for row in rows if row[key] in existing
+        ]
+        inserts = [dict(row, user_id=user_id) for row in rows if row[key] not in existing]
+        if updates:
+            await conn.execute(
+                update(table).where(table.c.user_id == bindparam('b_user_id'), column == bindparam('b_key')),
+                updates
+            )
+        if inserts:
+            await conn.execute(insert(table), inserts)
+
+    # --- CPU-bound work (runs in the executor) ---
+
+    def _compute(self, params, total_assets, total_debt, products):
+        # The same per-user forecast graph as the Flask route. Products are
+        # loaded on the async engine, and only when the graph has no base
+        # revenue for params.product_revision yet.
+        with self.flask_app.app_context():
+            return services.compute_forecast_incremental(params, total_assets, total_debt, products)
+
+    def _forecast_body(self, forecast, columnar):
+        if columnar:
+            return dumps(round_cents(to_columnar(forecast)))
+        return self.flask_app.json.dumps(forecast).encode('utf-8')
+
+    def _snapshot_body(self, user_id, fingerprint, inputs, columnar):
+        with self.flask_app.app_context():
+            forecast, _ = services.compute_forecast(*inputs)
+            if columnar:
+                forecast = to_columnar(forecast)
+            body, _ = serialize({'user_id': user_id, 'fingerprint': fingerprint, 'forecast': forecast}, compact=columnar)
+            return body
+
+    # --- Handlers ---
+
+    async def recalculate_forecast(self, request):
+        """Async counterpart of main.recalculate_forecast."""
+        user_id = self._session_user_id(request)
+        if user_id is None:
+            return None
+        return await self._admitted('main.recalculate_forecast', 'POST', user_id, self._recalculate_forecast, request, user_id)
+
+    async def _recalculate_forecast(self, request, user_id):
+        data = await request.json()
+        assets = [
+            {'description': item['description'], 'amount': float(item.get('amount', 0) or 0), 'user_id': user_id}
+            for item in data.get('assets', []) if item.get('description')
+        ]
+        liabilities = [
+            {**services.liability_fields(item), 'user_id': user_id}
+            for item in data.get('liabilities', []) if item.get('description')
+        ]
+
+        async with self.engine.begin() as conn:
+            if not await self._user_exists(conn, user_id):
+                return _json_error(401, 'authentication required')
+            await self._ensure_provisioned(conn, user_id)
+            await conn.execute(delete(asset_table).where(asset_table.c.user_id == user_id))
+            if assets:
+                await conn.execute(insert(asset_table), assets)
+            await conn.execute(delete(liability_table).where(liability_table.c.user_id == user_id))
+            if liabilities:
+                await conn.execute(insert(liability_table), liabilities)
+            params = await self._load_params(conn, user_id)
+            with self.flask_app.app_context():
+                needs_products = services.forecast_needs_products(params)
+            products = await self._load_products(conn, user_id) if needs_products else None
+
+        services.apply_forecast_data(params, data)
+        total_assets = sum(a['amount'] for a in assets)
+        total_debt = sum(l['amount'] for l in liabilities)
+        forecast, net_operating_income = await self._run(self._compute, params, total_assets, total_debt, products)
+
+        async with self.engine.begin() as conn:
+            await conn.execute(update(params_table).where(params_table.c.user_id == user_id).values(
+                **{field: getattr(params, field) for field in services.FORECAST_INPUT_FIELDS},
+                total_annual_revenue=forecast['annual']['revenue'],
+                annual_net_profit=forecast['annual']['net_profit'],
+                quarterly_net_profit=forecast['quarterly']['net_profit'],
+                net_operating_income=net_operating_income
+            ))
+
+        body = await self._run(self._forecast_body, forecast, request.args.get('layout') == 'columnar')
+        return _json(request, 200, body, [self._sticky_cookie(request)])
+
+    async def save_product_details(self, request):
+        """Async counterpart of main.save_product_details."""
+        user_id = self._session_user_id(request)
+        if user_id is None:
+            return None
+        return await self._admitted('main.save_product_details', 'POST', user_id, self._save_product_details, request, user_id)
+
+    async def _save_product_details(self, request, user_id):
+        data = await request.json()
+        descriptions = {p.get('description') for p in data.get('products', []) if p.get('description')}
+        items = {e.get('item') for e in data.get('expenses', []) if e.get('item')}
+
+        async with self.engine.begin() as conn:
+            if not await self._user_exists(conn, user_id):
+                return _json_error(401, 'authentication required')
+            await self._ensure_provisioned(conn, user_id)
+            await self._replace_rows(conn, product_table, 'description', descriptions, list(services.parse_product_rows(data)), user_id)
+            await self._replace_rows(conn, expense_table, 'item', items, list(services.parse_expense_rows(data)), user_id)
+            await conn.execute(update(params_table).where(params_table.c.user_id == user_id).values(
+                company_name=data.get('company_name', ''), product_revision=params_table.c.product_revision + 1
+            ))
+
+        return _json(request, 200, dumps({'status': 'success'}), [self._sticky_cookie(request)])
+
+    async def forecast_snapshot(self, request, user_id):
+        """Async counterpart of api.forecast_snapshot, sharing its snapshot cache."""
+        user_id = int(user_id)
+        if not bearer_token_matches('DASHBOARD_API_TOKEN', request.headers.get('authorization', '')) \
+                and self._session_user_id(request) != user_id:
+            return None  # Flask answers with 401 or 403
+
+        async with self.engine.connect() as conn:
+            inputs = await self._load_forecast_inputs(conn, user_id)
+        if inputs is None:
+            return _json_error(404, 'forecast not found')
+
+        columnar = request.args.get('layout') == 'columnar'
+        fingerprint = services.forecast_fingerprint(*inputs)
+        etag = f'{fingerprint}-columnar' if columnar else fingerprint
+        headers = [('ETag', f'"{etag}"'), ('Cache-Control', 'private, no-cache')]
+        if parse_etags(request.headers.get('if-none-match')).contains(etag):
+            return 304, headers, b''
+
+        body = _cached_snapshot(etag)
+        if body is None:
+            body = await self._run(self._snapshot_body, user_id, fingerprint, inputs, columnar)
+            _store_snapshot(etag, body)
+        return _json(request, 200, body, headers)
+
+def _json(request, status, body, headers=()):
+    """Builds a JSON response, compressed like serialization.encoded_response."""
+    headers = [h for h in headers if h is not None]
+    if len(body) >= COMPRESSION_MIN_BYTES:
+        encoding = choose_encoding(parse_accept_header(request.headers.get('accept-encoding')))
+        if encoding:
+            body = compress(body, encoding, DYNAMIC_COMPRESSION_LEVELS[encoding])
+            headers.append(('Content-Encoding', encoding))
+    headers += [('Content-Type', 'application/json'), ('Vary', 'Accept-Encoding')]
+    return status, headers, body
+
+def _json_error(status, message):
+    return status, [('Content-Type', 'application/json')], dumps({'error': message})
+
+async def _send(send, status, headers, body):
+    headers = headers + [('Content-Length', str(len(body)))]
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(k.lower().encode('latin-1'), v.encode('latin-1')) for k, v in headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+def create_asgi_app(flask_app=None, executor=None):
+    """
+    Wraps a Flask app (by default a new one from create_app) in the ASGI application.
+
+    :param executor: Runs the forecast calculations. Defaults to a thread pool
+        sized by ASGI_CPU_WORKERS, or the CPU count.
+    """
+    if WsgiToAsgi is None:
+        raise RuntimeError("The ASGI entry point requires asgiref; install requirements-asgi.txt")
+    if flask_app is None:
+        from . import create_app
+        flask_app = create_app()
+
+    url = async_database_url(flask_app.config['SQLALCHEMY_DATABASE_URI'])
+    engine = create_async_engine(url, **async_engine_options(url))
+    if executor is None:
+        workers = int(os.environ.get('ASGI_CPU_WORKERS') or os.cpu_count() or 1)
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='forecast')
+    return AsyncForecastApp(flask_app, engine, executor)
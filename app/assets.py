@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import shutil
+import click
+from flask import Blueprint, current_app, request, send_from_directory, url_for, abort
+
+from .compression import ENCODING_SUFFIXES, choose_encoding, compress, supported_encodings
+
+bp = Blueprint('assets', __name__, url_prefix='/assets')
+
+# Static sub-directories and file types that go through the build step.
+ASSET_DIRS = ('scripts', 'css')
+ASSET_EXTENSIONS = ('.js', '.css')
+DIST_DIR = 'dist'
+MANIFEST_NAME = 'manifest.json'
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+def _dist_folder(app):
+    return os.path.join(app.static_folder, DIST_DIR)
+
+def build_assets(static_folder):
+    """
+    Copies every script and stylesheet into static/dist under a content-hashed
+    name, writes gzip (and brotli, if available) variants next to each one,
+    and records the mapping in static/dist/manifest.json.
+
+    :return: The manifest dict mapping original to fingerprinted paths.
+    """
+    dist_folder = os.path.join(static_folder, DIST_DIR)
+    shutil.rmtree(dist_folder, ignore_errors=True)
+
+    manifest = {}
+    for asset_dir in ASSET_DIRS:
+        source_dir = os.path.join(static_folder, asset_dir)
+        if not os.path.isdir(source_dir):
+            continue
+        for name in sorted(os.listdir(source_dir)):
+            stem, ext = os.path.splitext(name)
+            if ext not in ASSET_EXTENSIONS:
+                continue
+            with open(os.path.join(source_dir, name), 'rb') as f:
+                content = f.read()
+
+            digest = hashlib.sha256(content).hexdigest()[:12]
+            fingerprinted = f'{asset_dir}/{stem}.{digest}{ext}'
+            target = os.path.join(dist_folder, fingerprinted)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with open(target, 'wb') as f:
+                f.write(content)
+            for encoding in supported_encodings():
+                with open(target + ENCODING_SUFFIXES[encoding], 'wb') as f:
+                    f.write(compress(content, encoding))
+
+            manifest[f'{asset_dir}/{name}'] = fingerprinted
+
+    os.makedirs(dist_folder, exist_ok=True)
+    with open(os.path.join(dist_folder, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+def get_manifest(app):
+    """Loads the asset manifest once per process. Returns {} if assets were not built."""
+    manifest = app.extensions.get('asset_manifest')
+    if manifest is None:
+        try:
+            with open(os.path.join(_dist_folder(app), MANIFEST_NAME)) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            manifest = {}
+        app.extensions['asset_manifest'] = manifest
+    return manifest
+
+def asset_url_for(endpoint, **values):
+    """
+    Template `url_for` that points static scripts and stylesheets at their
+    fingerprinted copies when a build manifest exists. Debug mode always
+    serves the live files so edits show up without a rebuild.
+    """
+    if endpoint == 'static' and not current_app.debug:
+        fingerprinted = get_manifest(current_app).get(values.get('filename'))
+        if fingerprinted:
+            values['filename'] = fingerprinted
+            return url_for('assets.fingerprinted', **values)
+    return url_for(endpoint, **values)
+
+@bp.route('/<path:filename>')
+def fingerprinted(filename):
+    """Serves a built asset, preferring a precompressed variant the client accepts."""
+    dist_folder = _dist_folder(current_app)
+    if filename not in get_manifest(current_app).values():
+        abort(404)
+
+    available = [
+        encoding for encoding in supported_encodings()
+        if os.path.exists(os.path.join(dist_folder, filename + ENCODING_SUFFIXES[encoding]))
+    ]
+    encoding = choose_encoding(request.accept_encodings, available)
+    mimetype = 'text/css' if filename.endswith('.css') else 'text/javascript'
+
+    if encoding:
+        response = send_from_directory(dist_folder, filename + ENCODING_SUFFIXES[encoding], mimetype=mimetype)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(dist_folder, filename, mimetype=mimetype)
+
+    response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    response.vary.add('Accept-Encoding')
+    return response
+
+@click.command('build-assets')
+def build_assets_command():
+    """Fingerprint and precompress static scripts and stylesheets."""
+    manifest = build_assets(current_app.static_folder)
+    current_app.extensions.pop('asset_manifest', None)
+    encodings = ', '.join(supported_encodings())
+    click.echo(f"Built {len(manifest)} assets ({encodings}) into static/{DIST_DIR}.")
@@ -0,0 +1,36 @@
+import gzip
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+# File suffix used for each precompressed variant of a static asset.
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+def supported_encodings():
+    """Returns the content encodings this process can produce, best first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+def choose_encoding(accept_encodings, available=None):
+    """
+    Picks the best encoding the client accepts.
+
+    :param accept_encodings: The request's parsed Accept-Encoding header.
+    :param available: Encodings to choose from; defaults to all supported ones.
+    :return: 'br', 'gzip', or None if the response should be sent uncompressed.
+    """
+    for encoding in supported_encodings() if available is None else available:
+        if accept_encodings.quality(encoding) > 0:
+            return encoding
+    return None
+
+def compress(data, encoding, level=None):
+    """Compresses bytes with the given encoding ('br' or 'gzip')."""
+    if encoding == 'br':
+        if brotli is None:
+            raise RuntimeError("brotli is not installed")
+        return brotli.compress(data, quality=11 if level is None else level)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=9 if level is None else level, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
@@ -1,7 +1,11 @@
 import json
 import os
+import re
+from sqlalchemy import select, update, func, text, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
 from .extensions import db
-from .models import AssessmentMessage
+from .models import AssessmentMessage, Product, Expense, Asset, Liability, FinancialParams, BusinessStartupActivity, column_keys, record_class
 
 def get_assessment_messages():
     """Retrieves all assessment messages from the database using SQLAlchemy."""
@@ -14,4 +18,132 @@ def get_assessment_messages():
             'status_class': row.status_class,
             'dscr_status': row.dscr_status
         }
-    return messages
\ No newline at end of file
+    return messages
+
+ASSESSMENT_MESSAGE_FIELDS = ('status', 'caption', 'status_class', 'dscr_status')
+
+def upsert_assessment_messages(messages):
+    """
+    Brings the assessment_message table in line with `messages` (risk level ->
+    fields): one SELECT, then, only for rows that are missing or differ, one
+    INSERT ... ON CONFLICT DO UPDATE. Commits when it writes.
+
+    :return: The number of rows inserted or updated.
+    """
+    fields = ASSESSMENT_MESSAGE_FIELDS
+    columns = [getattr(AssessmentMessage, field) for field in fields]
+    existing = {row[0]: tuple(row[1:]) for row in db.session.execute(select(AssessmentMessage.risk_level, *columns))}
+    rows = [
+        {'risk_level': risk_level, **{field: data[field] for field in fields}}
+        for risk_level, data in messages.items()
+        if existing.get(risk_level) != tuple(data[field] for field in fields)
+    ]
+    if not rows:
+        return 0
+
+    dialect = {'postgresql': postgresql, 'sqlite': sqlite}.get(db.session.get_bind().dialect.name)
+    if dialect is not None:
+        stmt = dialect.insert(AssessmentMessage).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['risk_level'], set_={field: stmt.excluded[field] for field in fields}
+        )
+        db.session.execute(stmt)
+    else:
+        missing = [row for row in rows if row['risk_level'] not in existing]
+        changed = [{**row, 'level': row['risk_level']} for row in rows if row['risk_level'] in existing]
+        if missing:
+            db.session.execute(AssessmentMessage.__table__.insert(), missing)
+        if changed:
+            table = AssessmentMessage.__table__
+            db.session.execute(update(table).where(table.c.risk_level == bindparam('level')), changed)
+    db.session.commit()
+    return len(rows)
+
+# --- Migration state ---
+
+_REVISION_RE = re.compile(r"^revision\s*=\s*['\"]([^'\"]+)['\"]", re.M)
+_DOWN_REVISION_RE = re.compile(r"^down_revision\s*=\s*(.+)$", re.M)
+_QUOTED_RE = re.compile(r"['\"]([^'\"]+)['\"]")
+
+def script_heads(versions_dir):
+    """
+    The head revision ids of the migration scripts in `versions_dir`, read
+    from their `revision` and `down_revision` lines without importing them.
+    """
+    revisions, parents = set(), set()
+    for name in os.listdir(versions_dir):
+        if not name.endswith('.py'):
+            continue
+        with open(os.path.join(versions_dir, name), encoding='utf-8') as f:
+            source = f.read()
+        revision = _REVISION_RE.search(source)
+        if revision is None:
+            continue
+        revisions.add(revision.group(1))
+        down_revision = _DOWN_REVISION_RE.search(source)
+        if down_revision is not None:
+            parents.update(_QUOTED_RE.findall(down_revision.group(1)))
+    return revisions - parents
+
+def database_revisions():
+    """
+    The revision ids in the database's alembic_version table, or None if it has
+    none. Uses its own short-lived connection, so nothing is held open for the
+    migrations that may follow.
+    """
+    try:
+        with db.engine.connect() as conn:
+            return {row[0] for row in conn.execute(text('SELECT version_num FROM alembic_version'))}
+    except SQLAlchemyError:
+        return None
+
+def user_records(model, user_id):
+    """
+    Loads a user's rows of `model` with a column-only query, as records
+    (see models.record_class) in id order. Use where the rows are only read.
+    """
+    stmt = select(*(getattr(model, key) for key in column_keys(model))).where(model.user_id == user_id).order_by(model.id)
+    make = record_class(model)._make
+    return [make(row) for row in db.session.execute(stmt)]
+
+def user_records_page(model, user_id, offset=0, limit=100, search_column=None, q=''):
+    """
+    Loads one page of a user's rows of `model` as records, in id order.
+
+    :param search_column: Name of a text column to filter on.
+    :param q: Case-insensitive substring `search_column` must contain.
+    :return: A tuple of (records, number of matching rows).
+    """
+    condition = model.user_id == user_id
+    if search_column and q:
+        pattern = '%' + q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        condition = condition & getattr(model, search_column).ilike(pattern, escape='\\')
+    total = db.session.execute(select(func.count()).select_from(model).where(condition)).scalar_one()
+    stmt = (select(*(getattr(model, key) for key in column_keys(model)))
+            .where(condition).order_by(model.id).offset(offset).limit(limit))
+    make = record_class(model)._make
+    return [make(row) for row in db.session.execute(stmt)], total
+
+def hot_queries(user_id, description='', item=''):
+    """The per-user queries the request paths run most often, as (label, statement) pairs."""
+    return [
+        ('products for user', select(Product).where(Product.user_id == user_id).order_by(Product.id)),
+        ('product by description', select(Product).where(Product.user_id == user_id, Product.description == description)),
+        ('products page', select(Product).where(Product.user_id == user_id, Product.description.ilike(f'%{description}%')).order_by(Product.id).limit(100)),
+        ('expenses for user', select(Expense).where(Expense.user_id == user_id).order_by(Expense.id)),
+        ('expense by item', select(Expense).where(Expense.user_id == user_id, Expense.item == item)),
+        ('total assets', select(func.sum(Asset.amount)).where(Asset.user_id == user_id)),
+        ('total liabilities', select(func.sum(Liability.amount)).where(Liability.user_id == user_id)),
+        ('startup activities for user', select(BusinessStartupActivity).where(BusinessStartupActivity.user_id == user_id).order_by(BusinessStartupActivity.id)),
+        ('financial params for user', select(FinancialParams).where(FinancialParams.user_id == user_id)),
+    ]
+
+def explain(statement, analyze=False):
+    """Returns the database's query plan for a statement as a list of text lines."""
+    engine = db.engine
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={'literal_binds': True}))
+    if engine.dialect.name == 'sqlite':
+        rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}')).all()
+        return [row[-1] for row in rows]
+    prefix = 'EXPLAIN (ANALYZE, BUFFERS)' if analyze else 'EXPLAIN'
+    return [row[0] for row in db.session.execute(text(f'{prefix} {sql}')).all()]
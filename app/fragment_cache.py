@@ -0,0 +1,171 @@
+"""
+Jinja fragment caching.
+
+    {% cache 'ratio-cards' %}...{% endcache %}
+    {% cache 'forecast-data', forecast_version %}...{% endcache %}
+
+A block renders once per distinct key and is served from the cache after
+that. The key is the template name, the block's name and any further key
+expressions, plus FRAGMENT_CACHE_VERSION, which defaults to a hash of the
+templates, so editing a template or deploying new ones never serves an old
+fragment. Static blocks need no key; a per-user block lists every input it
+depends on (ids, revisions, input fingerprints), so it renders again only
+when one of them changes. Only the block's output is cached: its key
+expressions are evaluated on every render.
+
+FRAGMENT_CACHE values:
+    lru  - an in-process LRU of FRAGMENT_CACHE_SIZE entries (the default)
+    disk - one file per fragment under FRAGMENT_CACHE_DIR, shared by every
+           worker on the host
+    off  - render every block (the default in debug mode)
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from flask import current_app
+from jinja2 import nodes
+from jinja2.ext import Extension
+from markupsafe import Markup
+
+FRAGMENT_CACHE_MODES = ('lru', 'disk', 'off')
+
+class LRUBackend:
+    """Fragments in a per-process OrderedDict, least recently used first."""
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+class DiskBackend:
+    """
+    Fragments as files under `directory`, written atomically so concurrent
+    workers never read a partial one. Every `prune_every` writes, the oldest
+    files beyond `max_entries` are removed.
+    """
+
+    def __init__(self, directory, max_entries=512, prune_every=100):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key):
+        try:
+            with open(os.path.join(self.directory, key), encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key, value):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(value)
+        os.replace(temp_path, os.path.join(self.directory, key))
+        self._writes += 1
+        if self._writes % self.prune_every == 0:
+            self._prune()
+
+    def _prune(self):
+        entries = [e for e in os.scandir(self.directory) if e.is_file() and not e.name.startswith('.tmp-')]
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda e: e.stat().st_mtime)
+        for entry in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+class FragmentCache:
+    """Versioned fragment keys over a backend, with hit and miss counters."""
+
+    def __init__(self, backend, version=''):
+        self.backend = backend
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, parts):
+        encoded = json.dumps([self.version, *parts], separators=(',', ':'), default=str)
+        return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+    def get_or_render(self, parts, render):
+        """Returns the cached fragment for `parts`, calling `render()` to fill it on a miss."""
+        key = self.key(parts)
+        value = self.backend.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        self.misses += 1
+        value = render()
+        self.backend.set(key, value)
+        return value
+
+class FragmentCacheExtension(Extension):
+    """The {% cache name[, key, ...] %}...{% endcache %} tag."""
+
+    tags = {'cache'}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        parts = [nodes.Const(parser.name), parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            parts.append(parser.parse_expression())
+        body = parser.parse_statements(('name:endcache',), drop_needle=True)
+        return nodes.CallBlock(self.call_method('_render', [nodes.List(parts)]), [], [], body).set_lineno(lineno)
+
+    def _render(self, parts, caller):
+        cache = current_app.extensions.get('fragment_cache')
+        if cache is None:
+            return caller()
+        return Markup(cache.get_or_render(parts, caller))
+
+def templates_version(template_folder):
+    """A short hash of every template's name and contents."""
+    digest = hashlib.sha256()
+    for root, dirs, files in os.walk(template_folder):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, template_folder).encode('utf-8'))
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+def init_app(app):
+    """Registers the {% cache %} tag and builds the FRAGMENT_CACHE backend."""
+    app.config.setdefault('FRAGMENT_CACHE', os.environ.get('FRAGMENT_CACHE', 'off' if app.debug else 'lru').strip().lower())
+    mode = app.config['FRAGMENT_CACHE']
+    if mode not in FRAGMENT_CACHE_MODES:
+        raise ValueError(f"FRAGMENT_CACHE must be one of {', '.join(FRAGMENT_CACHE_MODES)}, got '{mode}'")
+    app.config.setdefault('FRAGMENT_CACHE_SIZE', int(os.environ.get('FRAGMENT_CACHE_SIZE', 512)))
+    app.config.setdefault('FRAGMENT_CACHE_DIR', os.environ.get('FRAGMENT_CACHE_DIR') or os.path.join(app.instance_path, 'fragments'))
+    app.config.setdefault('FRAGMENT_CACHE_VERSION', os.environ.get('FRAGMENT_CACHE_VERSION') or templates_version(app.template_folder))
+
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    if mode == 'lru':
+        backend = LRUBackend(app.config['FRAGMENT_CACHE_SIZE'])
+    elif mode == 'disk':
+        backend = DiskBackend(app.config['FRAGMENT_CACHE_DIR'], app.config['FRAGMENT_CACHE_SIZE'])
+    else:
+        return
+    app.extensions['fragment_cache'] = FragmentCache(backend, app.config['FRAGMENT_CACHE_VERSION'])
@@ -0,0 +1,32 @@
+from flask import Blueprint, jsonify, current_app
+from sqlalchemy import text
+
+from .api import token_required
+from .extensions import db
+
+bp = Blueprint('health', __name__, url_prefix='/health')
+
+@bp.route("/db", methods=["GET"])
+@token_required('ADMIN_API_TOKEN')
+def db_health():
+    """Reports database reachability and connection-pool metrics for each engine."""
+    pools = {}
+    for bind_key, metrics in current_app.extensions.get('pool_metrics', {}).items():
+        pools[bind_key or 'default'] = metrics.snapshot(db.engines[bind_key].pool)
+
+    status, code = 'ok', 200
+    try:
+        db.session.execute(text('SELECT 1'))
+    except Exception as e:
+        current_app.logger.error(f"Database health check failed: {e}")
+        db.session.rollback()
+        status, code = 'unavailable', 503
+
+    return jsonify({'status': status, 'pools': pools}), code
+
+@bp.route("/admission", methods=["GET"])
+@token_required('ADMIN_API_TOKEN')
+def admission_health():
+    """Reports queue depth and rejected requests for each admission-limited endpoint."""
+    endpoints = {endpoint: admission.snapshot() for endpoint, admission in current_app.extensions.get('admission', {}).items()}
+    return jsonify({'enabled': bool(endpoints), 'endpoints': endpoints})
@@ -1,15 +1,20 @@
 import json
-from flask import Blueprint, render_template, request, jsonify, send_file, redirect, url_for, flash, g, current_app
+from flask import Blueprint, render_template, request, jsonify, send_file, redirect, url_for, flash, g, current_app, Response
 from typing import Any, Dict
 from sqlalchemy import update, delete
 from flask_login import login_required, current_user
 
 from .extensions import db
-from .models import FinancialParams, Asset, Liability, BusinessStartupActivity
+from .models import FinancialParams, Asset, Liability, BusinessStartupActivity, Product, Expense
 from logic.loan import calculate_loan_schedule
 from logic.financial_ratios import calculate_dscr
 from utils.export import create_forecast_spreadsheet
-from .database import get_assessment_messages
+from utils.export_template import create_forecast_spreadsheet_from_template
+from utils.export_csv import stream_forecast_zip
+from .database import get_assessment_messages, user_records
+from .serialization import json_response, to_columnar
+from .routing import primary_db
+from .provisioning import provisioned
 
 bp = Blueprint('main', __name__, url_prefix='/')
 
@@ -48,7 +53,9 @@ def library():
     return render_template('library.html')
 
 @bp.route('/startup-activities', methods=['GET', 'POST'])
+@primary_db
 @login_required
+@provisioned
 def startup_activities():
     if request.method == 'POST':
         form_ids = request.form.getlist('id')
@@ -122,28 +129,80 @@ def startup_activities():
 
 @bp.route("/product-detail", methods=["GET"])
 @login_required
+@provisioned
 def product_detail():
     from . import services
-    products, expenses, company_name = services.get_product_and_expense_data(current_user.id)
+    # Only the first page is embedded; the page fetches the rest as it scrolls.
+    page_size = services.CATALOG_PAGE_SIZE
+    products, expenses, company_name = services.get_product_and_expense_data(current_user.id, limit=page_size)
     page_data = {
         "products": products,
         "expenses": expenses,
         "company_name": company_name,
+        "totals": services.get_catalog_totals(current_user.id),
+        "page_size": page_size,
+        "products_url": url_for('main.catalog_page', kind='products'),
+        "expenses_url": url_for('main.catalog_page', kind='expenses'),
+        "products_import_url": url_for('main.import_catalog', kind='products'),
+        "expenses_import_url": url_for('main.import_catalog', kind='expenses'),
         "save_url": url_for('main.save_product_details'),
         "continue_url": url_for('main.financial_forecast')
     }
     return render_template('product-detail.html', page_data=page_data)
 
-@bp.route("/save-product-details", methods=["POST"])
+@bp.route("/product-detail/<any(products, expenses):kind>", methods=["GET"])
 @login_required
+@provisioned
+def catalog_page(kind):
+    """One page of the user's products or expenses: ?offset=0&limit=100&q=text."""
+    from . import services
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', services.CATALOG_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'offset and limit must be integers'}), 400
+    page = services.get_catalog_page(current_user.id, kind, offset, limit, request.args.get('q', ''))
+    return json_response(page)
+
+@bp.route("/product-detail/<any(products, expenses):kind>/import", methods=["POST"])
+@login_required
+@provisioned
+def import_catalog(kind):
+    """Imports products or expenses from an uploaded CSV or XLSX `file`; `dry_run=1` only validates."""
+    from . import services
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'error': 'No file uploaded'}), 400
+    dry_run = request.form.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    try:
+        result = services.import_catalog(current_user.id, kind, upload.stream, upload.filename, dry_run=dry_run)
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 400
+    result['totals'] = services.get_catalog_totals(current_user.id)
+    return jsonify(result)
+
+@bp.route("/save-product-details", methods=["POST", "PATCH"])
+@login_required
+@provisioned
 def save_product_details():
+    """POST replaces the whole catalog; PATCH saves only the edited and deleted rows."""
     from . import services
     data = request.get_json()
+    if request.method == 'PATCH':
+        try:
+            created = services.patch_product_and_expense_data(current_user.id, data or {})
+        except (ValueError, TypeError, AttributeError):
+            db.session.rollback()
+            return jsonify({'error': 'Invalid catalog changes'}), 400
+        return jsonify({'status': 'success', 'created': created, 'totals': services.get_catalog_totals(current_user.id)})
     services.save_product_and_expense_data(current_user.id, data)
     return jsonify({'status': 'success'})
 
 @bp.route("/financial-forecast", methods=["GET"])
+@primary_db
 @login_required
+@provisioned
 def financial_forecast():
     from . import services
     financial_params = current_user.financial_params
@@ -151,16 +210,20 @@ def financial_forecast():
         flash('Financial parameters not found. Please visit Product Detail page first.', 'warning')
         return redirect(url_for('main.product_detail'))
 
-    assets = [a.to_dict() for a in current_user.assets]
-    liabilities = [l.to_dict() for l in current_user.liabilities]
-    operating_expenses = [e.to_dict() for e in current_user.expenses]
+    assets = user_records(Asset, current_user.id)
+    liabilities = user_records(Liability, current_user.id)
+    operating_expenses = user_records(Expense, current_user.id)
     financial_params.annual_operating_expenses = sum((e['amount'] * 12 if e['frequency'] == 'monthly' else e['amount'] * 4) for e in operating_expenses)
 
     forecast = services.get_or_recalculate_forecast(current_user)
+    forecast_version = services.forecast_version(
+        financial_params, sum(a['amount'] for a in assets), sum(l['amount'] for l in liabilities)
+    )
 
     return render_template(
         'financial-forecast.html',
         forecast=forecast,
+        forecast_version=forecast_version,
         assets=assets,
         liabilities=liabilities,
         financial_params=financial_params
@@ -168,6 +231,7 @@ def financial_forecast():
 
 @bp.route("/recalculate-forecast", methods=["POST"])
 @login_required
+@provisioned
 def recalculate_forecast():
     from . import services
     data = request.get_json()
@@ -180,7 +244,7 @@ def recalculate_forecast():
     db.session.execute(delete(Liability).where(Liability.user_id == current_user.id))
     for item in data.get('liabilities', []):
         if item.get('description'):
-            db.session.add(Liability(description=item['description'], amount=float(item.get('amount', 0) or 0), user_id=current_user.id))
+            db.session.add(Liability(**services.liability_fields(item), user_id=current_user.id))
     
     db.session.commit()
 
@@ -188,10 +252,14 @@ def recalculate_forecast():
     db.session.refresh(current_user)
 
     forecast = services.get_or_recalculate_forecast(current_user, data)
+    if request.args.get('layout') == 'columnar':
+        return json_response(to_columnar(forecast), compact=True)
     return jsonify(forecast)
 
 @bp.route("/loan-calculator", methods=['GET', 'POST'])
+@primary_db
 @login_required
+@provisioned
 def loan_calculator():
     from . import services
     params = current_user.financial_params
@@ -223,7 +291,7 @@ def loan_calculator():
         loan_term = int(request.form.get('loan_term', 0))
         
         form_data = {'loan_amount': loan_amount, 'interest_rate': interest_rate, 'loan_term': loan_term}
-        loan_data = calculate_loan_schedule(loan_amount, interest_rate, loan_term)
+        loan_data = calculate_loan_schedule(loan_amount, interest_rate, loan_term, fixed_point=current_app.config['MONEY_FIXED_POINT'])
         monthly_payment = loan_data.get("monthly_payment")
         schedule = loan_data.get("schedule")
 
@@ -232,7 +300,7 @@ def loan_calculator():
         params.loan_interest_rate = interest_rate
         params.loan_term = loan_term
         params.loan_monthly_payment = monthly_payment
-        params.loan_schedule = json.dumps(schedule)
+        params.loan_schedule = schedule
         db.session.commit()
         return redirect(url_for('main.loan_calculator'))
 
@@ -240,12 +308,14 @@ def loan_calculator():
     if request.method == 'GET' and params.loan_monthly_payment:
         monthly_payment = params.loan_monthly_payment
         if params.loan_schedule:
-            schedule = params.loan_schedule  # Pass the raw JSON string to the template
+            schedule = params.loan_schedule
 
     # This block runs for both POST and for GET requests that have loaded data
+    debt_service = None
     if monthly_payment and monthly_payment > 0:
-        total_debt_service = monthly_payment * 12
-        dscr = calculate_dscr(net_operating_income, total_debt_service)
+        # DSCR over the proposed loan and every liability's payments
+        debt_service = services.get_debt_service(current_user.id, params)
+        dscr = calculate_dscr(net_operating_income, debt_service['total'])
 
         if dscr < 1.0:
             assessment = g.assessment_messages.get('high_risk')
@@ -262,6 +332,7 @@ def loan_calculator():
                            annual_net_profit=annual_net_profit,
                            monthly_net_profit=monthly_net_profit,
                            monthly_payment=monthly_payment,
+                           debt_service=debt_service,
                            form_data=form_data,
                            assessment=assessment,
                            dscr=dscr,
@@ -271,22 +342,43 @@ def loan_calculator():
 
 @bp.route("/export-forecast")
 @login_required
+@provisioned
 def export_forecast():
+    export_format = request.args.get('format', 'xlsx')
+    if export_format not in ('xlsx', 'zip'):
+        return jsonify({'error': f'Unsupported export format: {export_format}'}), 400
+
     params = current_user.financial_params
-    products = [p.to_dict() for p in current_user.products]
-    operating_expenses = [e.to_dict() for e in current_user.expenses]
-    startup_activities = [a.to_dict() for a in current_user.startup_activities]
+    products = user_records(Product, current_user.id)
+    operating_expenses = user_records(Expense, current_user.id)
+    startup_activities = user_records(BusinessStartupActivity, current_user.id)
     loan_details = {
         'loan_amount': params.loan_amount,
         'interest_rate': params.loan_interest_rate,
         'loan_term': params.loan_term,
         'monthly_payment': params.loan_monthly_payment,
-        'schedule': json.loads(params.loan_schedule) if params.loan_schedule else None,
+        'schedule': params.loan_schedule or None,
     }
 
-    spreadsheet_file = create_forecast_spreadsheet(
+    if export_format == 'zip':
+        # Everything is loaded above; the generator only computes and compresses
+        chunks = stream_forecast_zip(
+            products, operating_expenses, params.cogs_percentage, loan_details,
+            params.seasonality, params.depreciation, params.interest_expense, startup_activities
+        )
+        return Response(
+            chunks,
+            mimetype='application/zip',
+            headers={'Content-Disposition': 'attachment; filename=financial_forecast.zip'}
+        )
+
+    if current_app.config.get('EXPORT_MODE', 'template') == 'builder':
+        create_spreadsheet = create_forecast_spreadsheet
+    else:
+        create_spreadsheet = create_forecast_spreadsheet_from_template
+    spreadsheet_file = create_spreadsheet(
         products, operating_expenses, params.cogs_percentage, loan_details,
-        json.loads(params.seasonality), params.company_name,
+        params.seasonality, params.company_name,
         params.depreciation, params.interest_expense, startup_activities
     )
 
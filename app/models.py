@@ -1,35 +1,100 @@
 from app.extensions import db
+from collections import namedtuple
 from flask_login import UserMixin
 from typing import Any, Dict
 from sqlalchemy import inspect
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-import json
+# Native JSONB on PostgreSQL, JSON-encoded text on SQLite. Values are parsed
+# once when the row is loaded rather than on every access.
+JSONType = db.JSON().with_variant(JSONB(), 'postgresql')
+
+# Exact two-decimal storage for currency amounts. Values are read back as
+# floats so the calculation code keeps working on plain numbers.
+Money = db.Numeric(14, 2, asdecimal=False)
+
+# --- Column records ---
+
+_column_keys = {}
+_record_classes = {}
+
+def column_keys(model):
+    """The column attribute keys of a mapped class, computed once per mapper."""
+    keys = _column_keys.get(model)
+    if keys is None:
+        keys = _column_keys[model] = tuple(attr.key for attr in inspect(model).column_attrs)
+    return keys
+
+class RecordMixin:
+    """
+    Dict-style access for record namedtuples, so code written against to_dict()
+    output (row['price'], row.get('price')) also works on records.
+    """
+    __slots__ = ()
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in self._fields:
+                raise KeyError(key)
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._fields else default
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self._asdict()
+
+def record_class(model):
+    """
+    A namedtuple class with one field per column of `model`, created once per
+    mapper. Records are plain tuples: much smaller than ORM instances or dicts,
+    with no identity map or change tracking.
+    """
+    cls = _record_classes.get(model)
+    if cls is None:
+        base = namedtuple(f'{model.__name__}Record', column_keys(model))
+        cls = _record_classes[model] = type(base.__name__, (RecordMixin, base), {'__slots__': ()})
+    return cls
+
+class ColumnDictMixin:
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in column_keys(type(self))}
 
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(128), nullable=False)
+    # Updated on each login; used by the inactive-account retention sweep
+    last_login_at = db.Column(db.DateTime, nullable=True, index=True, default=db.func.now())
 
-    # Relationships
-    products: Mapped[list["Product"]] = relationship('Product', backref='user', lazy=True, cascade="all, delete-orphan")
-    expenses: Mapped[list["Expense"]] = relationship('Expense', backref='user', lazy=True, cascade="all, delete-orphan")
-    assets: Mapped[list["Asset"]] = relationship('Asset', backref='user', lazy=True, cascade="all, delete-orphan")
-    liabilities: Mapped[list["Liability"]] = relationship('Liability', backref='user', lazy=True, cascade="all, delete-orphan")
-    financial_params: Mapped["FinancialParams"] = relationship('FinancialParams', backref='user', uselist=False, cascade="all, delete-orphan")
+    # Relationships. Child rows are removed by the database's ON DELETE
+    # CASCADE, so deleting a user does not load them first.
+    products: Mapped[list["Product"]] = relationship('Product', backref='user', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    expenses: Mapped[list["Expense"]] = relationship('Expense', backref='user', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    assets: Mapped[list["Asset"]] = relationship('Asset', backref='user', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    liabilities: Mapped[list["Liability"]] = relationship('Liability', backref='user', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
+    financial_params: Mapped["FinancialParams"] = relationship('FinancialParams', backref='user', uselist=False, cascade="all, delete-orphan", passive_deletes=True)
 
-    startup_activities: Mapped[list["BusinessStartupActivity"]] = relationship('BusinessStartupActivity', backref='user', lazy=True, cascade="all, delete-orphan")
+    startup_activities: Mapped[list["BusinessStartupActivity"]] = relationship('BusinessStartupActivity', backref='user', lazy=True, cascade="all, delete-orphan", passive_deletes=True)
 
     def __init__(self, username: str, password_hash: str):
         self.username = username
         self.password_hash = password_hash
 
-class Product(db.Model):
+class Product(ColumnDictMixin, db.Model):
+    __table_args__ = (
+        db.Index('ix_product_user_id_description', 'user_id', 'description'),
+        db.Index('ix_product_user_id_id', 'user_id', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.String(200), nullable=False)
+    # Unit prices may carry sub-cent precision, so they are not Money
     price = db.Column(db.Float, nullable=False, default=0.0)
     sales_volume = db.Column(db.Integer, nullable=False, default=0)
     sales_volume_unit = db.Column(db.String(20), nullable=False, default='monthly')
-    user_id: Mapped[int] = mapped_column(db.ForeignKey('user.id'))
+    user_id: Mapped[int] = mapped_column(db.ForeignKey('user.id', ondelete='CASCADE'))
 
     def __init__(self, description, price, sales_volume, sales_volume_unit, user_id):
         self.description = description
@@ -38,18 +103,17 @@ class Product(db.Model):
         self.sales_volume_unit = sales_volume_unit
         self.user_id = user_id
 
-    def to_dict(self) -> Dict[str, Any]:
-        insp = inspect(self)
-        if insp is None:
-            return {} # pragma: no cover
-        return {c.key: getattr(self, c.key) for c in insp.mapper.column_attrs}
+class Expense(ColumnDictMixin, db.Model):
+    __table_args__ = (
+        db.Index('ix_expense_user_id_item', 'user_id', 'item'),
+        db.Index('ix_expense_user_id_id', 'user_id', 'id'),
+    )
 
-class Expense(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     item = db.Column(db.String(200), nullable=False)
-    amount = db.Column(db.Float, nullable=False, default=0.0)
+    amount = db.Column(Money, nullable=False, default=0.0)
     frequency = db.Column(db.String(20), nullable=False, default='monthly')
-    user_id: Mapped[int] = mapped_column(db.ForeignKey('user.id'))
+    user_id: Mapped[int] = mapped_column(db.ForeignKey('user.id', ondelete='CASCADE'))
 
     def __init__(self, item, amount, frequency, user_id):
         self.item = item
@@ -57,74 +121,71 @@ class Expense(db.Model):
         self.frequency = frequency
         self.user_id = user_id
 
-    def to_dict(self) -> Dict[str, Any]:
-        insp = inspect(self)
-        if insp is None:
-            return {} # pragma: no cover
-        return {c.key: getattr(self, c.key) for c in insp.mapper.column_attrs}
+class Asset(ColumnDictMixin, db.Model):
+    __table_args__ = (
+        db.Index('ix_asset_user_id_id', 'user_id', 'id'),
+    )
 
-class Asset(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.String(200), nullable=False)
-    amount = db.Column(db.Float, nullable=False, default=0.0)
-    user_id: Mapped[int] = mapped_column(db.ForeignKey('user.id'))
+    amount = db.Column(Money, nullable=False, default=0.0)
+    user_id: Mapped[int] = mapped_column(db.ForeignKey('user.id', ondelete='CASCADE'))
 
     def __init__(self, description, amount, user_id):
         self.description = description
         self.amount = amount
         self.user_id = user_id
 
-    def to_dict(self) -> Dict[str, Any]:
-        insp = inspect(self)
-        if insp is None:
-            return {} # pragma: no cover
-        return {c.key: getattr(self, c.key) for c in insp.mapper.column_attrs}
+class Liability(ColumnDictMixin, db.Model):
+    __table_args__ = (
+        db.Index('ix_liability_user_id_id', 'user_id', 'id'),
+    )
 
-class Liability(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.String(200), nullable=False)
-    amount = db.Column(db.Float, nullable=False, default=0.0)
-    user_id: Mapped[int] = mapped_column(db.ForeignKey('user.id'))
+    amount = db.Column(Money, nullable=False, default=0.0)
+    # Repayment terms, for the debt stack (logic/debt.py); blank for a plain balance
+    interest_rate = db.Column(db.Float, nullable=True)
+    term_months = db.Column(db.Integer, nullable=True)
+    user_id: Mapped[int] = mapped_column(db.ForeignKey('user.id', ondelete='CASCADE'))
 
-    def __init__(self, description, amount, user_id):
+    def __init__(self, description, amount, user_id, interest_rate=None, term_months=None):
         self.description = description
         self.amount = amount
         self.user_id = user_id
-
-    def to_dict(self) -> Dict[str, Any]:
-        insp = inspect(self)
-        if insp is None:
-            return {} # pragma: no cover
-        return {c.key: getattr(self, c.key) for c in insp.mapper.column_attrs}
+        self.interest_rate = interest_rate
+        self.term_months = term_months
 
 class FinancialParams(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id: Mapped[int] = mapped_column(db.ForeignKey('user.id'), unique=True)
+    user_id: Mapped[int] = mapped_column(db.ForeignKey('user.id', ondelete='CASCADE'), unique=True)
     
     company_name = db.Column(db.String(100), default='')
     cogs_percentage = db.Column(db.Float, default=35.0)
     tax_rate = db.Column(db.Float, default=8.0)
-    seasonality = db.Column(db.Text, default=json.dumps([1.0] * 12))
+    seasonality = db.Column(JSONType, default=lambda: [1.0] * 12)
+    # Bumped whenever the user's products are saved, so cached forecasts know to reload them
+    product_revision = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Balance Sheet / Ratios
-    current_assets = db.Column(db.Float, nullable=False, default=15000.0)
-    current_liabilities = db.Column(db.Float, nullable=False, default=8000.0)
-    interest_expense = db.Column(db.Float, nullable=False, default=2000.0)
-    depreciation = db.Column(db.Float, nullable=False, default=3000.0)
+    current_assets = db.Column(Money, nullable=False, default=15000.0)
+    current_liabilities = db.Column(Money, nullable=False, default=8000.0)
+    interest_expense = db.Column(Money, nullable=False, default=2000.0)
+    depreciation = db.Column(Money, nullable=False, default=3000.0)
 
     # Calculated values for loan calculator
-    quarterly_net_profit = db.Column(db.Float, default=0.0)
-    annual_net_profit = db.Column(db.Float, default=0.0)
-    total_annual_revenue = db.Column(db.Float, default=0.0)
-    net_operating_income = db.Column(db.Float, default=0.0)
-    annual_operating_expenses = db.Column(db.Float, default=0.0)
+    quarterly_net_profit = db.Column(Money, default=0.0)
+    annual_net_profit = db.Column(Money, default=0.0)
+    total_annual_revenue = db.Column(Money, default=0.0)
+    net_operating_income = db.Column(Money, default=0.0)
+    annual_operating_expenses = db.Column(Money, default=0.0)
 
     # Loan details could also be stored here if it's a one-to-one relationship
-    loan_amount = db.Column(db.Float, nullable=True)
+    loan_amount = db.Column(Money, nullable=True)
     loan_interest_rate = db.Column(db.Float, nullable=True)
     loan_term = db.Column(db.Integer, nullable=True)
-    loan_monthly_payment = db.Column(db.Float, nullable=True)
-    loan_schedule = db.Column(db.Text, nullable=True)
+    loan_monthly_payment = db.Column(Money, nullable=True)
+    loan_schedule = db.Column(JSONType, nullable=True)
 
     def __init__(self, user_id):
         self.user_id = user_id
@@ -144,13 +205,17 @@ class AssessmentMessage(db.Model):
         self.status_class = status_class
         self.dscr_status = dscr_status
 
-class BusinessStartupActivity(db.Model):
+class BusinessStartupActivity(ColumnDictMixin, db.Model):
+    __table_args__ = (
+        db.Index('ix_business_startup_activity_user_id_id', 'user_id', 'id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     activity = db.Column(db.String(200), nullable=False)
     description = db.Column(db.String(500), nullable=False)
     weight = db.Column(db.Integer, nullable=False)
     progress = db.Column(db.Integer, nullable=False, default=0)
-    user_id: Mapped[int] = mapped_column(db.ForeignKey('user.id'))
+    user_id: Mapped[int] = mapped_column(db.ForeignKey('user.id', ondelete='CASCADE'))
 
     def __init__(self, activity, description, weight, progress, user_id):
         self.activity = activity
@@ -159,11 +224,5 @@ class BusinessStartupActivity(db.Model):
         self.progress = progress
         self.user_id = user_id
 
-    def to_dict(self) -> Dict[str, Any]:
-        insp = inspect(self)
-        if insp is None:
-            return {} # pragma: no cover
-        return {c.key: getattr(self, c.key) for c in insp.mapper.column_attrs}
-
     def __repr__(self):
         return f'<Activity {self.activity}>'
\ No newline at end of file
@@ -0,0 +1,232 @@
+import os
+import threading
+import time
+from sqlalchemy import event, make_url
+from sqlalchemy.pool import NullPool, QueuePool
+
+# DB_POOL_MODE values:
+#   queue - a QueuePool that can grow past its base size (the default)
+#   null  - no pooling; use with an external pooler such as PgBouncer
+#   fixed - a small QueuePool that never overflows
+POOL_MODES = ('queue', 'null', 'fixed')
+
+# SQLITE_PROFILE values, for SQLite file databases:
+#   default - SQLite's own settings: rollback journal, synchronous=FULL (the default)
+#   tuned   - WAL, synchronous=NORMAL, mmap and a larger page cache; one
+#             writer connection plus a pool of readers
+SQLITE_PROFILES = ('default', 'tuned')
+
+def _env_int(environ, name, default):
+    value = environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+def _env_bool(environ, name, default):
+    value = environ.get(name)
+    if value in (None, ''):
+        return default
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+class PoolMetrics:
+    """Thread-safe counters for one engine's connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checked_out = 0
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.pre_ping_failures = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self.checkout_wait_total += seconds
+            if seconds > self.checkout_wait_max:
+                self.checkout_wait_max = seconds
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + amount)
+
+    def snapshot(self, pool):
+        """Returns the counters plus the pool's live size and overflow as a dict."""
+        with self._lock:
+            data = {
+                'pool_class': type(pool).__name__,
+                'checked_out': self.checked_out,
+                'checkouts': self.checkouts,
+                'connects': self.connects,
+                'invalidations': self.invalidations,
+                'pre_ping_failures': self.pre_ping_failures,
+                'checkout_wait_avg_ms': (self.checkout_wait_total / self.checkouts * 1000) if self.checkouts else 0.0,
+                'checkout_wait_max_ms': self.checkout_wait_max * 1000,
+            }
+        if isinstance(pool, QueuePool):
+            data['size'] = pool.size()
+            data['overflow'] = pool.overflow()
+            data['idle'] = pool.checkedin()
+        return data
+
+class TimedQueuePool(QueuePool):
+    """A QueuePool that reports how long each checkout waited for a connection."""
+
+    metrics = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+def build_engine_options(db_url, environ=os.environ):
+    """
+    Builds SQLALCHEMY_ENGINE_OPTIONS for a server database from DB_POOL_* env vars.
+    The defaults match the previous hardcoded QueuePool settings.
+    """
+    if db_url.startswith('sqlite'):
+        return {}
+
+    mode = environ.get('DB_POOL_MODE', 'queue').strip().lower()
+    if mode not in POOL_MODES:
+        raise ValueError(f"DB_POOL_MODE must be one of {', '.join(POOL_MODES)}, got '{mode}'")
+
+    options = {
+        "connect_args": {
+            "connect_timeout": _env_int(environ, 'DB_CONNECT_TIMEOUT', 30)
+        }
+    }
+
+    if mode == 'null':
+        # Every checkout opens a fresh connection, so there is nothing stale to ping.
+        options["poolclass"] = NullPool
+        options["pool_pre_ping"] = _env_bool(environ, 'DB_POOL_PRE_PING', False)
+        return options
+
+    options.update({
+        "poolclass": TimedQueuePool,
+        "pool_pre_ping": _env_bool(environ, 'DB_POOL_PRE_PING', True),
+        "pool_recycle": _env_int(environ, 'DB_POOL_RECYCLE', 280),
+        "pool_timeout": _env_int(environ, 'DB_POOL_TIMEOUT', 30),
+    })
+    if mode == 'fixed':
+        options["pool_size"] = _env_int(environ, 'DB_POOL_SIZE', 2)
+        options["max_overflow"] = 0
+    else:
+        options["pool_size"] = _env_int(environ, 'DB_POOL_SIZE', 5)
+        options["max_overflow"] = _env_int(environ, 'DB_MAX_OVERFLOW', 10)
+    return options
+
+def install_pool_metrics(engine):
+    """Attaches a PoolMetrics collector to an engine and returns it."""
+    metrics = PoolMetrics()
+    if isinstance(engine.pool, TimedQueuePool):
+        engine.pool.metrics = metrics
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        metrics.increment('connects')
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.increment('checkouts')
+        metrics.increment('checked_out')
+
+    @event.listens_for(engine, 'checkin')
+    def on_checkin(dbapi_connection, connection_record):
+        metrics.increment('checked_out', -1)
+
+    @event.listens_for(engine, 'invalidate')
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.increment('invalidations')
+
+    @event.listens_for(engine, 'handle_error')
+    def on_error(context):
+        if context.is_pre_ping:
+            metrics.increment('pre_ping_failures')
+
+    return metrics
+
+def _sqlite_profile(environ):
+    profile = environ.get('SQLITE_PROFILE', 'default').strip().lower()
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"SQLITE_PROFILE must be one of {', '.join(SQLITE_PROFILES)}, got '{profile}'")
+    return profile
+
+def _is_sqlite_file(db_url):
+    return db_url.startswith('sqlite') and make_url(db_url).database not in (None, '', ':memory:')
+
+def sqlite_pragmas(environ=os.environ):
+    """
+    The PRAGMAs run on every new SQLite connection, in order, as (name, value)
+    pairs. Foreign keys are on in both profiles; without them ON DELETE
+    CASCADE does nothing.
+    """
+    pragmas = [('foreign_keys', 'ON')]
+    if _sqlite_profile(environ) == 'tuned':
+        pragmas += [
+            ('busy_timeout', _env_int(environ, 'SQLITE_BUSY_TIMEOUT', 5000)),
+            # WAL lets readers run alongside the writer; NORMAL only syncs at
+            # checkpoints, which is still safe against corruption in WAL mode.
+            ('journal_mode', 'WAL'),
+            ('synchronous', 'NORMAL'),
+            ('mmap_size', _env_int(environ, 'SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+            # Negative values are in KiB rather than pages
+            ('cache_size', -_env_int(environ, 'SQLITE_CACHE_SIZE', 64 * 1024)),
+        ]
+    return pragmas
+
+def build_sqlite_options(db_url, environ=os.environ):
+    """
+    Builds (SQLALCHEMY_ENGINE_OPTIONS, reader bind) for a SQLite file database
+    under the tuned profile; returns ({}, None) otherwise.
+
+    The primary engine holds a single connection, so a process's writers
+    queue for it in the pool instead of racing for SQLite's write lock. The
+    reader bind is a pool of SQLITE_READERS query-only connections to the same
+    file, used for read-only requests as a replica would be (see app/routing.py).
+    """
+    if not _is_sqlite_file(db_url) or _sqlite_profile(environ) != 'tuned':
+        return {}, None
+
+    timeout = _env_int(environ, 'SQLITE_BUSY_TIMEOUT', 5000) / 1000
+    shared = {"poolclass": TimedQueuePool, "connect_args": {"check_same_thread": False, "timeout": timeout}}
+    writer = {**shared, "pool_size": 1, "max_overflow": 0, "pool_timeout": _env_int(environ, 'DB_POOL_TIMEOUT', 30)}
+    reader = {**shared, "url": db_url, "pool_size": _env_int(environ, 'SQLITE_READERS', 4), "max_overflow": 0}
+    return writer, reader
+
+def install_sqlite_pragmas(engine, read_only=False, environ=os.environ):
+    """
+    Runs `sqlite_pragmas` on each new connection. Under the tuned profile, a
+    writable engine's transaction starts with BEGIN IMMEDIATE at its first
+    INSERT, UPDATE or DELETE, so it waits out busy_timeout for the write lock
+    instead of failing with "database is locked" on a lock upgrade. Reads
+    before that run outside a transaction and take no write lock. No-op on
+    other databases.
+
+    :param read_only: Also set query_only, for replica/reader engines.
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = sqlite_pragmas(environ)
+    if read_only:
+        pragmas.append(('query_only', 'ON'))
+    immediate = not read_only and _sqlite_profile(environ) == 'tuned'
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        if immediate:
+            # pysqlite opens its implicit transaction before the first DML
+            # statement; make that BEGIN IMMEDIATE rather than BEGIN
+            dbapi_connection.isolation_level = 'IMMEDIATE'
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
@@ -0,0 +1,193 @@
+import cProfile
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from flask import Blueprint, current_app, jsonify, send_from_directory, abort
+from werkzeug.wsgi import ClosingIterator
+
+from .api import token_required
+
+# PROFILE_MODE values:
+#   off      - no profiling (the default)
+#   sample   - a background thread samples the request's stack every
+#              PROFILE_INTERVAL_MS; slow requests are saved as collapsed stacks
+#              (.folded, for flamegraph.pl or speedscope)
+#   cprofile - deterministic cProfile; slow requests are saved as pstats (.prof)
+PROFILE_MODES = ('off', 'sample', 'cprofile')
+PROFILE_SUFFIXES = ('.folded', '.prof')
+
+bp = Blueprint('profiling', __name__, url_prefix='/admin/profiles')
+
+class StackSampler:
+    """
+    One daemon thread that periodically records the current stack of every
+    registered thread. Stacks are kept as collapsed "outer;...;inner" strings.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, thread_id):
+        with self._lock:
+            self._samples[thread_id] = Counter()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, thread_id):
+        """Stops sampling `thread_id` and returns its Counter of collapsed stacks."""
+        with self._lock:
+            return self._samples.pop(thread_id, Counter())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                thread_ids = list(self._samples)
+            if not thread_ids:
+                self._wake.clear()
+                self._wake.wait()
+                continue
+            frames = sys._current_frames()
+            for thread_id in thread_ids:
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                    frame = frame.f_back
+                with self._lock:
+                    if thread_id in self._samples:
+                        self._samples[thread_id][';'.join(reversed(stack))] += 1
+            time.sleep(self.interval)
+
+class ProfilingMiddleware:
+    """
+    Profiles a fraction of requests and saves a profile for each one slower
+    than `slow_ms`. The timing covers the whole response, including streamed
+    bodies, and profiles are written only for slow requests.
+    """
+
+    def __init__(self, wsgi_app, profile_dir, mode='sample', sample_rate=1.0, slow_ms=1000,
+                 interval_ms=5, keep=100, paths=()):
+        if mode not in PROFILE_MODES or mode == 'off':
+            raise ValueError(f"PROFILE_MODE must be 'sample' or 'cprofile', got '{mode}'")
+        self.wsgi_app = wsgi_app
+        self.profile_dir = profile_dir
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.keep = keep
+        self.paths = tuple(paths)
+        self.sampler = StackSampler(interval_ms / 1000) if mode == 'sample' else None
+        # Only one cProfile.Profile can be active per process on Python 3.12+;
+        # requests that arrive while it is busy are not profiled.
+        self._cprofile_lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if (self.paths and not path.startswith(self.paths)) or random.random() >= self.sample_rate:
+            return self.wsgi_app(environ, start_response)
+
+        profiler, thread_id = None, threading.get_ident()
+        if self.mode == 'cprofile':
+            if not self._cprofile_lock.acquire(blocking=False):
+                return self.wsgi_app(environ, start_response)
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            self.sampler.start(thread_id)
+        started = time.perf_counter()
+
+        def finish():
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if profiler is not None:
+                profiler.disable()
+                self._cprofile_lock.release()
+                profile = profiler
+            else:
+                profile = self.sampler.stop(thread_id)
+            if elapsed_ms >= self.slow_ms:
+                self._save(environ, elapsed_ms, profile)
+
+        try:
+            return ClosingIterator(self.wsgi_app(environ, start_response), finish)
+        except BaseException:
+            finish()
+            raise
+
+    def _save(self, environ, elapsed_ms, profile):
+        os.makedirs(self.profile_dir, exist_ok=True)
+        slug = re.sub(r'[^A-Za-z0-9]+', '-', environ.get('PATH_INFO', '')).strip('-') or 'root'
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{int(time.time() * 1000) % 1000:03d}-{environ.get('REQUEST_METHOD', 'GET')}-{slug[:60]}-{int(elapsed_ms)}ms"
+        if self.mode == 'cprofile':
+            profile.dump_stats(os.path.join(self.profile_dir, name + '.prof'))
+        else:
+            with open(os.path.join(self.profile_dir, name + '.folded'), 'w') as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in profile.most_common())
+        self._prune()
+
+    def _prune(self):
+        """Keeps only the newest `keep` profiles."""
+        for name in list_profiles(self.profile_dir)[self.keep:]:
+            try:
+                os.remove(os.path.join(self.profile_dir, name['name']))
+            except OSError:
+                pass
+
+def list_profiles(profile_dir):
+    """Returns saved profiles, newest first, as dicts of name, size and modification time."""
+    try:
+        entries = [e for e in os.scandir(profile_dir) if e.is_file() and e.name.endswith(PROFILE_SUFFIXES)]
+    except FileNotFoundError:
+        return []
+    entries.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+    return [{'name': e.name, 'size': e.stat().st_size, 'modified': e.stat().st_mtime} for e in entries]
+
+@bp.route("", methods=["GET"])
+@token_required('ADMIN_API_TOKEN')
+def index():
+    """Lists the saved slow-request profiles."""
+    return jsonify({'mode': current_app.config['PROFILE_MODE'], 'profiles': list_profiles(current_app.config['PROFILE_DIR'])})
+
+@bp.route("/<name>", methods=["GET"])
+@token_required('ADMIN_API_TOKEN')
+def download(name):
+    """Downloads one saved profile."""
+    if not name.endswith(PROFILE_SUFFIXES):
+        abort(404)
+    return send_from_directory(current_app.config['PROFILE_DIR'], name, as_attachment=True)
+
+def init_app(app):
+    """Wraps the app in the profiling middleware when PROFILE_MODE is set, and registers the admin endpoints."""
+    app.config.setdefault('PROFILE_MODE', os.environ.get('PROFILE_MODE', 'off').strip().lower())
+    mode = app.config['PROFILE_MODE']
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"PROFILE_MODE must be one of {', '.join(PROFILE_MODES)}, got '{mode}'")
+    app.config.setdefault('PROFILE_DIR', os.environ.get('PROFILE_DIR') or os.path.join(app.instance_path, 'profiles'))
+    # Sampling is cheap enough for every request; cProfile is not.
+    app.config.setdefault('PROFILE_SAMPLE_RATE', float(os.environ.get('PROFILE_SAMPLE_RATE') or (1.0 if mode == 'sample' else 0.05)))
+    app.config.setdefault('PROFILE_SLOW_MS', float(os.environ.get('PROFILE_SLOW_MS', 1000)))
+    app.config.setdefault('PROFILE_INTERVAL_MS', float(os.environ.get('PROFILE_INTERVAL_MS', 5)))
+    app.config.setdefault('PROFILE_KEEP', int(os.environ.get('PROFILE_KEEP', 100)))
+    # Optional comma-separated path prefixes, e.g. "/export-forecast,/loan-calculator"
+    app.config.setdefault('PROFILE_PATHS', [p for p in os.environ.get('PROFILE_PATHS', '').split(',') if p])
+
+    if mode != 'off':
+        app.wsgi_app = ProfilingMiddleware(
+            app.wsgi_app, app.config['PROFILE_DIR'], mode=mode,
+            sample_rate=app.config['PROFILE_SAMPLE_RATE'], slow_ms=app.config['PROFILE_SLOW_MS'],
+            interval_ms=app.config['PROFILE_INTERVAL_MS'], keep=app.config['PROFILE_KEEP'],
+            paths=app.config['PROFILE_PATHS']
+        )
+    app.register_blueprint(bp)
@@ -0,0 +1,140 @@
+"""
+New-account provisioning.
+
+Every account starts with the same default rows: startup activities,
+operating expenses, blank products, assets, liabilities and a financial
+parameters row. They are built once per process and written with one bulk
+INSERT per table, in the same transaction as the user, so a failed signup
+leaves nothing behind.
+
+With DEFER_USER_SEEDING=1, signup only inserts the user. The defaults are
+written on the first visit to a page that needs them (see `provisioned`),
+which keeps signup cheap when many accounts are created at once.
+"""
+import functools
+import json
+import threading
+
+from flask import current_app, g
+from flask_login import current_user
+from sqlalchemy import exists, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from .extensions import db
+from .models import User, Expense, Asset, Liability, FinancialParams, BusinessStartupActivity, Product
+
+_default_rows = None
+_default_rows_lock = threading.Lock()
+
+def default_rows():
+    """
+    The default rows of a new account, per model, without user_id. Built on
+    first use; startup_activities.json is read once per process.
+    """
+    global _default_rows
+    if _default_rows is None:
+        with _default_rows_lock:
+            if _default_rows is None:
+                with current_app.open_resource('../startup_activities.json') as f:
+                    activities = json.load(f)
+                _default_rows = (
+                    # Inserted first: its unique user_id makes a second, concurrent provisioning fail fast
+                    (FinancialParams, [{}]),
+                    (BusinessStartupActivity, activities),
+                    (Expense, [
+                        {'item': 'Rent/Lease', 'amount': 1200.0, 'frequency': 'monthly'},
+                        {'item': 'Salaries and Wages', 'amount': 5000.0, 'frequency': 'monthly'},
+                        {'item': 'Utilities (Electricity, Water, Internet)', 'amount': 400.0, 'frequency': 'monthly'},
+                        {'item': 'Marketing and Advertising', 'amount': 600.0, 'frequency': 'monthly'},
+                        {'item': 'Software & Subscriptions', 'amount': 150.0, 'frequency': 'monthly'},
+                        {'item': 'Insurance', 'amount': 200.0, 'frequency': 'monthly'},
+                        {'item': 'Legal & Accounting', 'amount': 250.0, 'frequency': 'monthly'},
+                        {'item': 'Office Supplies', 'amount': 100.0, 'frequency': 'monthly'},
+                    ]),
+                    (Product, [{'description': '', 'price': 0.0, 'sales_volume': 0, 'sales_volume_unit': 'monthly'}] * 4),
+                    (Asset, [
+                        {'description': 'Cash & Equivalents', 'amount': 10000.0},
+                        {'description': 'Inventory', 'amount': 5000.0},
+                        {'description': 'Equipment', 'amount': 35000.0},
+                    ]),
+                    (Liability, [
+                        {'description': 'Credit Card Debt', 'amount': 5000.0, 'interest_rate': 22.0, 'term_months': 36},
+                        {'description': 'Bank Loan', 'amount': 20000.0, 'interest_rate': 8.0, 'term_months': 60},
+                    ]),
+                )
+    return _default_rows
+
+def provisioning_inserts(user_id):
+    """
+    The INSERTs that write a user's default rows, as (statement, parameter
+    rows) pairs, one per table. Shared with the async handlers in app/asgi.py.
+    """
+    return [(insert(model.__table__), [{**row, 'user_id': user_id} for row in rows]) for model, rows in default_rows()]
+
+def provision_user(user_id):
+    """
+    Adds a user's default rows to the current transaction, one INSERT per
+    table. Does not commit.
+    """
+    for statement, rows in provisioning_inserts(user_id):
+        db.session.execute(statement, rows)
+
+def create_user(username, password_hash, defer_seeding=None):
+    """
+    Creates a user and, unless seeding is deferred, their default rows, in a
+    single transaction.
+
+    :param defer_seeding: Leave the defaults for `ensure_provisioned`;
+        defaults to the DEFER_USER_SEEDING setting.
+    :return: The new user's id.
+    """
+    if defer_seeding is None:
+        defer_seeding = current_app.config.get('DEFER_USER_SEEDING', False)
+    try:
+        user = User(username=username, password_hash=password_hash)
+        db.session.add(user)
+        db.session.flush()
+        if not defer_seeding:
+            provision_user(user.id)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return user.id
+
+def has_any_rows(user_id):
+    """Whether the user has a row in any of the provisioned tables."""
+    return db.session.scalar(select(or_(*(exists().where(model.user_id == user_id) for model, _ in default_rows()))))
+
+def ensure_provisioned(user):
+    """
+    Writes a user's default rows if they have no data at all (a deferred
+    signup). A user who is only missing some rows is left as they are.
+
+    :return: True if this call provisioned the user.
+    """
+    if user.financial_params is not None or has_any_rows(user.id):
+        return False
+    try:
+        provision_user(user.id)
+        db.session.commit()
+    except IntegrityError:
+        # Another request provisioned this user first
+        db.session.rollback()
+        return False
+    current_app.logger.info(f"Provisioned deferred data for user {user.id}.")
+    return True
+
+def provisioned(view):
+    """
+    Runs `ensure_provisioned` for the logged-in user before a view that reads
+    their data. The view reads from the primary: a lagging replica could
+    report the user as unprovisioned, or not have rows just written.
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_route = 'primary'
+        if current_user.is_authenticated:
+            ensure_provisioned(current_user)
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,73 @@
+import os
+import time
+import sqlalchemy as sa
+from flask import current_app, g, has_request_context, request, session
+from flask_sqlalchemy.session import Session
+
+# Bind key of the optional read replica in SQLALCHEMY_BINDS.
+REPLICA_BIND = 'replica'
+# Flask session key holding the time until which this client reads from the primary.
+STICKY_SESSION_KEY = '_db_primary_until'
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+def _use_replica():
+    return has_request_context() and g.get('db_route') == REPLICA_BIND
+
+class RoutingSession(Session):
+    """
+    Sends reads to the replica engine during read-only requests. Flushes and
+    UPDATE/DELETE statements always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not isinstance(clause, sa.UpdateBase) and _use_replica():
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+def primary_db(view):
+    """Marks a GET view that writes to the database, so it never reads from the replica."""
+    view._primary_db = True
+    return view
+
+def _choose_route():
+    g.db_route = 'primary'
+    if REPLICA_BIND not in current_app.config.get('SQLALCHEMY_BINDS', {}):
+        return
+    if request.method not in READ_METHODS:
+        return
+    view = current_app.view_functions.get(request.endpoint)
+    if view is None or getattr(view, '_primary_db', False):
+        return
+    if session.get(STICKY_SESSION_KEY, 0) > time.time():
+        return  # Read-your-writes: this client wrote recently
+    g.db_route = REPLICA_BIND
+
+def _remember_write(response):
+    if (g.get('db_wrote') and REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {})
+            and current_app.config['DB_REPLICA_STICKY_SECONDS'] > 0):
+        session[STICKY_SESSION_KEY] = time.time() + current_app.config['DB_REPLICA_STICKY_SECONDS']
+    return response
+
+def _flag_write():
+    if has_request_context():
+        g.db_wrote = True
+        # The rest of the request reads its own writes, and bulk INSERTs
+        # (which reach get_bind without a clause) go to the primary.
+        g.db_route = 'primary'
+
+@sa.event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(db_session, flush_context):
+    _flag_write()
+
+@sa.event.listens_for(RoutingSession, 'do_orm_execute')
+def _on_orm_execute(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        _flag_write()
+
+def init_app(app):
+    """Registers the per-request primary/replica routing hooks."""
+    app.config.setdefault('DB_REPLICA_STICKY_SECONDS', float(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5)))
+    app.before_request(_choose_route)
+    app.after_request(_remember_write)
@@ -0,0 +1,94 @@
+import json
+import os
+import time
+from flask import current_app, request
+
+from .compression import choose_encoding, compress
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is optional
+    orjson = None
+
+# Responses smaller than this are not worth compressing.
+COMPRESSION_MIN_BYTES = int(os.environ.get('JSON_COMPRESSION_MIN_BYTES', 512))
+# Dynamic responses trade a little ratio for much cheaper compression.
+DYNAMIC_COMPRESSION_LEVELS = {'br': 5, 'gzip': 6}
+
+def to_columnar(forecast):
+    """
+    Converts the monthly rows of a forecast into one array per metric.
+
+    {"monthly": [{"month": 1, "revenue": ...}, ...]} becomes
+    {"monthly": {"month": [1, ...], "revenue": [...]}}. The quarterly and
+    annual summaries are single objects and are passed through unchanged.
+    """
+    monthly = forecast.get('monthly') or []
+    columns = {key: [row[key] for row in monthly] for key in (monthly[0] if monthly else {})}
+    columnar = dict(forecast)
+    columnar['layout'] = 'columnar'
+    columnar['monthly'] = columns
+    return columnar
+
+def round_cents(value):
+    """Recursively rounds every float in a JSON-like structure to two decimals."""
+    if isinstance(value, float):
+        return round(value, 2)
+    if isinstance(value, dict):
+        return {k: round_cents(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [round_cents(v) for v in value]
+    return value
+
+def dumps(obj):
+    """Serializes to compact JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+def serialize(obj, compact=False):
+    """
+    Serializes a JSON-like object to bytes.
+
+    :param compact: Round floats to cents and use the fast encoder.
+    :return: A tuple of (body, serialization time in milliseconds).
+    """
+    started = time.perf_counter()
+    if compact:
+        body = dumps(round_cents(obj))
+    else:
+        body = current_app.json.dumps(obj).encode('utf-8')
+    return body, (time.perf_counter() - started) * 1000
+
+def encoded_response(body, serialize_ms=None, status=200):
+    """
+    Wraps serialized JSON in a response, compressing it when the client accepts
+    it and the payload is large enough. Serialization and compression time, and
+    the payload size before and after compression, are reported in the
+    Server-Timing header.
+    """
+    raw_size = len(body)
+    timings = []
+    if serialize_ms is not None:
+        timings.append(f'serialize;dur={serialize_ms:.3f};desc="{raw_size} bytes"')
+
+    encoding = choose_encoding(request.accept_encodings) if raw_size >= COMPRESSION_MIN_BYTES else None
+    if encoding:
+        started = time.perf_counter()
+        body = compress(body, encoding, DYNAMIC_COMPRESSION_LEVELS[encoding])
+        compress_ms = (time.perf_counter() - started) * 1000
+        timings.append(f'compress;dur={compress_ms:.3f};desc="{encoding} {len(body)} bytes"')
+
+    response = current_app.response_class(body, status=status, mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    if timings:
+        response.headers['Server-Timing'] = ', '.join(timings)
+    current_app.logger.debug("%s: %d bytes serialized, %d bytes sent", request.path, raw_size, len(body))
+    return response
+
+def json_response(obj, compact=False, status=200):
+    """Serializes `obj` and returns it as a (possibly compressed) JSON response."""
+    body, serialize_ms = serialize(obj, compact)
+    return encoded_response(body, serialize_ms, status)
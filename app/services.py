@@ -1,26 +1,184 @@
 import json
+import hashlib
+import os
+import threading
+from collections import OrderedDict
 from flask import current_app
 from .extensions import db, login_manager
-from sqlalchemy import delete
+from sqlalchemy import delete, insert, update, select, func, case, bindparam
 from .models import User, Product, Expense, Asset, Liability, FinancialParams, BusinessStartupActivity
 from logic.profitability import calculate_profitability
-from logic.financial_ratios import calculate_key_ratios
+from logic.financial_ratios import calculate_period_ratios
+from logic.forecast_graph import ForecastGraph, forecast_with_ratios
+from logic.debt import total_debt_service
 from .auth import _seed_initial_user_data
+from .database import user_records, user_records_page
 
-def get_product_and_expense_data(user_id):
+def get_product_and_expense_data(user_id, limit=None):
     """
     Fetches product and expense data for a user.
     Includes self-healing logic to re-seed data if it's incomplete.
+
+    :param limit: Return only the first `limit` products and expenses; see
+        get_catalog_page for the rest.
     """
     user = db.session.get(User, user_id)
     if not user:
         return [], [], ''
 
-    products_dict = [p.to_dict() for p in user.products]
-    expenses_dict = [e.to_dict() for e in user.expenses]
+    if limit is None:
+        products_dict = [p.to_dict() for p in user_records(Product, user_id)]
+        expenses_dict = [e.to_dict() for e in user_records(Expense, user_id)]
+    else:
+        products_dict = get_catalog_page(user_id, 'products', limit=limit)['items']
+        expenses_dict = get_catalog_page(user_id, 'expenses', limit=limit)['items']
     company_name = user.financial_params.company_name if user.financial_params is not None else ''
     return products_dict, expenses_dict, company_name
 
+# --- Product catalog pages ---
+
+CATALOG_PAGE_SIZE = int(os.environ.get('CATALOG_PAGE_SIZE', 100))
+CATALOG_MAX_PAGE_SIZE = 1000
+# Catalog kind -> (model, column searched by `q`)
+CATALOG_MODELS = {
+    'products': (Product, 'description'),
+    'expenses': (Expense, 'item'),
+}
+
+def get_catalog_page(user_id, kind, offset=0, limit=None, q=''):
+    """
+    Returns one page of a user's products or expenses, in id order.
+
+    :param kind: 'products' or 'expenses'.
+    :param q: Only rows whose description (or item) contains this text.
+    :return: A dict of items (column dicts), total (matching rows), offset and limit.
+    """
+    model, search_column = CATALOG_MODELS[kind]
+    offset = max(int(offset or 0), 0)
+    limit = min(max(int(limit or CATALOG_PAGE_SIZE), 1), CATALOG_MAX_PAGE_SIZE)
+    records, total = user_records_page(model, user_id, offset, limit, search_column, (q or '').strip())
+    return {'items': [r.to_dict() for r in records], 'total': total, 'offset': offset, 'limit': limit}
+
+def get_catalog_totals(user_id):
+    """Row counts and the total annual sales of a user's catalog, aggregated in the database."""
+    multiplier = case((Product.sales_volume_unit == 'monthly', 12), else_=4)
+    product_count, total_sales = db.session.execute(
+        select(func.count(Product.id), func.coalesce(func.sum(Product.price * Product.sales_volume * multiplier), 0))
+        .where(Product.user_id == user_id)
+    ).one()
+    expense_count = db.session.execute(select(func.count(Expense.id)).where(Expense.user_id == user_id)).scalar_one()
+    return {'products': product_count, 'expenses': expense_count, 'total_annual_sales': float(total_sales)}
+
+SALES_VOLUME_UNITS = ('monthly', 'quarterly')
+EXPENSE_FREQUENCIES = ('monthly', 'quarterly')
+
+def coerce_product_row(p_data, strict=True):
+    """
+    Coerces one submitted product to a column dict: float price, int sales
+    volume, and a monthly or quarterly unit (monthly when blank).
+
+    :param strict: Reject units other than monthly or quarterly and fractional
+        sales volumes. The saves pass False to keep their original handling:
+        the unit is stored as submitted and the volume is truncated.
+    :raises ValueError: With a message naming the invalid field.
+    """
+    description = p_data.get('description')
+    if not description:
+        raise ValueError("description is required")
+    if not strict:
+        return {
+            'description': description,
+            'price': _coerce_number(float, p_data.get('price'), 'price'),
+            'sales_volume': _coerce_number(int, p_data.get('sales_volume'), 'sales_volume'),
+            'sales_volume_unit': p_data.get('sales_volume_unit', 'monthly'),
+        }
+    unit = str(p_data.get('sales_volume_unit') or 'monthly').strip().lower()
+    if unit not in SALES_VOLUME_UNITS:
+        raise ValueError(f"sales_volume_unit must be monthly or quarterly, got '{unit}'")
+    return {
+        'description': description,
+        'price': _coerce_number(float, p_data.get('price'), 'price'),
+        'sales_volume': _coerce_whole_number(p_data.get('sales_volume'), 'sales_volume'),
+        'sales_volume_unit': unit,
+    }
+
+def coerce_expense_row(e_data, strict=True):
+    """
+    Coerces one submitted expense to a column dict: float amount and a monthly
+    or quarterly frequency (monthly when blank).
+
+    :param strict: Reject frequencies other than monthly or quarterly; the
+        saves pass False and store the frequency as submitted.
+    :raises ValueError: With a message naming the invalid field.
+    """
+    item = e_data.get('item')
+    if not item:
+        raise ValueError("item is required")
+    if strict:
+        frequency = str(e_data.get('frequency') or 'monthly').strip().lower()
+        if frequency not in EXPENSE_FREQUENCIES:
+            raise ValueError(f"frequency must be monthly or quarterly, got '{frequency}'")
+    else:
+        frequency = e_data.get('frequency', 'monthly')
+    return {
+        'item': item,
+        'amount': _coerce_number(float, e_data.get('amount'), 'amount'),
+        'frequency': frequency,
+    }
+
+def _coerce_number(kind, value, field):
+    if isinstance(value, str):
+        value = value.replace(',', '').strip()
+    try:
+        return kind(value or 0)
+    except (ValueError, TypeError):
+        raise ValueError(f"{field} must be a number, got '{value}'") from None
+
+def _coerce_whole_number(value, field):
+    # Spreadsheet cells hold numbers as floats, so 3.0 is accepted but 2.7 is not truncated
+    number = _coerce_number(float, value, field)
+    if not number.is_integer():
+        raise ValueError(f"{field} must be a whole number, got '{value}'")
+    return int(number)
+
+def parse_product_row(p_data):
+    """Coerces one submitted product to a column dict; None if it has no description or an invalid value."""
+    try:
+        return coerce_product_row(p_data, strict=False)
+    except ValueError:
+        return None
+
+def parse_expense_row(e_data):
+    """Coerces one submitted expense to a column dict; None if it has no item or an invalid value."""
+    try:
+        return coerce_expense_row(e_data, strict=False)
+    except ValueError:
+        return None
+
+def parse_product_rows(data):
+    """Yields the submitted products as column dicts, skipping rows without a description or with invalid numbers."""
+    for p_data in data.get('products', []):
+        row = parse_product_row(p_data)
+        if row is not None:
+            yield row
+
+def parse_expense_rows(data):
+    """Yields the submitted expenses as column dicts, skipping rows without an item or with an invalid amount."""
+    for e_data in data.get('expenses', []):
+        row = parse_expense_row(e_data)
+        if row is not None:
+            yield row
+
+def bump_product_revision(financial_params):
+    """
+    Increments the product revision in SQL, so concurrent saves each get their
+    own revision and cached forecast graphs see every change.
+    """
+    if financial_params.id is None:
+        financial_params.product_revision = 1
+    else:
+        financial_params.product_revision = FinancialParams.product_revision + 1
+
 def save_product_and_expense_data(user_id, data):
     """Saves product, expense, and company name data for a user."""
     # Sets of submitted descriptions and items
@@ -48,123 +206,441 @@ def save_product_and_expense_data(user_id, data):
     existing_expenses = {e.item: e for e in Expense.query.filter_by(user_id=user_id).all()}
 
     # Process products
-    for p_data in data.get('products', []):
-        description = p_data.get('description')
-        if not description:
-            continue
-
-        try:
-            price = float(p_data.get('price', 0) or 0)
-            sales_volume = int(p_data.get('sales_volume', 0) or 0)
-            sales_volume_unit = p_data.get('sales_volume_unit', 'monthly')
-
-            if description in existing_products:
-                # Update existing product
-                product = existing_products[description]
-                product.price = price
-                product.sales_volume = sales_volume
-                product.sales_volume_unit = sales_volume_unit
-            else:
-                # Create new product
-                product = Product(
-                    description=description,
-                    price=price,
-                    sales_volume=sales_volume,
-                    sales_volume_unit=sales_volume_unit,
-                    user_id=user_id
-                )
-                db.session.add(product)
-        except (ValueError, TypeError):
-            continue
+    for row in parse_product_rows(data):
+        if row['description'] in existing_products:
+            # Update existing product
+            product = existing_products[row['description']]
+            product.price = row['price']
+            product.sales_volume = row['sales_volume']
+            product.sales_volume_unit = row['sales_volume_unit']
+        else:
+            # Create new product
+            db.session.add(Product(user_id=user_id, **row))
 
     # Process expenses
-    for e_data in data.get('expenses', []):
-        item = e_data.get('item')
-        if not item:
-            continue
-
-        try:
-            amount = float(e_data.get('amount', 0) or 0)
-            frequency = e_data.get('frequency', 'monthly')
-
-            if item in existing_expenses:
-                # Update existing expense
-                expense = existing_expenses[item]
-                expense.amount = amount
-                expense.frequency = frequency
-            else:
-                # Create new expense
-                expense = Expense(
-                    item=item,
-                    amount=amount,
-                    frequency=frequency,
-                    user_id=user_id
-                )
-                db.session.add(expense)
-        except (ValueError, TypeError):
-            continue
+    for row in parse_expense_rows(data):
+        if row['item'] in existing_expenses:
+            # Update existing expense
+            expense = existing_expenses[row['item']]
+            expense.amount = row['amount']
+            expense.frequency = row['frequency']
+        else:
+            # Create new expense
+            db.session.add(Expense(user_id=user_id, **row))
 
     user = db.session.get(User, user_id)
     if not user:
         return # Or handle error appropriately
     financial_params = user.financial_params if user.financial_params is not None else FinancialParams(user_id=user_id)
     financial_params.company_name = data.get('company_name', '')
+    bump_product_revision(financial_params)
     db.session.add(financial_params)
     db.session.commit()
 
-def get_or_recalculate_forecast(user, data=None):
+def _patch_rows(model, key_column, parse_row, user_id, changes):
     """
-    Calculates a financial forecast. If data is provided, it updates parameters
-    before recalculating. Otherwise, it uses existing parameters.
+    Applies one catalog kind's changes: deletes the rows listed by id, then
+    updates or inserts the upserted rows. An upsert without an id updates the
+    row with the same description (or item), as the full save does.
+
+    :return: A tuple of (ids of inserted rows by client key, whether anything changed).
     """
+    delete_ids = [int(i) for i in changes.get('delete', [])]
+    upserts = []
+    for submitted in changes.get('upsert', []):
+        row = parse_row(submitted)
+        if row is not None:
+            upserts.append((submitted.get('id'), submitted.get('key'), row))
+
+    changed = False
+    if delete_ids:
+        result = db.session.execute(delete(model).where(model.user_id == user_id, model.id.in_(delete_ids)))
+        changed = result.rowcount > 0
+
+    # Load only the rows being edited, by id and by natural key
+    ids = {int(row_id) for row_id, _, _ in upserts if row_id is not None}
+    keys = {row[key_column] for row_id, _, row in upserts if row_id is None}
+    by_id, by_key = {}, {}
+    if ids:
+        by_id = {r.id: r for r in db.session.scalars(select(model).where(model.user_id == user_id, model.id.in_(ids)))}
+    if keys:
+        by_key = {getattr(r, key_column): r for r in db.session.scalars(
+            select(model).where(model.user_id == user_id, getattr(model, key_column).in_(keys)))}
+
+    created = {}
+    for row_id, client_key, row in upserts:
+        instance = by_id.get(int(row_id)) if row_id is not None else by_key.get(row[key_column])
+        if instance is None:
+            if row_id is not None:
+                continue  # Deleted meanwhile, or another user's row
+            instance = model(user_id=user_id, **row)
+            db.session.add(instance)
+            by_key[row[key_column]] = instance
+            if client_key is not None:
+                created[str(client_key)] = instance
+        else:
+            for column, value in row.items():
+                setattr(instance, column, value)
+        changed = True
+    db.session.flush()
+    return {client_key: instance.id for client_key, instance in created.items()}, changed
+
+def patch_product_and_expense_data(user_id, data):
+    """
+    Saves only the edited products and expenses of a user, so the cost of a
+    save follows the number of edited rows rather than the catalog size.
+
+    `data` holds, for 'products' and 'expenses', an optional 'upsert' list of
+    rows (with the row 'id' when it exists, or a client 'key' for new rows) and
+    an optional 'delete' list of ids, plus an optional 'company_name'.
+
+    :return: A dict of the ids assigned to new rows by client key, per kind.
+    """
+    user = db.session.get(User, user_id)
     if not user:
-        return None
+        return {'products': {}, 'expenses': {}}
+    created_products, products_changed = _patch_rows(Product, 'description', parse_product_row, user_id, data.get('products') or {})
+    created_expenses, _ = _patch_rows(Expense, 'item', parse_expense_row, user_id, data.get('expenses') or {})
 
-    params = user.financial_params
-    if not params:
-        params = FinancialParams(user_id=user.id)
-        db.session.add(params)
+    financial_params = user.financial_params if user.financial_params is not None else FinancialParams(user_id=user_id)
+    if 'company_name' in data:
+        financial_params.company_name = data.get('company_name') or ''
+    if products_changed:
+        bump_product_revision(financial_params)
+    db.session.add(financial_params)
+    db.session.commit()
+    return {'products': created_products, 'expenses': created_expenses}
 
-    products = [p.to_dict() for p in user.products]
+# --- Catalog import ---
 
-    if data:  # Recalculating with new data
-        params.cogs_percentage = float(data.get('cogs_percentage'))
-        params.tax_rate = float(data.get('tax_rate'))
-        params.seasonality = json.dumps([float(v) for v in data.get('seasonality', [1.0] * 12)])
-        params.current_assets = float(data.get('current_assets'))
-        params.current_liabilities = float(data.get('current_liabilities'))
-        params.interest_expense = float(data.get('interest_expense'))
-        params.depreciation = float(data.get('depreciation'))
-        params.annual_operating_expenses = float(data.get('annual_operating_expenses'))
-    
-    annual_op_ex = params.annual_operating_expenses
+IMPORT_CHUNK_SIZE = int(os.environ.get('IMPORT_CHUNK_SIZE', 2000))
+# Per-row errors listed in the import result; the rest are only counted.
+IMPORT_MAX_ERRORS = 100
+# Catalog kind -> (row coercion, columns the file header must have)
+IMPORT_FORMATS = {
+    'products': (coerce_product_row, ('description', 'price', 'sales_volume')),
+    'expenses': (coerce_expense_row, ('item', 'amount')),
+}
+
+def import_catalog(user_id, kind, stream, filename, dry_run=False):
+    """
+    Imports products or expenses from a CSV or XLSX upload.
+
+    Rows are streamed from the file, coerced like a saved row, and written in
+    chunks of IMPORT_CHUNK_SIZE with bulk INSERT and UPDATE statements. A row
+    whose description (or item) already exists updates that row, as the full
+    save does. Invalid rows are skipped and reported; the valid ones are
+    committed together at the end.
+
+    :param stream: The uploaded file, as a binary file object.
+    :param dry_run: Validate only; nothing is written.
+    :return: A dict of inserted, updated and error_count, and the first
+        IMPORT_MAX_ERRORS errors as {'row', 'error'} dicts.
+    :raises ValueError: If the file cannot be read as a catalog.
+    """
+    from utils.importer import read_rows, validate_rows, chunked
+
+    model, key_column = CATALOG_MODELS[kind]
+    coerce, required_columns = IMPORT_FORMATS[kind]
+    # Existing keys only, not rows: one (key, id) pair per row
+    existing = dict(db.session.execute(
+        select(getattr(model, key_column), model.id).where(model.user_id == user_id)
+    ).all())
+    first_seen = {}
+    # Core statements: the ORM bulk paths cost more per row than the coercion
+    table = model.__table__
+    update_by_id = update(table).where(table.c.id == bindparam('row_id'))
+    result = {'inserted': 0, 'updated': 0, 'error_count': 0, 'errors': [], 'dry_run': dry_run}
+
+    rows = validate_rows(read_rows(stream, filename, required_columns), coerce)
+    for chunk in chunked(rows, IMPORT_CHUNK_SIZE):
+        inserts, updates = [], []
+        for row_number, row, error in chunk:
+            if error is None and row[key_column] in first_seen:
+                error = f"duplicate {key_column} '{row[key_column]}', first on row {first_seen[row[key_column]]}"
+            if error is not None:
+                result['error_count'] += 1
+                if len(result['errors']) < IMPORT_MAX_ERRORS:
+                    result['errors'].append({'row': row_number, 'error': error})
+                continue
+            first_seen[row[key_column]] = row_number
+            if row[key_column] in existing:
+                updates.append({'row_id': existing[row[key_column]], **row})
+            else:
+                inserts.append({'user_id': user_id, **row})
+        if not dry_run:
+            if inserts:
+                db.session.execute(insert(table), inserts)
+            if updates:
+                db.session.execute(update_by_id, updates)
+        result['inserted'] += len(inserts)
+        result['updated'] += len(updates)
+
+    if not dry_run and (result['inserted'] or result['updated']):
+        if kind == 'products':
+            financial_params = db.session.scalar(select(FinancialParams).where(FinancialParams.user_id == user_id))
+            if financial_params is None:
+                financial_params = FinancialParams(user_id=user_id)
+                db.session.add(financial_params)
+            bump_product_revision(financial_params)
+        db.session.commit()
+    return result
+
+# FinancialParams fields that feed the forecast calculation.
+FORECAST_INPUT_FIELDS = (
+    'cogs_percentage', 'tax_rate', 'seasonality', 'current_assets', 'current_liabilities',
+    'interest_expense', 'depreciation', 'annual_operating_expenses'
+)
+
+def apply_forecast_data(params, data):
+    """Copies the submitted forecast parameters onto `params` (a FinancialParams or any object with the same attributes)."""
+    params.cogs_percentage = float(data.get('cogs_percentage'))
+    params.tax_rate = float(data.get('tax_rate'))
+    params.seasonality = [float(v) for v in data.get('seasonality', [1.0] * 12)]
+    params.current_assets = float(data.get('current_assets'))
+    params.current_liabilities = float(data.get('current_liabilities'))
+    params.interest_expense = float(data.get('interest_expense'))
+    params.depreciation = float(data.get('depreciation'))
+    params.annual_operating_expenses = float(data.get('annual_operating_expenses'))
+
+def compute_forecast(params, products, total_assets, total_debt):
+    """
+    Runs the profitability and ratio calculations for a set of inputs.
+    Does not read from or write to the database.
+
+    :return: A tuple of (forecast, net_operating_income).
+    """
+    annual_op_ex = params.annual_operating_expenses or 0.0
 
     forecast = calculate_profitability(
         products=products, cogs_percentage=params.cogs_percentage,
         annual_operating_expenses=annual_op_ex, tax_rate=params.tax_rate,
-        seasonality_factors=json.loads(params.seasonality)
+        seasonality_factors=params.seasonality,
+        fixed_point=current_app.config.get('MONEY_FIXED_POINT', False)
     )
 
-    total_assets = sum(a.amount for a in user.assets)
-    total_debt = sum(l.amount for l in user.liabilities)
     net_operating_income = forecast['annual']['gross_profit'] - annual_op_ex
 
-    annual_ratios = calculate_key_ratios(
-        net_profit=forecast['annual']['net_profit'], total_revenue=forecast['annual']['revenue'],
+    ratios = calculate_period_ratios(
+        forecast['monthly'], forecast['quarterly'], forecast['annual'], annual_op_ex,
         total_assets=total_assets, current_assets=params.current_assets,
         current_liabilities=params.current_liabilities, total_debt=total_debt,
-        net_operating_income=net_operating_income, interest_expense=params.interest_expense,
-        depreciation=params.depreciation
+        interest_expense=params.interest_expense, depreciation=params.depreciation
+    )
+    forecast = forecast_with_ratios(forecast['monthly'], forecast['quarterly'], forecast['annual'], ratios)
+    return forecast, net_operating_income
+
+def forecast_fingerprint(params, products, total_assets, total_debt):
+    """Returns a stable hash of every input that affects the computed forecast."""
+    payload = {
+        'user_id': params.user_id,
+        'params': [getattr(params, field) for field in FORECAST_INPUT_FIELDS],
+        'products': sorted(
+            (p.get('id') or 0, p.get('price'), p.get('sales_volume'), p.get('sales_volume_unit'))
+            for p in products
+        ),
+        'total_assets': total_assets,
+        'total_debt': total_debt,
+    }
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+def get_forecast_inputs(user_id):
+    """
+    Loads the inputs needed to compute a user's forecast with a handful of narrow queries.
+    Returns None if the user has no financial parameters yet.
+    """
+    params = FinancialParams.query.filter_by(user_id=user_id).first()
+    if params is None:
+        return None
+
+    products = user_records(Product, user_id)
+    total_assets, total_debt = get_balance_totals(user_id)
+    return params, products, total_assets, total_debt
+
+def get_balance_totals(user_id):
+    """Returns a user's (total assets, total liabilities), summed in the database."""
+    total_assets = db.session.scalar(
+        select(func.coalesce(func.sum(Asset.amount), 0.0)).where(Asset.user_id == user_id)
+    )
+    total_debt = db.session.scalar(
+        select(func.coalesce(func.sum(Liability.amount), 0.0)).where(Liability.user_id == user_id)
+    )
+    return float(total_assets or 0.0), float(total_debt or 0.0)
+
+def liability_fields(item):
+    """
+    Coerces a submitted liability to its column values. Blank repayment terms
+    are stored as NULL (a plain balance).
+    """
+    rate = item.get('interest_rate')
+    term = item.get('term_months')
+    return {
+        'description': item['description'],
+        'amount': float(item.get('amount', 0) or 0),
+        'interest_rate': float(rate) if rate not in (None, '') else None,
+        'term_months': int(term) if term not in (None, '') else None,
+    }
+
+def get_debt_service(user_id, params):
+    """
+    Debt service over the next 12 months for all of a user's liabilities plus
+    the proposed loan on `params` (see logic.debt.total_debt_service).
+    """
+    rows = db.session.execute(
+        select(Liability.amount, Liability.interest_rate, Liability.term_months).where(Liability.user_id == user_id)
+    ).all()
+    balances, rates, terms = (list(column) for column in zip(*rows)) if rows else ([], [], [])
+    return total_debt_service(
+        [float(balance or 0) for balance in balances], rates, terms,
+        loan_payment=params.loan_monthly_payment or 0,
+        loan_term_months=(params.loan_term or 0) * 12 or None
+    )
+
+# Forecast graphs (see logic/forecast_graph.py) keyed by (user_id, product
+# revision), least recently used first. A graph only ever sees one revision of
+# its user's products, so a worker that missed a save or a deletion never
+# serves stale ones: the new revision gets a new graph. A reused user id starts
+# again at revision 0, whose products are always the provisioned defaults.
+_FORECAST_GRAPH_CACHE_SIZE = int(os.environ.get('FORECAST_GRAPH_CACHE_SIZE', 256))
+_forecast_graphs_lock = threading.Lock()
+
+def _forecast_graph(user_id, product_revision):
+    key = (user_id, product_revision)
+    with _forecast_graphs_lock:
+        graphs = current_app.extensions.setdefault('forecast_graphs', OrderedDict())
+        graph = graphs.get(key)
+        if graph is None:
+            graph = graphs[key] = ForecastGraph(lambda: user_records(Product, user_id))
+        graphs.move_to_end(key)
+        while len(graphs) > _FORECAST_GRAPH_CACHE_SIZE:
+            graphs.popitem(last=False)
+    return graph
+
+def compute_forecast_incremental(params, total_assets, total_debt, products=None):
+    """
+    Same result as `compute_forecast`, but reuses the user's cached
+    intermediate results for every input that has not changed since the last
+    call. Products are reloaded only when `params.product_revision` changes.
+
+    :param products: The user's product rows at `params.product_revision`,
+        for callers that load them themselves (see `forecast_needs_products`);
+        by default they are read through the session when needed.
+    :return: A tuple of (forecast, net_operating_income).
+    """
+    inputs = forecast_graph_inputs(params, total_assets, total_debt)
+    graph = _forecast_graph(params.user_id, inputs['product_revision'])
+    with graph.lock:
+        load_products = graph.load_products
+        if products is not None:
+            graph.load_products = lambda: products
+        try:
+            graph.update(**inputs)
+            return graph.get('forecast'), graph.get('net_operating_income')
+        finally:
+            graph.load_products = load_products
+
+def forecast_needs_products(params):
+    """Whether `compute_forecast_incremental` would have to load the user's products for `params`."""
+    key = (params.user_id, params.product_revision or 0)
+    with _forecast_graphs_lock:
+        graph = current_app.extensions.get('forecast_graphs', {}).get(key)
+    return graph is None or not graph.is_cached('base_revenue')
+
+def forecast_graph_inputs(params, total_assets, total_debt):
+    """The inputs of a user's ForecastGraph; products are represented by their revision."""
+    return dict(
+        product_revision=params.product_revision or 0,
+        fixed_point=current_app.config.get('MONEY_FIXED_POINT', False),
+        seasonality=list(params.seasonality), cogs_percentage=params.cogs_percentage,
+        annual_operating_expenses=params.annual_operating_expenses or 0.0, tax_rate=params.tax_rate,
+        total_assets=total_assets, total_debt=total_debt,
+        current_assets=params.current_assets, current_liabilities=params.current_liabilities,
+        interest_expense=params.interest_expense, depreciation=params.depreciation
     )
-    forecast['annual'].update(annual_ratios)
-    forecast['quarterly'].update(annual_ratios)
+
+def forecast_version(params, total_assets, total_debt):
+    """
+    A hash of the user and every forecast input, without loading products.
+    It changes whenever the forecast can, so it keys cached forecast fragments.
+    """
+    payload = {'user_id': params.user_id, **forecast_graph_inputs(params, total_assets, total_debt)}
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+def get_or_recalculate_forecast(user, data=None):
+    """
+    Calculates a financial forecast. If data is provided, it updates parameters
+    before recalculating. Otherwise, it uses existing parameters.
+    """
+    if not user:
+        return None
+
+    params = user.financial_params
+    if not params:
+        params = FinancialParams(user_id=user.id)
+        db.session.add(params)
+
+    if data:  # Recalculating with new data
+        apply_forecast_data(params, data)
+
+    total_assets, total_debt = get_balance_totals(user.id)
+    forecast, net_operating_income = compute_forecast_incremental(params, total_assets, total_debt)
 
     # Persist key results
     params.total_annual_revenue = forecast['annual']['revenue']
     params.annual_net_profit = forecast['annual']['net_profit']
     params.quarterly_net_profit = forecast['quarterly']['net_profit']
     params.net_operating_income = net_operating_income
-    params.net_operating_income = net_operating_income
     db.session.commit()
 
     return forecast
+
+# --- Account deletion ---
+
+# Users deleted per statement by purge_inactive_users
+PURGE_BATCH_SIZE = int(os.environ.get('PURGE_BATCH_SIZE', 500))
+
+def delete_users(user_ids):
+    """
+    Deletes users with a single DELETE. Their products, expenses, assets,
+    liabilities, activities and financial parameters are removed by the
+    database's ON DELETE CASCADE, without being loaded. Commits.
+
+    :return: The number of users deleted.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return 0
+    deleted = db.session.execute(
+        delete(User).where(User.id.in_(user_ids)), execution_options={'synchronize_session': False}
+    ).rowcount
+    db.session.commit()
+
+    graphs = current_app.extensions.get('forecast_graphs')
+    if graphs is not None:
+        deleted_ids = set(user_ids)
+        with _forecast_graphs_lock:
+            for key in [key for key in graphs if key[0] in deleted_ids]:
+                del graphs[key]
+    return deleted
+
+def purge_inactive_users(inactive_before, batch_size=PURGE_BATCH_SIZE, dry_run=False):
+    """
+    Deletes every user whose last login is before `inactive_before`, in
+    batches of `batch_size`, so memory use does not grow with the number of
+    accounts. Users with no recorded login are kept.
+
+    :param dry_run: Only count the users that would be deleted.
+    :return: The number of users deleted (or that would be).
+    """
+    inactive = User.last_login_at < inactive_before
+    if dry_run:
+        return db.session.scalar(select(func.count()).select_from(User).where(inactive))
+
+    deleted = 0
+    while True:
+        user_ids = db.session.scalars(select(User.id).where(inactive).order_by(User.id).limit(batch_size)).all()
+        if not user_ids:
+            return deleted
+        deleted += delete_users(user_ids)
@@ -0,0 +1,74 @@
+"""
+Compares the two XLSX export modes: the openpyxl builder in utils.export,
+which styles and serializes the whole workbook on every export, and the
+cached skeleton in utils.export_template, which only writes cell values,
+plus the streamed ZIP of CSVs from utils.export_csv.
+
+Reports milliseconds per export (CPU time) and the file size, for a few
+catalog sizes. The template's first export of a layout builds its skeleton;
+that one-off cost is reported separately.
+
+Run from the repository root:
+    python -m benchmarks.bench_export [--products 5 20 200] [--iterations 50]
+"""
+import argparse
+import time
+from io import BytesIO
+
+from logic.loan import calculate_loan_schedule
+from utils.export import create_forecast_spreadsheet
+from utils.export_template import create_forecast_spreadsheet_from_template, clear_skeleton_cache
+from utils.export_csv import stream_forecast_zip
+
+
+def export_args(product_count):
+    products = [
+        {'description': f'Product {i}', 'price': 10.5 + i, 'sales_volume': 5 + i % 40,
+         'sales_volume_unit': 'monthly' if i % 2 else 'quarterly'}
+        for i in range(product_count)
+    ]
+    expenses = [{'item': f'Expense {i}', 'amount': 100 + i, 'frequency': 'monthly'} for i in range(10)]
+    loan = calculate_loan_schedule(100000, 6.5, 5)
+    loan_details = {'loan_amount': 100000, 'interest_rate': 6.5, 'loan_term': 5,
+                    'monthly_payment': loan['monthly_payment'], 'schedule': loan['schedule']}
+    activities = [{'activity': f'Activity {i}', 'description': 'Register the business and open accounts',
+                   'weight': 5, 'progress': 10 * (i % 10)} for i in range(15)]
+    return (products, expenses, 35.0, loan_details, [1.0 + i / 20 for i in range(12)], 'Acme Supply',
+            1200.0, 800.0, activities)
+
+
+def per_export_ms(fn, args, iterations):
+    started = time.process_time()
+    for _ in range(iterations):
+        size = len(fn(*args).getvalue())
+    return (time.process_time() - started) * 1000 / iterations, size
+
+
+def zip_export(products, expenses, cogs, loan_details, seasonality, company_name, depreciation, interest, activities):
+    data = b''.join(stream_forecast_zip(products, expenses, cogs, loan_details, seasonality, depreciation, interest, activities))
+    return BytesIO(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--products', type=int, nargs='+', default=[5, 20, 200])
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'products':>8}  {'builder':>10}  {'template':>10}  {'speedup':>7}  {'skeleton build':>14}  {'size (builder/template)':>24}  {'csv zip':>14}")
+    for count in args.products:
+        export = export_args(count)
+        clear_skeleton_cache()
+        started = time.process_time()
+        create_forecast_spreadsheet_from_template(*export)
+        skeleton_ms = (time.process_time() - started) * 1000
+
+        builder_ms, builder_size = per_export_ms(create_forecast_spreadsheet, export, args.iterations)
+        template_ms, template_size = per_export_ms(create_forecast_spreadsheet_from_template, export, args.iterations)
+        zip_ms, zip_size = per_export_ms(zip_export, export, args.iterations)
+        print(f"{count:>8}  {builder_ms:>8.2f}ms  {template_ms:>8.2f}ms  {builder_ms / template_ms:>6.1f}x"
+              f"  {skeleton_ms:>12.1f}ms  {builder_size:>11,} / {template_size:<11,}  {zip_ms:>6.2f}ms {zip_size:>6,}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+Compares gunicorn throughput for each worker profile in gunicorn.conf.py.
+
+First measures how much of each scenario's request time is spent waiting
+rather than computing, in-process; that fraction is the value to set as
+GUNICORN_IO_WAIT. Then starts gunicorn once per profile against the same
+database and drives every scenario with concurrent logged-in clients.
+
+Uses a throwaway SQLite database unless DATABASE_URL is set; point it at a
+PostgreSQL database to measure real network waits.
+
+Run from the repository root:
+    python -m benchmarks.bench_gunicorn [--duration 5] [--concurrency 16]
+"""
+import argparse
+import http.cookiejar
+import json
+import logging
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USERNAME, PASSWORD = 'bench', 'bench-password'
+PROFILES = ('sync', 'gthread')
+
+FORECAST_DATA = {
+    'cogs_percentage': 35, 'tax_rate': 8, 'seasonality': [1.0] * 12,
+    'current_assets': 15000, 'current_liabilities': 8000, 'interest_expense': 2000,
+    'depreciation': 3000, 'annual_operating_expenses': 24000,
+    'assets': [{'description': 'Equipment', 'amount': 12000}],
+    'liabilities': [{'description': 'Bank loan', 'amount': 20000}],
+}
+
+# name -> (method, path, JSON body)
+SCENARIOS = {
+    'forecast-page': ('GET', '/financial-forecast', None),
+    'loan-page': ('GET', '/loan-calculator', None),
+    'snapshot-api': ('GET', '/api/forecast/{user_id}', None),
+    'recalculate': ('POST', '/recalculate-forecast', FORECAST_DATA),
+}
+
+
+def bench_environ(database_url):
+    # Every client is the same user, so admission limits would reject most of the load
+    env = dict(os.environ, SECRET_KEY='bench-secret', FLASK_SKIP_DOTENV='1', ADMISSION_CONTROL='off')
+    if database_url.startswith('sqlite'):
+        # Development mode reads LOCAL_DATABASE_URL and skips the sslmode suffix.
+        env.update(FLASK_DEBUG='1', LOCAL_DATABASE_URL=database_url)
+    else:
+        env['DATABASE_URL'] = database_url
+    return env
+
+
+def prepare_database(env):
+    """Creates the schema and a seeded benchmark user; returns the user's id."""
+    os.environ.update(env)
+    from app import create_app
+    from app.extensions import db
+    from app.models import User
+    from app.auth import _seed_initial_user_data
+    from werkzeug.security import generate_password_hash
+
+    app = create_app()
+    app.logger.setLevel(logging.WARNING)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        user = User.query.filter_by(username=USERNAME).first()
+        if user is None:
+            user = User(username=USERNAME, password_hash=generate_password_hash(PASSWORD, method='pbkdf2:sha256:1000'))
+            db.session.add(user)
+            db.session.commit()
+            _seed_initial_user_data(user.id)
+        user_id = user.id
+    return app, user_id
+
+
+def measure_io_wait(app, user_id, requests=50):
+    """Fraction of wall time each scenario spends off-CPU, measured with the test client."""
+    client = app.test_client()
+    client.post('/login', data={'username': USERNAME, 'password': PASSWORD})
+    results = {}
+    for name, (method, path, body) in SCENARIOS.items():
+        path = path.format(user_id=user_id)
+        wall_started, cpu_started = time.perf_counter(), time.thread_time()
+        for _ in range(requests):
+            client.open(path, method=method, json=body)
+        wall = time.perf_counter() - wall_started
+        cpu = time.thread_time() - cpu_started
+        results[name] = max(0.0, 1 - cpu / wall)
+    return results
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_gunicorn(profile, env, port):
+    env = dict(env, GUNICORN_PROFILE=profile, PORT=str(port))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/login', timeout=1)
+            return process
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"gunicorn ({profile}) did not start")
+
+
+def logged_in_opener(base_url):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    form = urllib.parse.urlencode({'username': USERNAME, 'password': PASSWORD}).encode()
+    opener.open(f'{base_url}/login', data=form, timeout=30).read()
+    return opener
+
+
+def drive(base_url, openers, scenario, user_id, duration):
+    """Sends the scenario's request from every client until `duration` ends."""
+    method, path, body = SCENARIOS[scenario]
+    url = base_url + path.format(user_id=user_id)
+    data = json.dumps(body).encode() if body is not None else None
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(opener):
+        while time.perf_counter() < deadline:
+            request = urllib.request.Request(url, data=data, method=method, headers={'Content-Type': 'application/json'})
+            started = time.perf_counter()
+            try:
+                opener.open(request, timeout=30).read()
+            except (urllib.error.URLError, ConnectionError):
+                with lock:
+                    errors[0] += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client, args=(opener,)) for opener in openers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    p95 = statistics.quantiles(latencies, n=20)[-1] * 1000 if len(latencies) >= 2 else 0.0
+    return len(latencies) / duration, p95, errors[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per scenario.')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = os.environ.get('DATABASE_URL') or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        env = bench_environ(database_url)
+        app, user_id = prepare_database(env)
+
+        print("Measured I/O wait (GUNICORN_IO_WAIT)")
+        for name, io_wait in measure_io_wait(app, user_id).items():
+            print(f"  {name:<20} {io_wait:.2f}")
+
+        print(f"\nThroughput, {args.concurrency} clients, {args.duration:g}s per scenario")
+        for profile in PROFILES:
+            port = free_port()
+            process = start_gunicorn(profile, env, port)
+            base_url = f'http://127.0.0.1:{port}'
+            try:
+                openers = [logged_in_opener(base_url) for _ in range(args.concurrency)]
+                print(f"  {profile}")
+                for scenario in SCENARIOS:
+                    rps, p95, errors = drive(base_url, openers, scenario, user_id, args.duration)
+                    print(f"    {scenario:<20} {rps:>8,.1f} req/s   p95 {p95:>7.1f} ms   errors {errors}")
+            finally:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == '__main__':
+    main()
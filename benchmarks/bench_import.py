@@ -0,0 +1,65 @@
+"""
+Times catalog imports of large CSV and XLSX files and the memory they use.
+
+Writes a products file of --rows rows in each format, then imports it twice
+into a throwaway SQLite database: once into an empty catalog (bulk inserts)
+and once more on top of itself (every row updates by description).
+
+Run from the repository root:
+    python -m benchmarks.bench_import [--rows 100000]
+"""
+import argparse
+import csv
+import os
+import tempfile
+
+from openpyxl import Workbook
+
+from benchmarks.bench_memory import build_database, measure, report
+
+
+def write_csv(path, rows):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['description', 'price', 'sales_volume', 'sales_volume_unit'])
+        for i in range(rows):
+            writer.writerow([f'SKU {i:06d}', f'{10 + i % 90}.50', 5 + i % 40, 'monthly' if i % 2 else 'quarterly'])
+
+
+def write_xlsx(path, rows):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(['Description', 'Price', 'Sales Volume', 'Unit'])
+    for i in range(rows):
+        ws.append([f'SKU {i:06d}', 10.5 + i % 90, 5 + i % 40, 'monthly' if i % 2 else 'quarterly'])
+    wb.save(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--rows', type=int, default=100000)
+    args = parser.parse_args()
+
+    from app import services
+    from app.extensions import db
+    from app.models import Product
+    from sqlalchemy import delete
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app, user_id = build_database(tmp, 0, 0)
+        for extension, write in (('.csv', write_csv), ('.xlsx', write_xlsx)):
+            path = os.path.join(tmp, 'catalog' + extension)
+            write(path, args.rows)
+            print(f"{extension[1:].upper()}: {args.rows} rows, {os.path.getsize(path) / 1024:,.0f} KiB")
+            with app.app_context():
+                for label in ('insert into empty catalog', 'update every row'):
+                    with open(path, 'rb') as f:
+                        result, peak, retained, ms = measure(lambda: services.import_catalog(user_id, 'products', f, path))
+                    assert result['error_count'] == 0, result['errors']
+                    report(label, peak, retained, ms)
+                db.session.execute(delete(Product).where(Product.user_id == user_id))
+                db.session.commit()
+
+
+if __name__ == '__main__':
+    main()
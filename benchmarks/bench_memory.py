@@ -0,0 +1,115 @@
+"""
+Measures memory allocated while loading a user's rows and serving the
+forecast and export routes, using tracemalloc.
+
+Builds a throwaway SQLite database with one user holding many products and
+expenses. Reports, for each measurement, the peak allocated during the call
+and what is still held afterwards (the size of the returned rows).
+
+Run from the repository root:
+    python -m benchmarks.bench_memory [--products 2000]
+"""
+import argparse
+import gc
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+from werkzeug.security import generate_password_hash
+
+USERNAME, PASSWORD = 'bench', 'bench-password'
+
+
+def measure(fn):
+    """Returns (result, peak KiB, retained KiB, milliseconds) for one call."""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = (time.perf_counter() - started) * 1000
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak / 1024, current / 1024, elapsed
+
+
+def build_database(tmp, products, expenses):
+    from app import create_app
+    from app.extensions import db
+    from app.models import User, Product, Expense, Asset, Liability
+    from app.auth import _seed_initial_user_data
+
+    app = create_app({
+        'TESTING': True,
+        'SECRET_KEY': 'bench',
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    app.logger.setLevel(logging.WARNING)
+    with app.app_context():
+        db.create_all(bind_key=None)
+        user = User(username=USERNAME, password_hash=generate_password_hash(PASSWORD, method='pbkdf2:sha256:1000'))
+        db.session.add(user)
+        db.session.commit()
+        _seed_initial_user_data(user.id)
+        db.session.add_all(
+            Product(description=f'Product {i}', price=10 + i % 90, sales_volume=5 + i % 40,
+                    sales_volume_unit='monthly' if i % 2 else 'quarterly', user_id=user.id)
+            for i in range(products)
+        )
+        db.session.add_all(
+            Expense(item=f'Expense {i}', amount=100 + i, frequency='monthly', user_id=user.id)
+            for i in range(expenses)
+        )
+        db.session.add_all(Asset(description=f'Asset {i}', amount=1000 + i, user_id=user.id) for i in range(50))
+        db.session.add_all(Liability(description=f'Loan {i}', amount=500 + i, user_id=user.id) for i in range(50))
+        db.session.commit()
+        return app, user.id
+
+
+def report(label, peak, retained, ms):
+    print(f"  {label:<32} peak {peak:>9,.0f} KiB   retained {retained:>8,.0f} KiB   {ms:>7.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--products', type=int, default=2000)
+    parser.add_argument('--expenses', type=int, default=500)
+    args = parser.parse_args()
+
+    from app.extensions import db
+    from app.models import Product
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app, user_id = build_database(tmp, args.products, args.expenses)
+
+        print(f"Loading {args.products} products")
+        with app.app_context():
+            def orm_dicts():
+                rows = [p.to_dict() for p in Product.query.filter_by(user_id=user_id).order_by(Product.id)]
+                db.session.expunge_all()
+                return rows
+            _, peak, retained, ms = measure(orm_dicts)
+            report('ORM instances -> to_dict()', peak, retained, ms)
+            try:
+                from app.database import user_records
+            except ImportError:
+                pass
+            else:
+                _, peak, retained, ms = measure(lambda: user_records(Product, user_id))
+                report('column-only records', peak, retained, ms)
+
+        print("Routes (one request each, after a warm-up)")
+        client = app.test_client()
+        client.post('/login', data={'username': USERNAME, 'password': PASSWORD})
+        for path in ('/financial-forecast', '/export-forecast', f'/api/forecast/{user_id}'):
+            client.get(path).close()
+            response, peak, retained, ms = measure(lambda: client.get(path))
+            assert response.status_code == 200, (path, response.status_code)
+            response.close()
+            report(path, peak, retained, ms)
+
+
+if __name__ == '__main__':
+    main()
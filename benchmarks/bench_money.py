@@ -0,0 +1,59 @@
+"""
+Compares the float, fixed-point (integer cents) and decimal.Decimal money paths.
+
+Run from the repository root:
+    python -m benchmarks.bench_money
+"""
+import timeit
+from decimal import Decimal, ROUND_HALF_UP
+
+from logic.loan import calculate_loan_schedule
+from logic.profitability import calculate_profitability
+
+CENT = Decimal('0.01')
+PRODUCTS = [
+    {'price': 19.99 + i, 'sales_volume': 100 + i, 'sales_volume_unit': 'monthly' if i % 2 else 'quarterly'}
+    for i in range(50)
+]
+SEASONALITY = [1.2, 1.0, 1.0, 0.8, 1.0, 1.0, 1.3, 1.0, 1.0, 0.9, 1.0, 1.1]
+
+
+def decimal_loan_schedule(principal, annual_interest_rate, loan_term_years):
+    """Reference amortization in decimal.Decimal, rounded to the cent each month."""
+    balance = Decimal(str(principal))
+    monthly_rate = Decimal(str(annual_interest_rate)) / 100 / 12
+    n = loan_term_years * 12
+    growth = (1 + monthly_rate) ** n
+    payment = (balance * monthly_rate * growth / (growth - 1)).quantize(CENT, ROUND_HALF_UP)
+    schedule = []
+    for month in range(1, n + 1):
+        interest = (balance * monthly_rate).quantize(CENT, ROUND_HALF_UP)
+        principal_payment = balance if month == n else payment - interest
+        balance -= principal_payment
+        schedule.append({'month': month, 'interest_payment': interest,
+                         'principal_payment': principal_payment, 'remaining_balance': balance})
+    return {'monthly_payment': payment, 'schedule': schedule}
+
+
+def run(label, fn, number):
+    seconds = min(timeit.repeat(fn, number=number, repeat=5))
+    print(f"{label:<40} {number / seconds:>12,.0f} ops/s")
+    return number / seconds
+
+
+def main():
+    print("30-year loan schedule (360 months)")
+    baseline = run("  float", lambda: calculate_loan_schedule(250000, 6.5, 30), 500)
+    fixed = run("  fixed point (int cents)", lambda: calculate_loan_schedule(250000, 6.5, 30, fixed_point=True), 500)
+    print(f"  fixed point runs at {fixed / baseline:.0%} of float")
+    run("  decimal.Decimal", lambda: decimal_loan_schedule(250000, 6.5, 30), 500)
+
+    print("Profitability forecast (50 products)")
+    baseline = run("  float", lambda: calculate_profitability([dict(p) for p in PRODUCTS], 35, 95000, 8, SEASONALITY), 2000)
+    fixed = run("  fixed point (int cents)",
+                lambda: calculate_profitability([dict(p) for p in PRODUCTS], 35, 95000, 8, SEASONALITY, fixed_point=True), 2000)
+    print(f"  fixed point runs at {fixed / baseline:.0%} of float")
+
+
+if __name__ == '__main__':
+    main()
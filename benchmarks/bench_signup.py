@@ -0,0 +1,58 @@
+"""
+Times account provisioning at signup, excluding password hashing.
+
+Compares, per new account, on a throwaway SQLite database:
+  orm       the previous path: commit the user, then add_all one ORM object
+            per default row and commit again
+  bulk      app.provisioning.create_user: one transaction, one INSERT per table
+  deferred  create_user with DEFER_USER_SEEDING: the user row only; the
+            defaults are written on the first visit instead
+
+Run from the repository root:
+    python -m benchmarks.bench_signup [--users 500]
+"""
+import argparse
+import tempfile
+import time
+
+from benchmarks.bench_memory import build_database
+
+
+def orm_signup(username):
+    from app.extensions import db
+    from app.models import User
+    from app.provisioning import default_rows
+
+    user = User(username=username, password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    for model, rows in default_rows():
+        db.session.add_all(model(**row, user_id=user.id) for row in rows)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--users', type=int, default=500)
+    args = parser.parse_args()
+
+    from app.provisioning import create_user
+
+    signups = {
+        'orm': orm_signup,
+        'bulk': lambda username: create_user(username, 'x', defer_seeding=False),
+        'deferred': lambda username: create_user(username, 'x', defer_seeding=True),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        app, _ = build_database(tmp, 0, 0)
+        with app.app_context():
+            for label, signup in signups.items():
+                started = time.perf_counter()
+                for i in range(args.users):
+                    signup(f'{label}-{i}')
+                ms = (time.perf_counter() - started) * 1000 / args.users
+                print(f"  {label:<10} {ms:>7.2f} ms per signup")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+Compares concurrent read/write throughput on a SQLite file database under
+each SQLITE_PROFILE (see app/pooling.py).
+
+Starts several worker processes against the same database file, as gunicorn
+would, each running a few threads with a logged-in test client. Every thread
+loops for a fixed time, mostly reading the forecast API and sometimes saving
+the product catalog. Counts completed reads and writes, and requests that
+failed, typically with "database is locked".
+
+Run from the repository root:
+    python -m benchmarks.bench_sqlite [--duration 5] [--workers 4] [--threads 4]
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import random
+import tempfile
+import threading
+import time
+import warnings
+
+from benchmarks.bench_memory import USERNAME, PASSWORD, build_database
+
+PROFILES = ('default', 'tuned')
+CATALOG = {
+    'products': [{'description': f'Product {i}', 'price': 10 + i, 'sales_volume': 5, 'sales_volume_unit': 'monthly'} for i in range(20)],
+    'expenses': [{'item': 'Rent', 'amount': 1200, 'frequency': 'monthly'}],
+    'company_name': 'Bench Co',
+}
+
+
+def client_loop(app, user_id, deadline, write_ratio, counts, lock):
+    from sqlalchemy.exc import OperationalError
+
+    client = app.test_client()
+    client.post('/login', data={'username': USERNAME, 'password': PASSWORD})
+    rng = random.Random()
+    local = {'reads': 0, 'writes': 0, 'errors': 0}
+    while time.perf_counter() < deadline:
+        write = rng.random() < write_ratio
+        try:
+            if write:
+                ok = client.post('/save-product-details', json=CATALOG).status_code == 200
+            else:
+                ok = client.get(f'/api/forecast/{user_id}').status_code == 200
+        except OperationalError:
+            ok = False
+        local['errors' if not ok else 'writes' if write else 'reads'] += 1
+    with lock:
+        for key, value in local.items():
+            counts[key] += value
+
+
+def worker(profile, db_uri, user_id, duration, threads, write_ratio, start, results):
+    os.environ['SQLITE_PROFILE'] = profile
+    from sqlalchemy.exc import SAWarning
+    from app import create_app
+
+    # Concurrent catalog saves under the default profile race to delete the same rows
+    warnings.simplefilter('ignore', SAWarning)
+
+    # All threads log in at once, past the login concurrency limit
+    app = create_app({'TESTING': True, 'SECRET_KEY': 'bench', 'SQLALCHEMY_DATABASE_URI': db_uri,
+                      'SQLALCHEMY_ENGINE_OPTIONS': {}, 'ADMISSION_CONTROL': 'off'})
+    app.logger.setLevel(logging.CRITICAL)
+    counts, lock = {'reads': 0, 'writes': 0, 'errors': 0}, threading.Lock()
+    start.wait()
+    deadline = time.perf_counter() + duration
+    pool = [threading.Thread(target=client_loop, args=(app, user_id, deadline, write_ratio, counts, lock)) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    results.put(counts)
+
+
+def run(profile, tmp, args):
+    os.environ['SQLITE_PROFILE'] = profile
+    app, user_id = build_database(tmp, 20, 10)
+    db_uri = app.config['SQLALCHEMY_DATABASE_URI']
+    with app.app_context():
+        from app.extensions import db
+        for engine in db.engines.values():
+            engine.dispose()
+
+    ctx = multiprocessing.get_context('spawn')
+    start, results = ctx.Event(), ctx.Queue()
+    procs = [ctx.Process(target=worker, args=(profile, db_uri, user_id, args.duration, args.threads, args.write_ratio, start, results))
+             for _ in range(args.workers)]
+    for proc in procs:
+        proc.start()
+    time.sleep(2)  # let every worker import the app before the clock starts
+    start.set()
+    totals = {'reads': 0, 'writes': 0, 'errors': 0}
+    for _ in procs:
+        for key, value in results.get().items():
+            totals[key] += value
+    for proc in procs:
+        proc.join()
+
+    print(f"  {profile:<8} reads {totals['reads'] / args.duration:>8.1f}/s   "
+          f"writes {totals['writes'] / args.duration:>7.1f}/s   failed {totals['errors']:>5}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--write-ratio', type=float, default=0.2)
+    args = parser.parse_args()
+
+    print(f"{args.workers} processes x {args.threads} threads, {args.write_ratio:.0%} writes, {args.duration:g}s each")
+    for profile in PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            run(profile, tmp, args)
+
+
+if __name__ == '__main__':
+    main()
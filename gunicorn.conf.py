@@ -0,0 +1,74 @@
+"""
+Gunicorn settings. Gunicorn picks this file up automatically when started from
+the repository root:
+
+    gunicorn wsgi:app
+
+GUNICORN_PROFILE chooses the worker model:
+    gthread - a few processes with a thread pool each (the default); threads
+              cover the time requests spend waiting on the database
+    sync    - single-threaded processes, for CPU-bound loads
+
+GUNICORN_IO_WAIT is the fraction of request time spent waiting on I/O (see
+benchmarks/bench_gunicorn.py, which measures it) and sets the thread count.
+WEB_CONCURRENCY and GUNICORN_THREADS override the computed values.
+"""
+import multiprocessing
+import os
+
+MAX_THREADS = 32
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, '') else default
+
+def threads_for_io_wait(io_wait):
+    """
+    Threads per worker that keep one CPU busy when each request waits on I/O
+    for `io_wait` of its time: while one thread computes, the others wait.
+    """
+    io_wait = min(max(io_wait, 0.0), 0.95)
+    return max(1, min(MAX_THREADS, round(1 / (1 - io_wait))))
+
+cpu_count = multiprocessing.cpu_count()
+profile = os.environ.get('GUNICORN_PROFILE', 'gthread').strip().lower()
+io_wait = float(os.environ.get('GUNICORN_IO_WAIT', 0.5))
+
+if profile == 'sync':
+    worker_class = 'sync'
+    workers = _env_int('WEB_CONCURRENCY', cpu_count * 2 + 1)
+    threads = 1
+elif profile == 'gthread':
+    worker_class = 'gthread'
+    workers = _env_int('WEB_CONCURRENCY', max(2, cpu_count))
+    threads = _env_int('GUNICORN_THREADS', threads_for_io_wait(io_wait))
+else:
+    raise ValueError(f"GUNICORN_PROFILE must be 'gthread' or 'sync', got '{profile}'")
+
+# Each thread may hold a connection, so size the pool to match unless configured.
+os.environ.setdefault('DB_POOL_SIZE', str(threads))
+# Admission limits (app/admission.py) leave one of them free for cheap pages.
+os.environ.setdefault('WORKER_THREADS', str(threads))
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+# Import the app once in the master; workers fork with it already loaded.
+preload_app = True
+# Recycle workers periodically to bound memory growth, staggered so they do not all restart together.
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+timeout = _env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = timeout
+keepalive = 5
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+if os.path.isdir('/dev/shm'):
+    # Heartbeat files on tmpfs, so a slow disk cannot stall workers
+    worker_tmp_dir = '/dev/shm'
+
+def post_fork(server, worker):
+    """Drops connections inherited from the master; each worker opens its own."""
+    from app.extensions import db
+    app = worker.app.wsgi()
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,71 @@
+"""
+Debt stack: a business's liabilities and a proposed loan, evaluated together
+as amortizing instruments.
+
+The stack is held as columns, one list per field (balance, annual rate, term
+in months), and each function works on whole columns. A liability with a
+term is a level-payment loan; one with a rate but no term is serviced
+interest-only; one with neither is a plain balance with no scheduled
+payments.
+"""
+
+def monthly_payments(balances, annual_rates, term_months):
+    """
+    The monthly payment of each instrument.
+
+    :param balances: Outstanding balances.
+    :param annual_rates: Annual interest rates in percent; None for no interest.
+    :param term_months: Remaining terms in months; None for no fixed term.
+    :return: A list of payments, in the order of the inputs.
+    """
+    monthly_rates = [(rate or 0) / 100 / 12 for rate in annual_rates]
+    # (1 + r)^n per instrument; 0 marks the instruments with no fixed term
+    growth = [(1 + r) ** n if n and n > 0 else 0 for r, n in zip(monthly_rates, term_months)]
+    return [
+        0.0 if balance <= 0 else
+        balance * r if not g else                        # interest-only
+        balance / n if r == 0 else                       # interest-free installments
+        balance * r * g / (g - 1)                        # annuity
+        for balance, r, n, g in zip(balances, monthly_rates, term_months, growth)
+    ]
+
+def debt_service_schedule(payments, term_months, months=12):
+    """
+    The combined payment due in each of the next `months` months.
+
+    An instrument with a term stops paying after its last month; one without
+    pays every month.
+
+    :return: A list of `months` totals.
+    """
+    # Start from every payment and drop each instrument in the month after its term ends
+    endings = [0.0] * (months + 1)
+    for payment, n in zip(payments, term_months):
+        if n and 0 < n < months:
+            endings[n] += payment
+    schedule, due = [], sum(payments)
+    for month in range(months):
+        due -= endings[month]
+        schedule.append(max(due, 0.0))
+    return schedule
+
+def total_debt_service(balances, annual_rates, term_months, loan_payment=0, loan_term_months=None, months=12):
+    """
+    Debt service of all liabilities plus a proposed loan over `months` months.
+
+    :param loan_payment: The proposed loan's monthly payment (0 for none).
+    :param loan_term_months: The proposed loan's term in months.
+    :return: A dict with the liabilities' monthly payments ("payments"), their
+        combined first-month payment ("liabilities_monthly"), the per-month
+        totals including the loan ("schedule") and their sum ("total").
+    """
+    payments = monthly_payments(balances, annual_rates, term_months)
+    schedule = debt_service_schedule(
+        payments + [loan_payment or 0], list(term_months) + [loan_term_months], months
+    )
+    return {
+        "payments": payments,
+        "liabilities_monthly": sum(payments),
+        "schedule": schedule,
+        "total": sum(schedule),
+    }
@@ -25,28 +25,54 @@ def calculate_key_ratios(net_profit, total_revenue, total_assets, current_assets
     :param depreciation: Annual depreciation.
     :return: A dictionary containing key financial ratios.
     """
+    ratios = ratio_columns(
+        [net_profit], [total_revenue], [net_operating_income], [interest_expense], [depreciation],
+        total_assets, current_assets, current_liabilities, total_debt
+    )
+    return {name: column[0] for name, column in ratios.items()}
+
+def _divide(numerators, denominator):
+    """Element-wise numerator / denominator, 0 where the denominator is not positive."""
+    if isinstance(denominator, (int, float)):
+        if denominator <= 0:
+            return [0] * len(numerators)
+        return [n / denominator for n in numerators]
+    return [n / d if d > 0 else 0 for n, d in zip(numerators, denominator)]
+
+def ratio_columns(net_profit, total_revenue, net_operating_income, interest_expense, depreciation,
+                  total_assets, current_assets, current_liabilities, total_debt):
+    """
+    Calculates the key ratios for many periods at once.
+
+    Flows (profit, revenue, NOI, interest, depreciation) are equal-length
+    lists with one value per period; balances are single values shared by
+    every period. A ratio whose denominator is zero or negative is 0, as in
+    calculate_key_ratios.
+
+    :return: A dict of ratio name -> list of per-period values.
+    """
     # Profitability Ratios
-    profit_margin = (net_profit / total_revenue) * 100 if total_revenue > 0 else 0
-    roa = (net_profit / total_assets) * 100 if total_assets > 0 else 0
+    profit_margin = [r * 100 for r in _divide(net_profit, total_revenue)]
+    roa = [r * 100 for r in _divide(net_profit, total_assets)]
 
     # Current Ratio (Liquidity)
-    current_ratio = current_assets / current_liabilities if current_liabilities > 0 else 0
+    current_ratio = _divide([current_assets], current_liabilities) * len(net_profit)
 
     # Debt-to-Equity Ratio (Leverage/Solvency)
     total_equity = total_assets - total_debt
-    debt_to_equity_ratio = total_debt / total_equity if total_equity > 0 else 0
+    debt_to_equity_ratio = _divide([total_debt], total_equity) * len(net_profit)
 
     # EBITDA = EBIT + Depreciation
-    ebitda = net_operating_income + depreciation
+    ebitda = [noi + d for noi, d in zip(net_operating_income, depreciation)]
 
     # Interest Coverage Ratio (ICR)
-    interest_coverage_ratio = ebitda / interest_expense if interest_expense > 0 else 0
+    interest_coverage_ratio = _divide(ebitda, interest_expense)
 
     # Operating Cash Flow Ratio
     # A common approximation for OCF is Net Income + Depreciation + Interest Expense.
     # This represents the cash generated from operations before accounting for changes in working capital.
-    operating_cash_flow = net_profit + depreciation + interest_expense
-    operating_cash_flow_ratio = operating_cash_flow / current_liabilities if current_liabilities > 0 else 0
+    operating_cash_flow = [p + d + i for p, d, i in zip(net_profit, depreciation, interest_expense)]
+    operating_cash_flow_ratio = _divide(operating_cash_flow, current_liabilities)
 
     return {
         "profit_margin": profit_margin,
@@ -56,3 +82,50 @@ def calculate_key_ratios(net_profit, total_revenue, total_assets, current_assets
         "interest_coverage_ratio": interest_coverage_ratio,
         "operating_cash_flow_ratio": operating_cash_flow_ratio
     }
+
+def calculate_period_ratios(monthly, quarterly, annual, annual_operating_expenses, total_assets,
+                            current_assets, current_liabilities, total_debt, interest_expense, depreciation):
+    """
+    Calculates the key ratios for each month, each quarter, the average
+    quarter and the year, in one pass over the forecast.
+
+    Each period's flows are its own: monthly rows as they are, quarters as
+    the sum of their three months, and the average quarter and year from the
+    forecast's summaries. Annual interest expense and depreciation are spread
+    evenly over the months. Balances are the same for every period, so ROA
+    and the OCF ratio are per period, not annualized. The annual ratios equal
+    calculate_key_ratios on the annual figures.
+
+    :param monthly: The forecast's 12 monthly rows.
+    :param quarterly: The forecast's average-quarter summary.
+    :param annual: The forecast's annual summary.
+    :return: A dict with "monthly" (12 dicts), "quarterly" (4 dicts),
+        "average_quarter" and "annual" ratio dicts.
+    """
+    # One column per period: 12 months, 4 quarters, the average quarter, the year
+    months = [1] * 12 + [3] * 4 + [3, 12]
+    quarters = [monthly[q * 3:q * 3 + 3] for q in range(4)]
+    net_profit = ([row['net_profit'] for row in monthly] +
+                  [sum(row['net_profit'] for row in rows) for rows in quarters] +
+                  [quarterly['net_profit'], annual['net_profit']])
+    revenue = ([row['revenue'] for row in monthly] +
+               [sum(row['revenue'] for row in rows) for rows in quarters] +
+               [quarterly['revenue'], annual['revenue']])
+    net_operating_income = (
+        [row['gross_profit'] - row['operating_expenses'] for row in monthly] +
+        [sum(row['gross_profit'] - row['operating_expenses'] for row in rows) for rows in quarters] +
+        [quarterly['gross_profit'] - annual_operating_expenses / 4,
+         annual['gross_profit'] - annual_operating_expenses]
+    )
+    interest = [interest_expense * (m / 12) for m in months]
+    periodic_depreciation = [depreciation * (m / 12) for m in months]
+
+    columns = ratio_columns(net_profit, revenue, net_operating_income, interest, periodic_depreciation,
+                            total_assets, current_assets, current_liabilities, total_debt)
+    periods = [{name: values[i] for name, values in columns.items()} for i in range(len(months))]
+    return {
+        "monthly": [{"month": i + 1, **periods[i]} for i in range(12)],
+        "quarterly": [{"quarter": q + 1, **periods[12 + q]} for q in range(4)],
+        "average_quarter": periods[16],
+        "annual": periods[17]
+    }
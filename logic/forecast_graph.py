@@ -0,0 +1,124 @@
+"""
+Incremental forecast recomputation.
+
+The forecast is held as a dependency graph: the inputs (products, seasonality,
+rates, balances) feed base revenue and the normalized seasonal factors, which
+feed the monthly columns, which feed the monthly rows and the summaries,
+which feed the ratios of every month, quarter and the year. Setting an input invalidates only the nodes downstream of it, and
+reading a node recomputes just what is stale. A new tax rate reuses the base
+revenue, so its cost does not grow with the number of products.
+"""
+import threading
+from collections import Counter
+
+from logic.profitability import base_annual_revenue, seasonal_factors, monthly_columns, monthly_rows, summarize
+from logic.financial_ratios import calculate_period_ratios
+
+_MISSING = object()
+
+class DependencyGraph:
+    """Lazily evaluated nodes over named inputs, with change-driven invalidation."""
+
+    def __init__(self):
+        self._functions = {}
+        self._dependents = {}
+        self._values = {}
+        # Evaluations per node, for tests and diagnostics
+        self.evaluations = Counter()
+
+    def add_node(self, name, function, *dependencies):
+        """Declares a node computed as function(*values of dependencies)."""
+        self._functions[name] = (function, dependencies)
+        for dependency in dependencies:
+            self._dependents.setdefault(dependency, set()).add(name)
+
+    def set(self, name, value):
+        """
+        Sets an input. If the value differs from the current one, every node
+        that depends on it, directly or transitively, is invalidated.
+
+        :return: True if the value changed.
+        """
+        if self._values.get(name, _MISSING) == value:
+            return False
+        self._values[name] = value
+        stack = list(self._dependents.get(name, ()))
+        while stack:
+            node = stack.pop()
+            # A node that is not cached has no cached dependents either
+            if self._values.pop(node, _MISSING) is not _MISSING:
+                stack.extend(self._dependents.get(node, ()))
+        return True
+
+    def is_cached(self, name):
+        """Whether a node's value is available without computing anything."""
+        return name in self._values
+
+    def get(self, name):
+        """Returns a node's value, computing it and any stale dependencies first."""
+        value = self._values.get(name, _MISSING)
+        if value is not _MISSING:
+            return value
+        if name not in self._functions:
+            raise KeyError(f"Input '{name}' has not been set")
+        function, dependencies = self._functions[name]
+        value = function(*(self.get(dependency) for dependency in dependencies))
+        self._values[name] = value
+        self.evaluations[name] += 1
+        return value
+
+class ForecastGraph(DependencyGraph):
+    """
+    One user's forecast as a DependencyGraph.
+
+    Products are not kept in the graph. The `product_revision` input stands in
+    for them, and `load_products` is called only when it changes.
+
+    :param load_products: Callable returning the user's product rows. It is
+        an attribute, so a caller that already has the rows can swap it.
+    """
+
+    def __init__(self, load_products):
+        super().__init__()
+        # Held while updating inputs and reading the forecast
+        self.lock = threading.Lock()
+        self.load_products = load_products
+        self.add_node('base_revenue', lambda revision, fixed_point: base_annual_revenue(self.load_products(), fixed_point),
+                      'product_revision', 'fixed_point')
+        self.add_node('factors', seasonal_factors, 'seasonality', 'fixed_point')
+        self.add_node('columns', monthly_columns, 'base_revenue', 'factors', 'cogs_percentage',
+                      'annual_operating_expenses', 'tax_rate', 'fixed_point')
+        self.add_node('monthly', monthly_rows, 'columns', 'fixed_point')
+        self.add_node('summary', summarize, 'columns', 'fixed_point')
+        self.add_node('net_operating_income', lambda summary, op_ex: summary[1]['gross_profit'] - op_ex,
+                      'summary', 'annual_operating_expenses')
+        self.add_node('ratios', lambda monthly, summary, *balances: calculate_period_ratios(monthly, *summary, *balances),
+                      'monthly', 'summary', 'annual_operating_expenses', 'total_assets', 'current_assets', 'current_liabilities',
+                      'total_debt', 'interest_expense', 'depreciation')
+        self.add_node('forecast', self._forecast, 'monthly', 'summary', 'ratios')
+
+    def update(self, **inputs):
+        """Sets several inputs; returns the names of the ones that changed."""
+        return {name for name, value in inputs.items() if self.set(name, value)}
+
+    @staticmethod
+    def _forecast(monthly, summary, ratios):
+        return forecast_with_ratios(monthly, *summary, ratios)
+
+def forecast_with_ratios(monthly, quarterly, annual, ratios):
+    """
+    Assembles the forecast dict: the average quarter and the year carry their
+    own ratios, and "ratios" holds those of each month and each quarter.
+
+    :param ratios: The result of logic.financial_ratios.calculate_period_ratios.
+    """
+    # Fresh containers, so callers can modify the result without touching cached nodes
+    return {
+        "monthly": [dict(row) for row in monthly],
+        "quarterly": {**quarterly, **ratios['average_quarter']},
+        "annual": {**annual, **ratios['annual']},
+        "ratios": {
+            "monthly": [dict(row) for row in ratios['monthly']],
+            "quarterly": [dict(row) for row in ratios['quarterly']]
+        }
+    }
@@ -1,10 +1,17 @@
-def calculate_loan_schedule(principal, annual_interest_rate, loan_term_years):
+from logic.money import to_cents, from_cents, rate_fraction
+
+def calculate_loan_schedule(principal, annual_interest_rate, loan_term_years, fixed_point=False):
     """
     Calculates the monthly loan payment and generates a full amortization schedule.
+
+    :param fixed_point: Compute in integer cents (see `_calculate_loan_schedule_cents`).
     """
     if principal <= 0 or annual_interest_rate < 0 or loan_term_years <= 0:
         return {"monthly_payment": 0, "schedule": []}
 
+    if fixed_point:
+        return _calculate_loan_schedule_cents(principal, annual_interest_rate, loan_term_years)
+
     # Convert annual rate to monthly and term to months
     monthly_interest_rate = (annual_interest_rate / 100) / 12
     number_of_payments = loan_term_years * 12
@@ -37,3 +44,59 @@ def calculate_loan_schedule(principal, annual_interest_rate, loan_term_years):
         "monthly_payment": monthly_payment,
         "schedule": schedule
     }
+
+def _calculate_loan_schedule_cents(principal, annual_interest_rate, loan_term_years):
+    """
+    Amortizes the loan in exact integer cents.
+
+    Each month's interest is rounded to the cent, the payment is the standard
+    annuity payment rounded to the cent, and the final payment absorbs the
+    rounding residue so the balance lands exactly on zero.
+    """
+    balance = to_cents(principal)
+    number_of_payments = loan_term_years * 12
+
+    monthly_interest_rate = (annual_interest_rate / 100) / 12
+    if monthly_interest_rate == 0:
+        payment = -(-balance // number_of_payments)  # Round up so the loan is repaid on time
+    else:
+        growth = (1 + monthly_interest_rate) ** number_of_payments
+        payment = round(balance * monthly_interest_rate * growth / (growth - 1))
+
+    # Monthly interest, rounded half up: (balance * rate + half) // denominator.
+    # The balance never goes negative, so this matches money.apply_rate with
+    # the call overhead removed from the hot loop.
+    rate, denominator = rate_fraction(annual_interest_rate, 12)
+    half = denominator // 2
+
+    # Every month but the last, until a payment would clear the balance
+    schedule = []
+    append = schedule.append
+    for month in range(1, number_of_payments):
+        interest_payment = (balance * rate + half) // denominator
+        principal_payment = payment - interest_payment
+        if principal_payment >= balance:
+            break
+        balance -= principal_payment
+        append({
+            "month": month,
+            "interest_payment": interest_payment / 100,
+            "principal_payment": principal_payment / 100,
+            "remaining_balance": balance / 100
+        })
+    else:
+        month = number_of_payments
+        interest_payment = (balance * rate + half) // denominator
+
+    # The final payment repays whatever is left
+    append({
+        "month": month,
+        "interest_payment": interest_payment / 100,
+        "principal_payment": balance / 100,
+        "remaining_balance": 0.0
+    })
+
+    return {
+        "monthly_payment": from_cents(payment),
+        "schedule": schedule
+    }
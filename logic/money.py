@@ -0,0 +1,88 @@
+"""
+Fixed-point money helpers.
+
+Amounts are held as integer cents and rates as integer parts-per-million of a
+percent, so every intermediate result is an exact integer. This is exact like
+decimal.Decimal but runs on plain int arithmetic.
+"""
+from math import gcd
+
+CENTS_PER_UNIT = 100
+# Percentages are scaled by this factor before integer math (5.25% -> 5_250_000).
+RATE_SCALE = 10 ** 6
+
+def to_cents(amount):
+    """Converts a currency amount (float, int, str or None) to integer cents."""
+    return int(round(float(amount or 0) * CENTS_PER_UNIT))
+
+def from_cents(cents):
+    """Converts integer cents back to a float currency amount."""
+    return cents / CENTS_PER_UNIT
+
+def to_rate(percent):
+    """Converts a percentage (e.g. 5.25) to integer parts-per-million of a percent."""
+    return int(round(float(percent or 0) * RATE_SCALE))
+
+def rate_fraction(percent, periods_per_year=1):
+    """
+    A percentage rate per period as a reduced (numerator, denominator) pair,
+    exactly `to_rate(percent) / (100 * RATE_SCALE * periods_per_year)`. The
+    reduced terms keep amount * numerator within CPython's fast integer sizes.
+    """
+    rate = to_rate(percent)
+    denominator = 100 * RATE_SCALE * periods_per_year
+    common = gcd(rate, denominator)  # gcd(0, d) == d, giving (0, 1)
+    return rate // common, denominator // common
+
+def scale_weights(weights):
+    """Converts allocation weights to integers, as `allocate` does with float weights."""
+    return [int(round(float(w) * RATE_SCALE)) for w in weights]
+
+def div_round(numerator, denominator):
+    """Integer division rounding half away from zero."""
+    quotient, remainder = divmod(abs(numerator), denominator)
+    if remainder * 2 >= denominator:
+        quotient += 1
+    return quotient if numerator >= 0 else -quotient
+
+def apply_rate(cents, rate, periods_per_year=1):
+    """
+    Applies a percentage rate (from `to_rate`) to an amount in cents.
+
+    :param periods_per_year: Divides an annual rate down to a per-period rate,
+        e.g. 12 for a monthly interest charge.
+    """
+    return div_round(cents * rate, 100 * RATE_SCALE * periods_per_year)
+
+def allocate(total_cents, weights):
+    """
+    Splits `total_cents` across `weights` using the largest-remainder method, so
+    the parts are whole cents that always sum exactly to the total.
+
+    :param weights: Non-negative numbers; floats are scaled to integers first.
+        Integer weights (e.g. from `scale_weights`) are used as they are.
+    """
+    count = len(weights)
+    sign = -1 if total_cents < 0 else 1
+    magnitude = abs(total_cents)
+    if count and all(w == weights[0] for w in weights) and weights[0] > 0:
+        # Equal weights: the first `leftover` parts each take one extra cent.
+        share, leftover = divmod(magnitude, count)
+        parts = [share + 1] * leftover + [share] * (count - leftover)
+        return parts if sign > 0 else [-p for p in parts]
+
+    # Scaling integers would not change their proportions
+    int_weights = weights if all(type(w) is int for w in weights) else scale_weights(weights)
+    weight_total = sum(int_weights)
+    if weight_total <= 0:
+        int_weights = [1] * len(weights)
+        weight_total = len(weights)
+
+    shares = [divmod(magnitude * w, weight_total) for w in int_weights]
+    parts = [share for share, _ in shares]
+    leftover = magnitude - sum(parts)
+    if leftover:
+        # Largest remainders first, ties to the earlier part
+        for _, i in sorted([(-remainder, i) for i, (_, remainder) in enumerate(shares)])[:leftover]:
+            parts[i] += 1
+    return parts if sign > 0 else [-p for p in parts]
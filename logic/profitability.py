@@ -1,91 +1,160 @@
-def calculate_profitability(products, cogs_percentage=35.0, annual_operating_expenses=0.0, tax_rate=8.0, seasonality_factors=None):
+from logic.money import to_cents, from_cents, rate_fraction, allocate, scale_weights, div_round
+
+# Monthly forecast metrics, in output order after "month".
+MONTHLY_METRICS = ("revenue", "cogs", "gross_profit", "operating_expenses", "net_profit", "tax")
+# Metrics summed into the quarterly and annual summaries.
+SUMMARY_METRICS = ("revenue", "net_profit", "tax", "gross_profit")
+
+def calculate_profitability(products, cogs_percentage=35.0, annual_operating_expenses=0.0, tax_rate=8.0, seasonality_factors=None, fixed_point=False):
     """
     Calculates a monthly, quarterly, and annual financial forecast.
 
-    :param products: List of product data.
+    The work is split into stages (base revenue, seasonal factors, monthly
+    columns, summaries) so that logic.forecast_graph can cache each one.
+
+    :param products: Product rows (dicts or records); they are not modified.
     :param cogs_percentage: Cost of Goods Sold as a percentage of revenue.
     :param annual_operating_expenses: Total annual operating expenses.
     :param tax_rate: The tax rate on profit before tax.
     :param seasonality_factors: A list of 12 factors for each month.
+    :param fixed_point: Compute in exact integer cents. Annual revenue and
+        operating expenses are split across months with the largest-remainder
+        method, so the months always add up to the annual totals to the cent.
     """
     if seasonality_factors is None:
         seasonality_factors = [1.0] * 12
 
-    # --- 1. Calculate Base Annual Revenue (unadjusted for seasonality) ---
+    columns = monthly_columns(
+        base_annual_revenue(products, fixed_point), seasonal_factors(seasonality_factors, fixed_point),
+        cogs_percentage, annual_operating_expenses, tax_rate, fixed_point
+    )
+    quarterly, annual = summarize(columns, fixed_point)
+    return {
+        "monthly": monthly_rows(columns, fixed_point),
+        "quarterly": quarterly,
+        "annual": annual
+    }
+
+def base_annual_revenue(products, fixed_point=False):
+    """
+    Annual revenue before seasonality: price * annualized sales volume, summed
+    over all products. Returned in integer cents when `fixed_point` is set.
+    """
     base_annual_revenue = 0
     for p in products:
-        # Ensure numeric types from product data
-        p['price'] = float(p.get('price', 0) or 0)
-        p['sales_volume'] = int(p.get('sales_volume', 0) or 0)
-        if p['sales_volume_unit'] == 'monthly':
-            annual_volume = p['sales_volume'] * 12
+        # Coerce to numbers without modifying the caller's product rows
+        price = float(p.get('price', 0) or 0)
+        sales_volume = int(p.get('sales_volume', 0) or 0)
+        if p.get('sales_volume_unit') == 'monthly':
+            annual_volume = sales_volume * 12
         else:  # Assumes quarterly
-            annual_volume = p['sales_volume'] * 4
-        base_annual_revenue += p['price'] * annual_volume
+            annual_volume = sales_volume * 4
+        if fixed_point:
+            base_annual_revenue += round(price * 100) * annual_volume
+        else:
+            base_annual_revenue += price * annual_volume
+    return base_annual_revenue
 
-    # --- 2. Calculate monthly breakdown ---
-    monthly_forecasts = []
-    base_monthly_revenue = base_annual_revenue / 12 if base_annual_revenue > 0 else 0
-    monthly_op_ex = annual_operating_expenses / 12
-    
-    # Normalize seasonality factors so their sum is 12 (average is 1)
+def seasonal_factors(seasonality_factors, fixed_point=False):
+    """
+    Normalizes seasonality factors so their sum is 12 (average is 1). In fixed
+    point the raw factors are used as allocation weights instead, scaled to
+    integers once here rather than on every allocation.
+    """
+    if fixed_point:
+        return scale_weights(seasonality_factors)
     total_factor = sum(seasonality_factors)
     if total_factor == 0: # Avoid division by zero
-        normalized_factors = [1.0] * 12
-    else:
-        normalized_factors = [(f / total_factor) * 12 for f in seasonality_factors]
+        return [1.0] * 12
+    return [(f / total_factor) * 12 for f in seasonality_factors]
 
+def monthly_columns(base_annual_revenue, factors, cogs_percentage, annual_operating_expenses, tax_rate, fixed_point=False):
+    """
+    Computes the 12 monthly values of each metric in MONTHLY_METRICS, as a dict
+    of lists (floats, or integer cents when `fixed_point` is set).
+    """
+    if fixed_point:
+        return _monthly_columns_cents(base_annual_revenue, factors, cogs_percentage, annual_operating_expenses, tax_rate)
+
+    base_monthly_revenue = base_annual_revenue / 12 if base_annual_revenue > 0 else 0
+    monthly_op_ex = annual_operating_expenses / 12
+    columns = {metric: [] for metric in MONTHLY_METRICS}
     for i in range(12):
-        month = i + 1
-        revenue = base_monthly_revenue * normalized_factors[i]
+        revenue = base_monthly_revenue * factors[i]
         cogs = revenue * (cogs_percentage / 100)
         gross_profit = revenue - cogs
         pbt = gross_profit - monthly_op_ex # Profit Before Tax
         tax = pbt * (tax_rate / 100) if pbt > 0 else 0
-        net_profit = pbt - tax
-        
-        monthly_forecasts.append({
-            "month": month,
-            "revenue": revenue,
-            "cogs": cogs,
-            "gross_profit": gross_profit,
-            "operating_expenses": monthly_op_ex,
-            "net_profit": net_profit,
-            "tax": tax
-        })
+        columns["revenue"].append(revenue)
+        columns["cogs"].append(cogs)
+        columns["gross_profit"].append(gross_profit)
+        columns["operating_expenses"].append(monthly_op_ex)
+        columns["net_profit"].append(pbt - tax)
+        columns["tax"].append(tax)
+    return columns
+
+def _monthly_columns_cents(base_annual_revenue, factors, cogs_percentage, annual_operating_expenses, tax_rate):
+    # Rates are applied to non-negative amounts only, so rounding half up is
+    # (amount * rate + half) // denominator, inlined over the monthly columns.
+    cogs_rate, cogs_denominator = rate_fraction(cogs_percentage)
+    tax_rate, tax_denominator = rate_fraction(tax_rate)
+    cogs_half, tax_half = cogs_denominator // 2, tax_denominator // 2
+
+    revenue = allocate(base_annual_revenue, factors)
+    op_ex = allocate(to_cents(annual_operating_expenses), [1] * 12)
+    cogs = [(r * cogs_rate + cogs_half) // cogs_denominator for r in revenue]
+    gross_profit = [r - c for r, c in zip(revenue, cogs)]
+    pbt = [g - o for g, o in zip(gross_profit, op_ex)]
+    tax = [(p * tax_rate + tax_half) // tax_denominator if p > 0 else 0 for p in pbt]
+    return {
+        "revenue": revenue,
+        "cogs": cogs,
+        "gross_profit": gross_profit,
+        "operating_expenses": op_ex,
+        "net_profit": [p - t for p, t in zip(pbt, tax)],
+        "tax": tax
+    }
 
-    # --- 3. Aggregate into Quarterly and Annual summaries ---
-    def aggregate_forecast(forecasts):
-        total_revenue = sum(f['revenue'] for f in forecasts)
-        total_net_profit = sum(f['net_profit'] for f in forecasts)
-        total_tax = sum(f['tax'] for f in forecasts)
-        total_gross_profit = sum(f['gross_profit'] for f in forecasts)
-        return {
-            "revenue": total_revenue,
-            "net_profit": total_net_profit,
-            "tax": total_tax,
-            "gross_profit": total_gross_profit
-        }
+def monthly_rows(columns, fixed_point=False):
+    """Turns monthly columns into the forecast's list of per-month dicts, in currency units."""
+    revenue, cogs, gross_profit = columns["revenue"], columns["cogs"], columns["gross_profit"]
+    op_ex, net_profit, tax = columns["operating_expenses"], columns["net_profit"], columns["tax"]
+    if fixed_point:
+        return [{
+            "month": i + 1,
+            "revenue": revenue[i] / 100,
+            "cogs": cogs[i] / 100,
+            "gross_profit": gross_profit[i] / 100,
+            "operating_expenses": op_ex[i] / 100,
+            "net_profit": net_profit[i] / 100,
+            "tax": tax[i] / 100
+        } for i in range(12)]
+    return [{
+        "month": i + 1,
+        "revenue": revenue[i],
+        "cogs": cogs[i],
+        "gross_profit": gross_profit[i],
+        "operating_expenses": op_ex[i],
+        "net_profit": net_profit[i],
+        "tax": tax[i]
+    } for i in range(12)]
 
-    annual_summary = aggregate_forecast(monthly_forecasts)
+def summarize(columns, fixed_point=False):
+    """
+    Aggregates monthly columns into the average quarter and the annual total.
 
-    quarterly_summaries = []
-    for q in range(4):
-        start_index = q * 3
-        end_index = start_index + 3
-        quarterly_forecasts = monthly_forecasts[start_index:end_index]
-        quarterly_summaries.append(aggregate_forecast(quarterly_forecasts))
+    :return: A tuple of (quarterly, annual) dicts keyed by SUMMARY_METRICS.
+    """
+    if fixed_point:
+        # Average quarter = annual total / 4, rounded to the cent
+        quarterly = {k: from_cents(div_round(sum(columns[k]), 4)) for k in SUMMARY_METRICS}
+        annual = {k: from_cents(sum(columns[k])) for k in SUMMARY_METRICS}
+        return quarterly, annual
 
+    annual = {k: sum(columns[k]) for k in SUMMARY_METRICS}
     # Calculate the average of the quarterly summaries
-    average_quarterly_summary = {
-        "revenue": sum(q['revenue'] for q in quarterly_summaries) / 4,
-        "net_profit": sum(q['net_profit'] for q in quarterly_summaries) / 4,
-        "tax": sum(q['tax'] for q in quarterly_summaries) / 4,
-        "gross_profit": sum(q['gross_profit'] for q in quarterly_summaries) / 4,
-    } if quarterly_summaries else aggregate_forecast([])
-
-    return {
-        "monthly": monthly_forecasts,
-        "quarterly": average_quarterly_summary,
-        "annual": annual_summary
+    quarterly = {
+        k: sum(sum(columns[k][q * 3:q * 3 + 3]) for q in range(4)) / 4
+        for k in SUMMARY_METRICS
     }
+    return quarterly, annual
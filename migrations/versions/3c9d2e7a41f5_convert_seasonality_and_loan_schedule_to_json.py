@@ -0,0 +1,54 @@
+"""Convert seasonality and loan_schedule to native JSON columns
+
+Revision ID: 3c9d2e7a41f5
+Revises: 0bb270530b50
+Create Date: 2025-10-20 09:12:41.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9d2e7a41f5'
+down_revision = '0bb270530b50'
+branch_labels = None
+depends_on = None
+
+JSON_COLUMNS = ('seasonality', 'loan_schedule')
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for column in JSON_COLUMNS:
+            op.alter_column('financial_params', column,
+                   existing_type=sa.Text(),
+                   type_=postgresql.JSONB(astext_type=sa.Text()),
+                   postgresql_using=f'{column}::jsonb',
+                   existing_nullable=True)
+    else:
+        # SQLite stores JSON as text, so existing values carry over unchanged.
+        with op.batch_alter_table('financial_params', schema=None) as batch_op:
+            for column in JSON_COLUMNS:
+                batch_op.alter_column(column,
+                       existing_type=sa.Text(),
+                       type_=sa.JSON(),
+                       existing_nullable=True)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        for column in JSON_COLUMNS:
+            op.alter_column('financial_params', column,
+                   existing_type=postgresql.JSONB(astext_type=sa.Text()),
+                   type_=sa.Text(),
+                   postgresql_using=f'{column}::text',
+                   existing_nullable=True)
+    else:
+        with op.batch_alter_table('financial_params', schema=None) as batch_op:
+            for column in JSON_COLUMNS:
+                batch_op.alter_column(column,
+                       existing_type=sa.JSON(),
+                       type_=sa.Text(),
+                       existing_nullable=True)
@@ -0,0 +1,59 @@
+"""Cascade user deletes and track last login
+
+Revision ID: e2c87b5f0a41
+Revises: d6a0e4b93c18
+Create Date: 2025-10-28 16:20:47.803516
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2c87b5f0a41'
+down_revision = 'd6a0e4b93c18'
+branch_labels = None
+depends_on = None
+
+# Tables whose user_id references user.id
+CHILD_TABLES = ('asset', 'business_startup_activity', 'expense', 'financial_params', 'liability', 'product')
+# The initial migration left these foreign keys unnamed. PostgreSQL named them
+# <table>_user_id_fkey; on SQLite, batch mode names the reflected ones with
+# this convention so they can be dropped.
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def _user_fk_name(table):
+    for fk in sa.inspect(op.get_bind()).get_foreign_keys(table):
+        if fk['referred_table'] == 'user' and fk['constrained_columns'] == ['user_id']:
+            return fk['name'] or f'fk_{table}_user_id_user'
+    return None
+
+
+def _replace_user_fks(ondelete):
+    for table in CHILD_TABLES:
+        name = _user_fk_name(table)
+        with op.batch_alter_table(table, schema=None, naming_convention=NAMING_CONVENTION) as batch_op:
+            if name:
+                batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(f'fk_{table}_user_id_user', 'user', ['user_id'], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_login_at', sa.DateTime(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_user_last_login_at'), ['last_login_at'], unique=False)
+
+    # Existing accounts start their retention period now
+    user = sa.table('user', sa.column('last_login_at', sa.DateTime()))
+    op.execute(user.update().values(last_login_at=sa.func.now()))
+
+    _replace_user_fks('CASCADE')
+
+
+def downgrade():
+    _replace_user_fks(None)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_last_login_at'))
+        batch_op.drop_column('last_login_at')
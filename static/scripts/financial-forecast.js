@@ -22,7 +22,7 @@ const drawCashFlowChart = () => {
 
     const ctx = document.getElementById('cashFlowChart').getContext('2d');
     const labels = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'];
-    const data = forecastData.monthly.map(m => m.net_profit);
+    const data = forecastData.monthly.net_profit;
 
     if (cashFlowChart) {
         cashFlowChart.data.datasets[0].data = data; // Update data
@@ -55,9 +55,9 @@ const drawRevenueExpenseChart = () => {
 
     const ctx = document.getElementById('revenueExpenseChart').getContext('2d');
     const labels = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'];
-    const revenueData = forecastData.monthly.map(m => m.revenue);
-    const expenseData = forecastData.monthly.map(m => m.cogs + m.operating_expenses + m.tax); // Total expenses including tax
-    const netProfitData = forecastData.monthly.map(m => m.net_profit);
+    const monthly = forecastData.monthly;
+    const expenseData = monthly.cogs.map((cogs, i) => cogs + monthly.operating_expenses[i] + monthly.tax[i]); // Total expenses including tax
+    const netProfitData = monthly.net_profit;
 
     if (revenueExpenseChart) {
         revenueExpenseChart.data.datasets[0].data = expenseData;
@@ -174,7 +174,9 @@ const initializeForecastPage = () => {
 
         const liabilitiesList = Array.from(document.querySelectorAll('#liabilities-table-body tr')).map(row => ({
             description: row.querySelector('.liability-description').value,
-            amount: parseFormattedNumber(row.querySelector('.liability-amount').value)
+            amount: parseFormattedNumber(row.querySelector('.liability-amount').value),
+            interest_rate: row.querySelector('.liability-rate')?.value ?? '',
+            term_months: row.querySelector('.liability-term')?.value ?? ''
         }));
 
         const totalAssets = parseFormattedNumber(totalAssetsInput.value);
@@ -183,7 +185,8 @@ const initializeForecastPage = () => {
         cogsValue.textContent = cogs;
         taxValue.textContent = tax;
 
-        fetch('/recalculate-forecast', {
+        // The columnar layout sends one array per monthly metric instead of 12 row objects.
+        fetch('/recalculate-forecast?layout=columnar', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -207,6 +210,7 @@ const initializeForecastPage = () => {
                 forecastData.annual = newForecast.annual;
                 forecastData.quarterly = newForecast.quarterly;
                 forecastData.monthly = newForecast.monthly;
+                forecastData.ratios = newForecast.ratios;
 
                 // Update the display based on the currently selected view
                 const selectedView = document.getElementById('annual-view').checked ? 'annual' : 'quarterly';
@@ -244,19 +248,20 @@ const initializeForecastPage = () => {
 
             // Use event delegation for handling input on amount fields
             tableBody.addEventListener('input', (e) => {
-                if (e.target && e.target.classList.contains(amountClass)) {
+                if (e.target && (e.target.classList.contains(amountClass) || e.target.matches('.liability-rate, .liability-term'))) {
                     recalculate();
                 }
             });
         }
     };
 
-    const addRow = (tbodyId, descClass, amountClass) => {
+    const addRow = (tbodyId, descClass, amountClass, extraCells = '') => {
         const tbody = document.getElementById(tbodyId);
         const newRow = document.createElement('tr');
         newRow.innerHTML = `
             <td><input type="text" class="form-control form-control-sm ${descClass}" value=""></td>
             <td><input type="text" class="form-control form-control-sm number-input ${amountClass}" value="0"></td>
+            ${extraCells}
             <td><button class="btn btn-sm btn-outline-danger remove-row-btn">&times;</button></td>
         `;
         tbody.appendChild(newRow);
@@ -269,7 +274,11 @@ const initializeForecastPage = () => {
     setupTableEventListeners('liabilities-table-body', 'add-liability-btn', 'liability-description', 'liability-amount');
 
     document.getElementById('add-asset-btn')?.addEventListener('click', () => addRow('assets-table-body', 'asset-description', 'asset-amount'));
-    document.getElementById('add-liability-btn')?.addEventListener('click', () => addRow('liabilities-table-body', 'liability-description', 'liability-amount'));
+    // Liabilities also carry repayment terms, used for total debt service
+    const liabilityTermCells = `
+            <td><input type="number" step="0.01" min="0" class="form-control form-control-sm liability-rate" placeholder="Rate %" title="Annual interest rate (%)" value=""></td>
+            <td><input type="number" step="1" min="0" class="form-control form-control-sm liability-term" placeholder="Months" title="Remaining term (months)" value=""></td>`;
+    document.getElementById('add-liability-btn')?.addEventListener('click', () => addRow('liabilities-table-body', 'liability-description', 'liability-amount', liabilityTermCells));
 
     // Seasonality normalization
     if (normalizeBtn) {
@@ -5,84 +5,73 @@ document.addEventListener('DOMContentLoaded', () => {
     const addExpenseBtn = document.getElementById('addExpenseBtn');
     const saveDataBtn = document.getElementById('saveDataBtn');
     const saveAndContinueBtn = document.getElementById('saveAndContinueBtn');
+    const companyNameInput = document.getElementById('companyName');
     const pageData = JSON.parse(document.getElementById('page-data').textContent);
 
-    // Initialize with data passed from Flask
-    let allProductsData = pageData.products || [];
-    let allExpensesData = pageData.expenses || [];
+    // Must match the row height in custom.css (.virtual-row)
+    const ROW_HEIGHT = 44;
+    const SAVE_DELAY_MS = 500;
+    const SEARCH_DELAY_MS = 300;
+
+    // Network calls run one at a time, so a page fetched after a save sees its
+    // deletions and a row edited after a save already has its new id.
+    let queue = Promise.resolve();
+    const enqueue = (task) => {
+        const result = queue.then(task);
+        queue = result.catch(() => {});
+        return result;
+    };
+
+    const debounce = (fn, delay) => {
+        let timer = null;
+        const debounced = (...args) => {
+            clearTimeout(timer);
+            timer = setTimeout(() => fn(...args), delay);
+        };
+        debounced.cancel = () => clearTimeout(timer);
+        return debounced;
+    };
 
     const createProductEntryHTML = (index, product = {}) => {
+        const n = index + 1;
         return `
-            <div class="row product-entry mb-2 align-items-end" data-product-index="${index}">
-                <div class="col-md-4 mb-2">
+            <div class="row product-entry virtual-row flex-nowrap align-items-end" data-index="${index}">
+                <div class="col-4">
                     <label class="form-label visually-hidden">Product Description</label>
-                    <input type="text" class="form-control" name="product_description_${index}" placeholder="Product/Service ${index}" value="${product.description || ''}" required>
+                    <input type="text" class="form-control" name="product_description_${n}" placeholder="Product/Service ${n}" value="${escapeHtml(product.description)}" required>
                 </div>
-                <div class="col-md-2 mb-2">
+                <div class="col-2">
                     <label class="form-label visually-hidden">Price ($)</label>
-                    <input type="text" class="form-control number-input" name="price_${index}" placeholder="Price" value="${formatNumber(product.price)}" title="Price ($)" required>
+                    <input type="text" class="form-control number-input" name="price_${n}" placeholder="Price" value="${formatNumber(product.price)}" title="Price ($)" required>
                 </div>
-                <div class="col-md-2 mb-2">
+                <div class="col-2">
                     <label class="form-label visually-hidden">Sales Volume</label>
-                    <input type="text" class="form-control number-input" name="sales_volume_${index}" placeholder="Volume" value="${formatNumber(product.sales_volume)}" title="Sales Volume" required>
+                    <input type="text" class="form-control number-input" name="sales_volume_${n}" placeholder="Volume" value="${formatNumber(product.sales_volume)}" title="Sales Volume" required>
                 </div>
-                <div class="col-md-2 mb-2">
+                <div class="col-2">
                     <label class="form-label visually-hidden">Unit</label>
-                    <select class="form-select" name="sales_volume_unit_${index}">
+                    <select class="form-select" name="sales_volume_unit_${n}">
                         <option value="monthly" ${product.sales_volume_unit === 'monthly' ? 'selected' : ''}>Monthly</option>
                         <option value="quarterly" ${product.sales_volume_unit === 'quarterly' ? 'selected' : ''}>Quarterly</option>
                     </select>
                 </div>
-                <div class="col-md-1 mb-2">
+                <div class="col-1">
                     <i class="bi bi-trash-fill text-danger remove-product-btn" style="cursor: pointer; font-size: 1.2rem;" title="Remove item"></i>
                 </div>
             </div>
         `;
     };
 
-    const collectAllProductInputs = (container) => {
-        const collectedData = [];
-        const allEntryElements = container.querySelectorAll('.product-entry');
-
-        allEntryElements.forEach(entry => {
-            const description = entry.querySelector('[name^="product_description_"]').value;
-            const price = parseFormattedNumber(entry.querySelector('[name^="price_"]').value);
-            const salesVolume = parseFormattedNumber(entry.querySelector('[name^="sales_volume_"]').value);
-            const salesVolumeUnit = entry.querySelector('[name^="sales_volume_unit_"]').value;
-
-            if (description || price || salesVolume) {
-                collectedData.push({
-                    description: description,
-                    price: price,
-                    sales_volume: salesVolume,
-                    sales_volume_unit: salesVolumeUnit
-                });
-            }
-        });
-        return collectedData;
-    };
-
-    const renderProducts = () => {
-        productEntriesGrid.innerHTML = ''; // Clear existing entries
-        allProductsData.forEach((product, index) => {
-            productEntriesGrid.insertAdjacentHTML('beforeend', createProductEntryHTML(index + 1, product));
-        });
-        updateTotalSales();
-    };
-
-    const updateTotalSales = () => {
-        let totalAnnualRevenue = 0;
-        allProductsData.forEach(product => {
-            const price = parseFloat(product.price) || 0;
-            const salesVolume = parseFloat(product.sales_volume) || 0;
-            const multiplier = product.sales_volume_unit === 'monthly' ? 12 : 4;
-            totalAnnualRevenue += price * salesVolume * multiplier;
-        });
-        document.getElementById('total-sales').value = totalAnnualRevenue.toLocaleString('en-US', { minimumFractionDigits: 2, maximumFractionDigits: 2 });
-    };
+    const readProductEntry = (entry) => ({
+        description: entry.querySelector('[name^="product_description_"]').value,
+        price: parseFormattedNumber(entry.querySelector('[name^="price_"]').value),
+        sales_volume: parseFormattedNumber(entry.querySelector('[name^="sales_volume_"]').value),
+        sales_volume_unit: entry.querySelector('[name^="sales_volume_unit_"]').value
+    });
 
     // Expense Functions
     const createExpenseEntryHTML = (index, expense = {}) => {
+        const n = index + 1;
         const frequencies = [{ value: 'monthly', text: 'Monthly' }, { value: 'quarterly', text: 'Quarterly' }];
         const isReadonly = expense.readonly || false;
         let optionsHTML = frequencies.map(freq =>
@@ -90,111 +79,312 @@ document.addEventListener('DOMContentLoaded', () => {
         ).join('');
 
         return `
-            <div class="row expense-entry mb-2 align-items-end" data-expense-index="${index}">
-                <div class="col-md-4 mb-2">
+            <div class="row expense-entry virtual-row flex-nowrap align-items-end" data-index="${index}">
+                <div class="col-4">
                     <label class="form-label visually-hidden">Expense Item</label>
-                    <input type="text" class="form-control" name="expense_item_${index}" placeholder="Expense Item ${index}" value="${expense.item || ''}" ${isReadonly ? 'readonly' : ''} required>
+                    <input type="text" class="form-control" name="expense_item_${n}" placeholder="Expense Item ${n}" value="${escapeHtml(expense.item)}" ${isReadonly ? 'readonly' : ''} required>
                 </div>
-                <div class="col-md-3 mb-2">
+                <div class="col-3">
                     <label class="form-label visually-hidden">Amount ($)</label>
-                    <input type="text" class="form-control expense-amount number-input" name="expense_amount_${index}" placeholder="Amount" value="${formatNumber(expense.amount)}" required>
+                    <input type="text" class="form-control expense-amount number-input" name="expense_amount_${n}" placeholder="Amount" value="${formatNumber(expense.amount)}" required>
                 </div>
-                <div class="col-md-3 mb-2">
+                <div class="col-3">
                     <label class="form-label visually-hidden">Frequency</label>
-                    <select class="form-select expense-frequency" name="expense_frequency_${index}">${optionsHTML}</select>
+                    <select class="form-select expense-frequency" name="expense_frequency_${n}">${optionsHTML}</select>
                 </div>
-                ${!isReadonly ? `<div class="col-md-1 mb-2"><i class="bi bi-trash-fill text-danger remove-expense-btn" style="cursor: pointer; font-size: 1.2rem;" title="Remove item"></i></div>` : '<div class="col-md-1 mb-2"></div>'}
+                ${!isReadonly ? `<div class="col-1"><i class="bi bi-trash-fill text-danger remove-expense-btn" style="cursor: pointer; font-size: 1.2rem;" title="Remove item"></i></div>` : '<div class="col-1"></div>'}
             </div>
         `;
     };
 
-    const renderExpenses = () => {
-        expenseEntriesGrid.innerHTML = '';
-        allExpensesData.forEach((expense, index) => {
-            expenseEntriesGrid.insertAdjacentHTML('beforeend', createExpenseEntryHTML(index + 1, expense));
+    const readExpenseEntry = (entry) => ({
+        item: entry.querySelector('[name^="expense_item_"]').value,
+        amount: parseFormattedNumber(entry.querySelector('[name^="expense_amount_"]').value),
+        frequency: entry.querySelector('[name^="expense_frequency_"]').value
+    });
+
+    const placeholderHTML = (index, entryClass) =>
+        `<div class="row ${entryClass} virtual-row placeholder-glow" data-index="${index}"><div class="col-11"><span class="placeholder col-12"></span></div></div>`;
+
+    /**
+     * One paginated, filterable list (products or expenses). Rows are fetched
+     * a page at a time as they scroll into view, and only edited rows, new
+     * rows and deleted ids are sent on save.
+     */
+    const createCatalog = ({ url, grid, entryClass, renderEntry, readEntry, initialRows, total }) => {
+        let rows = initialRows.slice();
+        rows.length = Math.max(total, rows.length);
+        let query = '';
+        // Bumped when row positions change, so pages fetched before then are dropped
+        let version = 0;
+        let nextKey = 1;
+        const loadingOffsets = new Set();
+        const dirty = new Set();
+        const deleted = new Set();
+        const pageSize = pageData.page_size;
+
+        const list = createVirtualList(grid, {
+            rowHeight: ROW_HEIGHT,
+            renderRow: (index) => rows[index] ? renderEntry(index, rows[index]) : placeholderHTML(index, entryClass),
+            onRangeRendered: (start, end) => {
+                for (let offset = Math.floor(start / pageSize) * pageSize; offset < end; offset += pageSize) {
+                    // slice() keeps the holes of rows that are not loaded yet
+                    if (rows.slice(offset, Math.min(offset + pageSize, end)).includes(undefined)) {
+                        fetchPage(offset);
+                    }
+                }
+            }
         });
+
+        const fetchPage = (offset) => {
+            if (loadingOffsets.has(offset)) return;
+            loadingOffsets.add(offset);
+            const requestVersion = version;
+            enqueue(async () => {
+                const params = new URLSearchParams({ offset, limit: pageSize, q: query });
+                const response = await fetch(`${url}?${params}`);
+                if (!response.ok) throw new Error(`Failed to load rows at ${offset}`);
+                return response.json();
+            }).then(page => {
+                loadingOffsets.delete(offset);
+                if (requestVersion !== version) return list.refresh();
+                let filled = 0;
+                page.items.forEach((row, i) => {
+                    if (!rows[offset + i]) {
+                        rows[offset + i] = row;
+                        filled++;
+                    }
+                });
+                // Nothing new means the rows were deleted elsewhere; don't refetch in a loop
+                if (filled) list.refresh();
+            }).catch(error => {
+                loadingOffsets.delete(offset);
+                console.error('Error loading rows:', error);
+            });
+        };
+
+        return {
+            add() {
+                rows.push({ key: `new-${nextKey++}` });
+                list.setCount(rows.length);
+                list.scrollToEnd();
+            },
+            remove(index) {
+                const row = rows[index];
+                if (!row) return;
+                if (row.id) deleted.add(row.id);
+                dirty.delete(row);
+                rows.splice(index, 1);
+                version++;
+                list.setCount(rows.length);
+            },
+            edit(entry) {
+                const row = rows[Number(entry.dataset.index)];
+                if (!row) return;
+                Object.assign(row, readEntry(entry));
+                dirty.add(row);
+            },
+            search(text) {
+                query = text.trim();
+                rows = [];
+                version++;
+                loadingOffsets.clear();
+                enqueue(async () => {
+                    const params = new URLSearchParams({ offset: 0, limit: pageSize, q: query });
+                    const response = await fetch(`${url}?${params}`);
+                    if (!response.ok) throw new Error('Failed to search rows');
+                    return response.json();
+                }).then(page => {
+                    rows = page.items.slice();
+                    rows.length = page.total;
+                    grid.scrollTop = 0;
+                    list.setCount(rows.length);
+                }).catch(error => console.error('Error searching rows:', error));
+            },
+            // Takes the pending changes; `restore` puts them back if the save fails.
+            takeChanges() {
+                const changes = {
+                    upsert: Array.from(dirty, row => ({ ...row })),
+                    delete: Array.from(deleted)
+                };
+                const taken = { rows: Array.from(dirty), ids: Array.from(deleted) };
+                dirty.clear();
+                deleted.clear();
+                return { changes, taken };
+            },
+            restore({ rows: takenRows, ids }) {
+                takenRows.forEach(row => dirty.add(row));
+                ids.forEach(id => deleted.add(id));
+            },
+            assignIds(taken, created) {
+                taken.rows.forEach(row => {
+                    if (!row.id && created[row.key]) row.id = created[row.key];
+                });
+            },
+            hasChanges() {
+                return dirty.size > 0 || deleted.size > 0;
+            },
+            render() {
+                list.setCount(rows.length);
+            }
+        };
     };
 
-    const saveDataToSession = async () => {
+    const products = createCatalog({
+        url: pageData.products_url,
+        grid: productEntriesGrid,
+        entryClass: 'product-entry',
+        renderEntry: createProductEntryHTML,
+        readEntry: readProductEntry,
+        initialRows: pageData.products || [],
+        total: pageData.totals.products
+    });
+    const expenses = createCatalog({
+        url: pageData.expenses_url,
+        grid: expenseEntriesGrid,
+        entryClass: 'expense-entry',
+        renderEntry: createExpenseEntryHTML,
+        readEntry: readExpenseEntry,
+        initialRows: pageData.expenses || [],
+        total: pageData.totals.expenses
+    });
+
+    const updateTotalSales = (totals) => {
+        document.getElementById('total-sales').value = totals.total_annual_sales.toLocaleString('en-US', { minimumFractionDigits: 2, maximumFractionDigits: 2 });
+    };
+
+    let companyNameChanged = false;
+
+    // Resolves to false when the save failed and the changes were put back
+    const saveChanges = () => enqueue(async () => {
+        if (!products.hasChanges() && !expenses.hasChanges() && !companyNameChanged) return true;
+        const productChanges = products.takeChanges();
+        const expenseChanges = expenses.takeChanges();
+        const body = { products: productChanges.changes, expenses: expenseChanges.changes };
+        if (companyNameChanged) body.company_name = companyNameInput.value;
+        companyNameChanged = false;
         try {
             const response = await fetch(pageData.save_url, {
-                method: 'POST',
+                method: 'PATCH',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({
-                    products: allProductsData,
-                    expenses: allExpensesData,
-                    company_name: document.getElementById('companyName').value
-                }),
+                body: JSON.stringify(body),
             });
-            if (!response.ok) {
-                console.error('Failed to save data');
-                saveDataBtn.textContent = 'Save Failed';
-                saveDataBtn.classList.replace('btn-info', 'btn-danger');
-            } else {
-                saveDataBtn.textContent = 'Saved!';
-                setTimeout(() => { saveDataBtn.textContent = 'Save Changes'; }, 2000);
-            }
+            if (!response.ok) throw new Error(`Save failed with status ${response.status}`);
+            const result = await response.json();
+            products.assignIds(productChanges.taken, result.created.products);
+            expenses.assignIds(expenseChanges.taken, result.created.expenses);
+            updateTotalSales(result.totals);
+            saveDataBtn.textContent = 'Saved!';
+            saveDataBtn.classList.replace('btn-danger', 'btn-info');
+            setTimeout(() => { saveDataBtn.textContent = 'Save Changes'; }, 2000);
+            return true;
         } catch (error) {
             console.error('Error saving data:', error);
+            products.restore(productChanges.taken);
+            expenses.restore(expenseChanges.taken);
+            if ('company_name' in body) companyNameChanged = true;
+            saveDataBtn.textContent = 'Save Failed';
+            saveDataBtn.classList.replace('btn-info', 'btn-danger');
+            return false;
         }
-    };
-
-    // --- Event Listeners ---
-    addProductBtn.addEventListener('click', () => {
-        allProductsData.push({});
-        renderProducts();
-        productEntriesGrid.scrollTop = productEntriesGrid.scrollHeight;
     });
+    const scheduleSave = debounce(saveChanges, SAVE_DELAY_MS);
 
-    addExpenseBtn.addEventListener('click', () => {
-        allExpensesData.push({});
-        renderExpenses();
-        expenseEntriesGrid.scrollTop = expenseEntriesGrid.scrollHeight;
-    });
+    // --- Event Listeners ---
+    addProductBtn.addEventListener('click', () => products.add());
+    addExpenseBtn.addEventListener('click', () => expenses.add());
 
     document.addEventListener('input', (e) => {
-        if (e.target.closest('.product-entry')) {
-            allProductsData = collectAllProductInputs(productEntriesGrid);
-            updateTotalSales();
-        } else if (e.target.closest('.expense-entry')) {
-            allExpensesData = collectAllExpenseInputs(expenseEntriesGrid);
-        }
-        if (e.target.closest('.product-entry, .expense-entry, #companyName')) {
-            saveDataToSession();
+        const productEntry = e.target.closest('.product-entry');
+        const expenseEntry = e.target.closest('.expense-entry');
+        if (productEntry) {
+            products.edit(productEntry);
+        } else if (expenseEntry) {
+            expenses.edit(expenseEntry);
+        } else if (e.target === companyNameInput) {
+            companyNameChanged = true;
+        } else {
+            return;
         }
+        scheduleSave();
     });
 
+    const productSearch = document.getElementById('productSearch');
+    const expenseSearch = document.getElementById('expenseSearch');
+    const searchProducts = debounce(() => products.search(productSearch.value), SEARCH_DELAY_MS);
+    const searchExpenses = debounce(() => expenses.search(expenseSearch.value), SEARCH_DELAY_MS);
+    // Search fields are outside the entries, so the input listener above ignores them
+    productSearch.addEventListener('input', searchProducts);
+    expenseSearch.addEventListener('input', searchExpenses);
+
+    const importFile = async (fileInput, statusElement, importUrl, catalog, searchInput) => {
+        const file = fileInput.files[0];
+        if (!file) return;
+        scheduleSave.cancel();
+        await saveChanges();
+        statusElement.textContent = `Importing ${file.name}...`;
+        const formData = new FormData();
+        formData.append('file', file);
+        try {
+            const response = await enqueue(() => fetch(importUrl, { method: 'POST', body: formData }));
+            const result = await response.json();
+            if (!response.ok) throw new Error(result.error || `Import failed with status ${response.status}`);
+            const errors = result.errors.map(e => `row ${e.row}: ${e.error}`).join('; ');
+            statusElement.textContent = `${result.inserted} added, ${result.updated} updated` +
+                (result.error_count ? `, ${result.error_count} skipped (${errors}${result.error_count > result.errors.length ? '; ...' : ''})` : '');
+            updateTotalSales(result.totals);
+            catalog.search(searchInput.value);
+        } catch (error) {
+            console.error('Error importing file:', error);
+            statusElement.textContent = error.message;
+        } finally {
+            fileInput.value = '';
+        }
+    };
+
+    const productImportFile = document.getElementById('productImportFile');
+    const expenseImportFile = document.getElementById('expenseImportFile');
+    productImportFile.addEventListener('change', () => importFile(
+        productImportFile, document.getElementById('productImportStatus'), pageData.products_import_url, products, productSearch));
+    expenseImportFile.addEventListener('change', () => importFile(
+        expenseImportFile, document.getElementById('expenseImportStatus'), pageData.expenses_import_url, expenses, expenseSearch));
+
     document.addEventListener('focusout', (e) => {
         if (e.target.classList.contains('number-input')) {
             e.target.value = formatNumber(parseFormattedNumber(e.target.value));
         }
     });
 
-    saveDataBtn.addEventListener('click', saveDataToSession);
+    saveDataBtn.addEventListener('click', () => {
+        scheduleSave.cancel();
+        saveChanges();
+    });
 
     saveAndContinueBtn.addEventListener('click', async () => {
-        await saveDataToSession();
+        scheduleSave.cancel();
+        // Stay put on failure so the unsaved edits and the error remain visible
+        if (!await saveChanges()) return;
         window.location.href = pageData.continue_url;
     });
 
     document.addEventListener('click', (e) => {
-        const removeAndUpdate = (selector, dataArray, renderFunc) => {
+        const removeAndSave = (selector, catalog) => {
             const entryToRemove = e.target.closest(selector);
             if (entryToRemove) {
-                const indexToRemove = Array.from(entryToRemove.parentElement.children).indexOf(entryToRemove);
-                dataArray.splice(indexToRemove, 1);
-                saveDataToSession();
-                renderFunc();
+                catalog.remove(Number(entryToRemove.dataset.index));
+                scheduleSave.cancel();
+                saveChanges();
             }
         };
         if (e.target.classList.contains('remove-product-btn')) {
-            removeAndUpdate('.product-entry', allProductsData, renderProducts);
+            removeAndSave('.product-entry', products);
         } else if (e.target.classList.contains('remove-expense-btn')) {
-            removeAndUpdate('.expense-entry', allExpensesData, renderExpenses);
+            removeAndSave('.expense-entry', expenses);
         }
     });
 
     // Initial render
-    renderProducts();
-    renderExpenses();
-});
\ No newline at end of file
+    products.render();
+    expenses.render();
+    updateTotalSales(pageData.totals);
+});
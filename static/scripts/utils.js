@@ -75,4 +75,91 @@ function collectAllExpenseInputs(containerElement) {
         }
     });
     return collectedData;
-}
\ No newline at end of file
+}
+/**
+ * Escapes text for use inside HTML, including attribute values.
+ *
+ * @param {any} value - The value to escape.
+ * @returns {string} The escaped string; an empty string for null or undefined.
+ */
+function escapeHtml(value) {
+    if (value === null || value === undefined) return '';
+    return String(value)
+        .replace(/&/g, '&amp;')
+        .replace(/</g, '&lt;')
+        .replace(/>/g, '&gt;')
+        .replace(/"/g, '&quot;')
+        .replace(/'/g, '&#39;');
+}
+
+/**
+ * Renders only the rows of a long list that are visible in a scrolling
+ * container, plus a few above and below. Rows must all be `rowHeight` pixels
+ * tall. The list does not hold data: `renderRow(index)` returns the HTML of
+ * row `index`, and `onRangeRendered(start, end)` is called after each render
+ * so the caller can fetch rows that are not loaded yet.
+ *
+ * @param {HTMLElement} container - The scrolling element.
+ * @param {Object} options - { rowHeight, renderRow, onRangeRendered, overscan }.
+ * @returns {Object} { setCount(count), refresh(), scrollToEnd() }.
+ */
+function createVirtualList(container, { rowHeight, renderRow, onRangeRendered = () => {}, overscan = 10 }) {
+    const spacer = document.createElement('div');
+    const viewport = document.createElement('div');
+    spacer.className = 'virtual-list-spacer';
+    viewport.className = 'virtual-list-viewport';
+    spacer.appendChild(viewport);
+    container.innerHTML = '';
+    container.appendChild(spacer);
+
+    let count = 0;
+    let renderedRange = null;
+    let scheduled = false;
+
+    const render = (force = false) => {
+        scheduled = false;
+        const visibleRows = Math.ceil(container.clientHeight / rowHeight) || 20;
+        const start = Math.max(0, Math.floor(container.scrollTop / rowHeight) - overscan);
+        const end = Math.min(count, start + visibleRows + 2 * overscan);
+        if (!force && renderedRange && renderedRange[0] === start && renderedRange[1] === end) return;
+        // Keep focus on the field being edited if its row is still rendered.
+        const active = viewport.contains(document.activeElement) ? document.activeElement : null;
+        const focusName = active && active.name;
+        const selection = active && active.selectionStart !== undefined ? [active.selectionStart, active.selectionEnd] : null;
+        renderedRange = [start, end];
+        spacer.style.height = `${count * rowHeight}px`;
+        viewport.style.transform = `translateY(${start * rowHeight}px)`;
+        let html = '';
+        for (let i = start; i < end; i++) html += renderRow(i);
+        viewport.innerHTML = html;
+        if (focusName) {
+            const field = viewport.querySelector(`[name="${focusName}"]`);
+            if (field) {
+                field.focus();
+                if (selection && field.setSelectionRange) field.setSelectionRange(...selection);
+            }
+        }
+        onRangeRendered(start, end);
+    };
+
+    container.addEventListener('scroll', () => {
+        if (!scheduled) {
+            scheduled = true;
+            requestAnimationFrame(() => render());
+        }
+    });
+
+    return {
+        setCount(newCount) {
+            count = newCount;
+            render(true);
+        },
+        refresh() {
+            render(true);
+        },
+        scrollToEnd() {
+            container.scrollTop = count * rowHeight;
+            render(true);
+        }
+    };
+}
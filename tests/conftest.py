@@ -0,0 +1,45 @@
+import pytest
+from werkzeug.security import generate_password_hash
+
+from app import create_app
+from app.extensions import db
+from app.models import User
+from app.auth import _seed_initial_user_data
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'SECRET_KEY': 'test',
+        'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'test.db'}",
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+    })
+    with app.app_context():
+        db.create_all(bind_key=None)
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app):
+    """A registered user with the default seed data."""
+    with app.app_context():
+        new_user = User(username='alice', password_hash=generate_password_hash('secret', method='pbkdf2:sha256:1000'))
+        db.session.add(new_user)
+        db.session.commit()
+        _seed_initial_user_data(new_user.id)
+        return new_user.id
+
+
+@pytest.fixture
+def logged_in_client(client, user):
+    client.post('/login', data={'username': 'alice', 'password': 'secret'})
+    return client
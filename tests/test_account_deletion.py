@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, func, select
+
+from app import services
+from app.auth import _seed_initial_user_data
+from app.extensions import db
+from app.models import User, Product, Expense, Asset, Liability, FinancialParams, BusinessStartupActivity
+
+CHILD_MODELS = (Product, Expense, Asset, Liability, FinancialParams, BusinessStartupActivity)
+
+
+def add_user(username, last_login_at):
+    user = User(username=username, password_hash='x')
+    user.last_login_at = last_login_at
+    db.session.add(user)
+    db.session.commit()
+    _seed_initial_user_data(user.id)
+    return user.id
+
+
+def child_rows(user_id):
+    return sum(db.session.scalar(select(func.count()).select_from(m).where(m.user_id == user_id)) for m in CHILD_MODELS)
+
+
+def test_delete_cascades_in_the_database(app, user):
+    with app.app_context():
+        assert child_rows(user) > 0
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda conn, cursor, sql, *args: statements.append(sql))
+        assert services.delete_users([user]) == 1
+        assert [sql for sql in statements if sql.startswith('DELETE')] == [statements[0]]
+        assert child_rows(user) == 0
+        assert db.session.get(User, user) is None
+
+
+def test_purge_inactive_users_in_batches(app, user):
+    now = datetime.utcnow()
+    with app.app_context():
+        stale = [add_user(f'stale{i}', now - timedelta(days=400 + i)) for i in range(3)]
+        recent = add_user('recent', now - timedelta(days=10))
+        cutoff = now - timedelta(days=365)
+
+        assert services.purge_inactive_users(cutoff, dry_run=True) == 3
+        assert services.purge_inactive_users(cutoff, batch_size=2) == 3
+        assert db.session.scalars(select(User.id).order_by(User.id)).all() == [user, recent]
+        assert all(child_rows(user_id) == 0 for user_id in stale)
+
+
+def test_purge_command_and_login_tracking(app, client, user):
+    with app.app_context():
+        db.session.get(User, user).last_login_at = datetime(2000, 1, 1)
+        db.session.commit()
+    client.post('/login', data={'username': 'alice', 'password': 'secret'})
+    with app.app_context():
+        assert db.session.get(User, user).last_login_at > datetime(2000, 1, 1)
+
+    runner = app.test_cli_runner()
+    with app.app_context():
+        assert runner.invoke(args=['purge-users']).exit_code != 0
+        result = runner.invoke(args=['purge-users', '--username', 'alice', '--dry-run'])
+        assert 'Would delete 1 of 1' in result.output
+        result = runner.invoke(args=['purge-users', '--username', 'alice', '--inactive-days', '30'])
+        assert 'Deleted 1 of 1' in result.output and 'Deleted 0 account(s)' in result.output
+        assert db.session.get(User, user) is None
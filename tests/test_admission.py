@@ -0,0 +1,95 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.admission import Admission, ConcurrencyLimit, Rejected, TokenBuckets, default_limits
+
+PAYLOAD = {
+    'cogs_percentage': 35, 'tax_rate': 8, 'seasonality': [1.0] * 12,
+    'current_assets': 15000, 'current_liabilities': 8000, 'interest_expense': 2000,
+    'depreciation': 3000, 'annual_operating_expenses': 24000, 'assets': [], 'liabilities': [],
+}
+
+
+def test_concurrency_limit_queues_then_rejects():
+    limit = ConcurrencyLimit(1, queue=1, timeout=5)
+    limit.acquire()
+    waiter = threading.Thread(target=limit.acquire)
+    waiter.start()
+    while limit.snapshot()['queue_depth'] == 0:
+        pass
+    with pytest.raises(Rejected) as e:
+        limit.acquire()
+    assert (e.value.status, e.value.reason, e.value.retry_after) == (503, 'queue_full', 5)
+
+    limit.release()
+    waiter.join()
+    stats = limit.snapshot()
+    assert (stats['active'], stats['admitted'], stats['rejected_queue_full']) == (1, 2, 1)
+
+    limit.timeout = 0.01
+    with pytest.raises(Rejected) as e:
+        limit.acquire()
+    assert e.value.reason == 'timeout'
+
+
+def test_default_limits_leave_a_thread_for_cheap_pages():
+    # gthread with the default GUNICORN_IO_WAIT, and a larger pool
+    for threads in (2, 8):
+        for settings in default_limits(threads).values():
+            assert settings['concurrency'] + settings['queue'] <= threads - 1
+            assert settings['queue'] * settings['timeout'] <= 5
+    # A sync worker serves one request at a time anyway
+    assert {s['concurrency'] for s in default_limits(1).values()} == {1}
+
+
+def test_admit_async_waits_off_the_event_loop():
+    admission = Admission(1, queue=1, timeout=5)
+    admission.limit.acquire()
+
+    async def main():
+        waiter = asyncio.create_task(admission.admit_async('a'))
+        while admission.limit.snapshot()['queue_depth'] == 0:
+            await asyncio.sleep(0.001)  # the loop keeps running while the request queues
+        admission.limit.release()
+        await waiter
+
+    asyncio.run(main())
+    assert admission.limit.snapshot()['active'] == 1
+
+
+def test_token_buckets_refill():
+    buckets = TokenBuckets(per_minute=60, burst=2)
+    buckets.take('a', now=0)
+    buckets.take('a', now=0)
+    buckets.take('b', now=0)
+    with pytest.raises(Rejected) as e:
+        buckets.take('a', now=0.5)
+    assert (e.value.status, e.value.retry_after) == (429, 1)
+    buckets.take('a', now=1.5)
+    assert buckets.limited == 1
+
+
+def test_limited_endpoint_answers_429_and_503(app, logged_in_client, monkeypatch):
+    monkeypatch.setenv('ADMIN_API_TOKEN', 'admin-token')
+    headers = {'Authorization': 'Bearer admin-token'}
+    admission = Admission(1, per_minute=1, burst=1)
+    app.extensions['admission']['main.recalculate_forecast'] = admission
+
+    assert logged_in_client.post('/recalculate-forecast', json=PAYLOAD).status_code == 200
+    response = logged_in_client.post('/recalculate-forecast', json=PAYLOAD)
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '60'
+    assert logged_in_client.get('/health/admission', headers=headers).get_json()['endpoints']['main.recalculate_forecast']['rejected_rate_limited'] == 1
+
+    admission.buckets = None
+    admission.limit.acquire()
+    response = logged_in_client.post('/recalculate-forecast', json=PAYLOAD)
+    assert response.status_code == 503 and 'Retry-After' in response.headers
+    # Cheap pages are not limited
+    assert logged_in_client.get('/health/db', headers=headers).status_code == 200
+    admission.limit.release()
+
+    stats = logged_in_client.get('/health/admission', headers=headers).get_json()['endpoints']['main.recalculate_forecast']
+    assert (stats['active'], stats['admitted'], stats['rejected_queue_full']) == (0, 2, 1)
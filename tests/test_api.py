@@ -0,0 +1,61 @@
+import gzip
+import json
+
+from app.extensions import db
+from app.models import Product
+
+
+def test_forecast_snapshot_requires_auth(client, user):
+    assert client.get(f'/api/forecast/{user}').status_code == 401
+
+
+def test_forecast_snapshot_rejects_other_users(logged_in_client, user):
+    assert logged_in_client.get(f'/api/forecast/{user + 1}').status_code == 403
+
+
+def test_forecast_snapshot_accepts_dashboard_token(client, user, monkeypatch):
+    monkeypatch.setenv('DASHBOARD_API_TOKEN', 'dash-token')
+    response = client.get(f'/api/forecast/{user}', headers={'Authorization': 'Bearer dash-token'})
+    assert response.status_code == 200
+    assert response.get_json()['user_id'] == user
+
+
+def test_forecast_snapshot_etag_round_trip(app, logged_in_client, user):
+    first = logged_in_client.get(f'/api/forecast/{user}')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+    assert not etag.startswith('W/')
+    assert 'annual' in first.get_json()['forecast']
+
+    cached = logged_in_client.get(f'/api/forecast/{user}', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+
+    with app.app_context():
+        db.session.add(Product(description='Widget', price=10.0, sales_volume=5, sales_volume_unit='monthly', user_id=user))
+        db.session.commit()
+
+    changed = logged_in_client.get(f'/api/forecast/{user}', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.get_json()['forecast']['annual']['revenue'] == 600.0
+
+
+def test_recalculate_forecast_columnar_layout_is_compressed(logged_in_client):
+    payload = {
+        'cogs_percentage': 35, 'tax_rate': 8, 'seasonality': [1.0] * 12,
+        'current_assets': 15000, 'current_liabilities': 8000, 'interest_expense': 2000,
+        'depreciation': 3000, 'annual_operating_expenses': 95000.123,
+        'assets': [{'description': 'Cash', 'amount': 1000}], 'liabilities': [],
+    }
+    rows = logged_in_client.post('/recalculate-forecast', json=payload).get_json()
+    response = logged_in_client.post(
+        '/recalculate-forecast?layout=columnar', json=payload, headers={'Accept-Encoding': 'gzip'}
+    )
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'serialize;dur=' in response.headers['Server-Timing']
+
+    columnar = json.loads(gzip.decompress(response.data))
+    assert columnar['layout'] == 'columnar'
+    assert columnar['monthly']['month'] == list(range(1, 13))
+    assert columnar['monthly']['operating_expenses'][0] == round(rows['monthly'][0]['operating_expenses'], 2)
@@ -0,0 +1,136 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import event
+
+pytest.importorskip('aiosqlite')
+pytest.importorskip('asgiref')
+
+from app.admission import Admission
+from app.asgi import create_asgi_app, async_database_url
+from app.extensions import db
+from app.models import Product, Expense, FinancialParams, BusinessStartupActivity
+
+FORECAST_DATA = {
+    'cogs_percentage': 40, 'tax_rate': 10, 'seasonality': [1.0] * 12,
+    'current_assets': 1000, 'current_liabilities': 500, 'interest_expense': 100,
+    'depreciation': 50, 'annual_operating_expenses': 2000,
+    'assets': [{'description': 'Van', 'amount': 9000}],
+    'liabilities': [{'description': 'Loan', 'amount': 4000}],
+}
+
+
+def call(asgi_app, method, path, body=None, headers=None, query=b''):
+    """Runs one HTTP request through the ASGI app and returns (status, headers, body)."""
+    payload = json.dumps(body).encode() if body is not None else b''
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'root_path': '', 'query_string': query, 'server': ('testserver', 80), 'client': ('127.0.0.1', 1234),
+        'headers': [(k.lower().encode(), v.encode()) for k, v in {'host': 'testserver', 'content-type': 'application/json', **(headers or {})}.items()],
+    }
+    messages = [{'type': 'http.request', 'body': payload, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(asgi_app(scope, receive, send))
+    start = sent[0]
+    return start['status'], {k.decode(): v.decode() for k, v in start['headers']}, b''.join(m.get('body', b'') for m in sent[1:])
+
+
+@pytest.fixture
+def asgi_app(app):
+    return create_asgi_app(app)
+
+
+@pytest.fixture
+def session_cookie(logged_in_client):
+    return {'cookie': f"session={logged_in_client.get_cookie('session').value}"}
+
+
+def test_async_database_url():
+    assert async_database_url('postgresql://u:p@h/db?sslmode=require').render_as_string(hide_password=False) == 'postgresql+asyncpg://u:p@h/db?ssl=require'
+    assert async_database_url('sqlite:////tmp/x.db').drivername == 'sqlite+aiosqlite'
+
+
+def test_unauthenticated_requests_fall_back_to_flask(asgi_app, user):
+    status, _, body = call(asgi_app, 'GET', f'/api/forecast/{user}')
+    assert status == 401
+    assert json.loads(body) == {'error': 'authentication required'}
+
+
+def test_recalculate_forecast_matches_sync_route(app, asgi_app, logged_in_client, user, session_cookie):
+    status, headers, body = call(asgi_app, 'POST', '/recalculate-forecast', FORECAST_DATA, session_cookie)
+    assert status == 200, body
+    assert headers['content-type'] == 'application/json'
+    expected = logged_in_client.post('/recalculate-forecast', json=FORECAST_DATA).get_json()
+    assert json.loads(body) == expected
+    with app.app_context():
+        params = FinancialParams.query.filter_by(user_id=user).one()
+        assert params.cogs_percentage == 40
+        assert params.total_annual_revenue == expected['annual']['revenue']
+
+
+def test_save_product_details_and_snapshot(app, asgi_app, user, session_cookie):
+    data = {'company_name': 'Acme', 'products': [{'description': 'Widget', 'price': '12.5', 'sales_volume': '4'}], 'expenses': []}
+    status, _, body = call(asgi_app, 'POST', '/save-product-details', data, session_cookie)
+    assert (status, json.loads(body)) == (200, {'status': 'success'})
+    with app.app_context():
+        products = Product.query.filter_by(user_id=user).all()
+        assert [(p.description, p.price, p.sales_volume) for p in products] == [('Widget', 12.5, 4)]
+        assert FinancialParams.query.filter_by(user_id=user).one().company_name == 'Acme'
+
+    status, headers, body = call(asgi_app, 'GET', f'/api/forecast/{user}', headers=session_cookie)
+    assert status == 200
+    assert json.loads(body)['user_id'] == user
+    status, _, body = call(asgi_app, 'GET', f'/api/forecast/{user}', headers={**session_cookie, 'if-none-match': headers['etag']})
+    assert (status, body) == (304, b'')
+
+
+def test_first_write_provisions_deferred_user(app, asgi_app, client, user):
+    app.config['DEFER_USER_SEEDING'] = True
+    client.post('/register', data={'username': 'dave', 'password': 'pw'})
+    client.post('/login', data={'username': 'dave', 'password': 'pw'})
+    cookie = {'cookie': f"session={client.get_cookie('session').value}"}
+
+    status, _, body = call(asgi_app, 'POST', '/recalculate-forecast', FORECAST_DATA, cookie)
+    assert status == 200, body
+    with app.app_context():
+        dave = FinancialParams.query.filter(FinancialParams.user_id != user).one().user_id
+        for model in (Expense, BusinessStartupActivity):
+            assert model.query.filter_by(user_id=dave).count() == model.query.filter_by(user_id=user).count() > 0
+    assert json.loads(body) == client.post('/recalculate-forecast', json=FORECAST_DATA).get_json()
+
+
+def test_admission_limits_apply(app, asgi_app, user, session_cookie):
+    admission = Admission(1, per_minute=1, burst=1)
+    app.extensions['admission']['main.recalculate_forecast'] = admission
+    assert call(asgi_app, 'POST', '/recalculate-forecast', FORECAST_DATA, session_cookie)[0] == 200
+    status, headers, _ = call(asgi_app, 'POST', '/recalculate-forecast', FORECAST_DATA, session_cookie)
+    assert (status, headers['retry-after']) == (429, '60')
+
+    admission.buckets = None
+    admission.limit.acquire()
+    status, headers, body = call(asgi_app, 'POST', '/recalculate-forecast', FORECAST_DATA, session_cookie)
+    assert status == 503 and 'retry-after' in headers
+    admission.limit.release()
+    stats = admission.snapshot()
+    assert (stats['active'], stats['admitted'], stats['rejected_queue_full']) == (0, 2, 1)
+
+
+def test_recalculate_loads_products_on_the_async_engine(app, asgi_app, user, session_cookie):
+    with app.app_context():
+        sync_engine = db.engine
+    statements = []
+    event.listen(sync_engine, 'before_cursor_execute', lambda conn, cursor, sql, *args: statements.append(sql))
+
+    for _ in range(2):
+        status, _, body = call(asgi_app, 'POST', '/recalculate-forecast', FORECAST_DATA, session_cookie)
+        assert status == 200, body
+    assert not [sql for sql in statements if 'FROM product' in sql]
@@ -0,0 +1,37 @@
+import gzip
+import shutil
+
+from werkzeug.http import parse_accept_header
+
+from app.assets import build_assets
+from app.compression import choose_encoding
+
+
+def test_build_assets_serves_fingerprinted_precompressed_files(app, client, tmp_path):
+    static_folder = tmp_path / 'static'
+    shutil.copytree(app.static_folder, static_folder, ignore=shutil.ignore_patterns('dist'))
+    app.static_folder = str(static_folder)
+
+    manifest = build_assets(app.static_folder)
+    fingerprinted = manifest['css/custom.css']
+    assert fingerprinted != 'css/custom.css'
+
+    page = client.get('/login').get_data(as_text=True)
+    assert f'/assets/{fingerprinted}' in page
+
+    response = client.get(f'/assets/{fingerprinted}', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Cache-Control'] == 'public, max-age=31536000, immutable'
+    assert gzip.decompress(response.data) == (static_folder / 'css' / 'custom.css').read_bytes()
+
+    plain = client.get(f'/assets/{fingerprinted}', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers
+    assert client.get('/assets/css/custom.css').status_code == 404
+
+
+def test_choose_encoding_respects_available():
+    accepted = parse_accept_header('gzip, br')
+    assert choose_encoding(accepted) in ('br', 'gzip')
+    assert choose_encoding(accepted, ['gzip']) == 'gzip'
+    assert choose_encoding(accepted, []) is None
@@ -0,0 +1,58 @@
+import pytest
+
+from app.extensions import db
+from app.models import Liability, FinancialParams
+from logic.debt import monthly_payments, debt_service_schedule, total_debt_service
+from logic.loan import calculate_loan_schedule
+
+
+def test_monthly_payments_by_instrument_kind():
+    payments = monthly_payments(
+        [20000.0, 1200.0, 5000.0, 800.0, 0.0],
+        [8.0, 0.0, 18.0, None, 5.0],
+        [60, 12, None, None, 24],
+    )
+    assert payments[0] == pytest.approx(calculate_loan_schedule(20000, 8.0, 5)['monthly_payment'])
+    assert payments[1] == 100.0           # interest-free installments
+    assert payments[2] == pytest.approx(75.0)  # interest-only
+    assert payments[3:] == [0.0, 0.0]     # plain balance, nothing owed
+
+
+def test_schedule_drops_instruments_after_their_term():
+    assert debt_service_schedule([100.0, 50.0, 10.0], [3, None, 24], months=5) == [160.0, 160.0, 160.0, 60.0, 60.0]
+    result = total_debt_service([1200.0], [0.0], [6], loan_payment=300.0, loan_term_months=36)
+    assert result['liabilities_monthly'] == 200.0
+    assert result['total'] == 6 * 200.0 + 12 * 300.0
+
+
+def test_dscr_counts_every_liability(app, logged_in_client, user):
+    with app.app_context():
+        params = FinancialParams.query.filter_by(user_id=user).one()
+        params.net_operating_income = 12000.0
+        db.session.commit()
+    data = {'loan_amount': '10,000', 'interest_rate': 6, 'loan_term': 2}
+    logged_in_client.post('/loan-calculator', data=data)
+
+    with app.app_context():
+        from app import services
+        params = FinancialParams.query.filter_by(user_id=user).one()
+        debt_service = services.get_debt_service(user, params)
+        # The seeded credit card and bank loan both amortize
+        assert debt_service['liabilities_monthly'] > 0
+        assert debt_service['total'] == pytest.approx(12 * (params.loan_monthly_payment + debt_service['liabilities_monthly']))
+
+    page = logged_in_client.get('/loan-calculator').get_data(as_text=True)
+    assert 'Existing Debt Payments' in page
+
+
+def test_recalculate_keeps_liability_terms(app, logged_in_client, user):
+    payload = {
+        'cogs_percentage': 40, 'tax_rate': 10, 'seasonality': [1.0] * 12, 'current_assets': 1000,
+        'current_liabilities': 500, 'interest_expense': 100, 'depreciation': 50, 'annual_operating_expenses': 2000,
+        'assets': [], 'liabilities': [{'description': 'Van loan', 'amount': 9000, 'interest_rate': '7.5', 'term_months': '48'},
+                                      {'description': 'Supplier credit', 'amount': 500, 'interest_rate': '', 'term_months': ''}],
+    }
+    assert logged_in_client.post('/recalculate-forecast', json=payload).status_code == 200
+    with app.app_context():
+        rows = {l.description: (l.interest_rate, l.term_months) for l in Liability.query.filter_by(user_id=user)}
+    assert rows == {'Van loan': (7.5, 48), 'Supplier credit': (None, None)}
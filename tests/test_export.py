@@ -0,0 +1,87 @@
+import csv
+import zipfile
+from io import BytesIO, StringIO
+
+import pytest
+from openpyxl import load_workbook
+
+from logic.loan import calculate_loan_schedule
+from utils.export import create_forecast_spreadsheet
+from utils.export_csv import stream_forecast_zip
+from utils.export_template import create_forecast_spreadsheet_from_template
+
+
+def workbook_contents(file):
+    wb = load_workbook(file)
+    sheets = {}
+    for ws in wb.worksheets:
+        cells = {
+            cell.coordinate: (cell.value, cell.number_format, cell.font.b, cell.fill.fgColor.rgb)
+            for row in ws.iter_rows() for cell in row
+        }
+        widths = {key: dim.width for key, dim in ws.column_dimensions.items()}
+        charts = [(type(chart).__name__, chart.grouping, [s.val.numRef.f for s in chart.series]) for chart in ws._charts]
+        sheets[ws.title] = (cells, sorted(str(r) for r in ws.merged_cells.ranges), widths, charts)
+    return [ws.title for ws in wb.worksheets], sheets
+
+
+@pytest.mark.parametrize('product_count, with_loan', [(0, False), (3, True)])
+def test_template_export_matches_builder(product_count, with_loan):
+    products = [{'description': f'Tea & <Cake> {i}' if i else '', 'price': 10.25 + i, 'sales_volume': 3 + i,
+                 'sales_volume_unit': 'monthly' if i % 2 else 'quarterly'} for i in range(product_count)]
+    expenses = [{'item': 'Rent', 'amount': 900, 'frequency': 'monthly'}]
+    loan = calculate_loan_schedule(50000, 7, 3)
+    loan_details = {'loan_amount': 50000, 'interest_rate': 7, 'loan_term': 3,
+                    'monthly_payment': loan['monthly_payment'], 'schedule': loan['schedule'] if with_loan else None}
+    activities = [{'activity': 'Register', 'description': ' leading space', 'weight': 10, 'progress': None}]
+    args = (products, expenses, 30.0, loan_details, [1.0 + i / 10 for i in range(12)], 'Acme', 500.0, 250.0, activities)
+
+    expected = workbook_contents(create_forecast_spreadsheet(*args))
+    assert workbook_contents(create_forecast_spreadsheet_from_template(*args)) == expected
+    # Second export of the same layout comes from the cached skeleton
+    assert workbook_contents(create_forecast_spreadsheet_from_template(*args)) == expected
+
+
+@pytest.mark.parametrize('mode', ['template', 'builder'])
+def test_export_route_modes(app, logged_in_client, mode):
+    app.config['EXPORT_MODE'] = mode
+    response = logged_in_client.get('/export-forecast')
+    assert response.status_code == 200
+    wb = load_workbook(BytesIO(response.data))
+    assert wb.sheetnames[:2] == ['Quarterly Revenue', 'Annual P&L Summary']
+
+
+def test_csv_zip_matches_workbook_tables():
+    products = [{'description': 'Tea, green', 'price': 2.5, 'sales_volume': 40, 'sales_volume_unit': 'monthly'}]
+    loan = calculate_loan_schedule(20000, 5, 2)
+    loan_details = {'loan_amount': 20000, 'interest_rate': 5, 'loan_term': 2,
+                    'monthly_payment': loan['monthly_payment'], 'schedule': loan['schedule']}
+    activities = [{'activity': 'Register', 'description': 'Line one\nline two', 'weight': 10, 'progress': 50}]
+    args = (products, [{'item': 'Rent', 'amount': 900, 'frequency': 'monthly'}], 30.0, loan_details, None, 500.0, 250.0, activities)
+
+    chunks = list(stream_forecast_zip(*args))
+    with zipfile.ZipFile(BytesIO(b''.join(chunks))) as archive:
+        assert archive.namelist() == ['quarterly_revenue.csv', 'annual_pnl_summary.csv',
+                                      'loan_payment_schedule.csv', 'startup_activities.csv']
+        tables = {name: list(csv.reader(StringIO(archive.read(name).decode('utf-8')))) for name in archive.namelist()}
+
+    wb = load_workbook(create_forecast_spreadsheet(*args[:5], 'Acme', *args[5:]))
+    revenue = list(wb['Quarterly Revenue'].iter_rows(min_row=2, values_only=True))
+    assert tables['quarterly_revenue.csv'][0] == list(revenue[0])
+    assert [[row[0]] + [float(v) for v in row[1:]] for row in tables['quarterly_revenue.csv'][1:]] == [list(row) for row in revenue[1:]]
+    assert float(tables['annual_pnl_summary.csv'][1][1]) == wb['Annual P&L Summary']['B3'].value
+    assert len(tables['loan_payment_schedule.csv']) == 25
+    assert tables['startup_activities.csv'][1] == ['Register', 'Line one\nline two', '10', '50']
+
+
+def test_export_route_zip_format(logged_in_client):
+    response = logged_in_client.get('/export-forecast?format=zip')
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.headers['Content-Disposition'] == 'attachment; filename=financial_forecast.zip'
+    with zipfile.ZipFile(BytesIO(response.get_data())) as archive:
+        assert archive.testzip() is None
+        assert 'annual_pnl_summary.csv' in archive.namelist()
+    # Closing the stream frees its export slot, as the server does
+    response.close()
+    assert logged_in_client.get('/export-forecast?format=pdf').status_code == 400
@@ -0,0 +1,138 @@
+import pytest
+
+from logic.forecast_graph import ForecastGraph
+from logic.profitability import calculate_profitability
+from logic.financial_ratios import calculate_key_ratios, calculate_period_ratios
+
+PRODUCTS = [
+    {'price': 19.99, 'sales_volume': 37, 'sales_volume_unit': 'monthly'},
+    {'price': 5.5, 'sales_volume': 100, 'sales_volume_unit': 'quarterly'},
+]
+INPUTS = dict(
+    product_revision=0, fixed_point=False, seasonality=[1.0] * 12, cogs_percentage=35.0,
+    annual_operating_expenses=1200.0, tax_rate=8.0, total_assets=5000.0, total_debt=1000.0,
+    current_assets=1500.0, current_liabilities=800.0, interest_expense=200.0, depreciation=300.0,
+)
+
+
+@pytest.fixture
+def graph():
+    loads = []
+    graph = ForecastGraph(lambda: loads.append(1) or PRODUCTS)
+    graph.loads = loads
+    graph.update(**INPUTS)
+    return graph
+
+
+def test_matches_full_calculation(graph):
+    expected = calculate_profitability(PRODUCTS, 35.0, 1200.0, 8.0, [1.0] * 12)
+    forecast = graph.get('forecast')
+    assert forecast['monthly'] == expected['monthly']
+    assert forecast['annual']['revenue'] == expected['annual']['revenue']
+    assert forecast['quarterly']['net_profit'] == expected['quarterly']['net_profit']
+    assert 'profit_margin' in forecast['annual']
+
+
+@pytest.mark.parametrize('fixed_point', [False, True])
+def test_one_input_recomputes_only_its_dependents(graph, fixed_point):
+    graph.update(fixed_point=fixed_point)
+    graph.get('forecast')
+    assert len(graph.loads) == 1
+
+    graph.update(tax_rate=21.0, seasonality=[1.0] * 11 + [2.0])
+    forecast = graph.get('forecast')
+    assert len(graph.loads) == 1
+    assert graph.evaluations['base_revenue'] == 1
+    expected = calculate_profitability(PRODUCTS, 35.0, 1200.0, 21.0, [1.0] * 11 + [2.0], fixed_point=fixed_point)
+    assert forecast['monthly'] == expected['monthly']
+
+    columns = graph.evaluations['columns']
+    graph.update(total_assets=9000.0)
+    graph.get('forecast')
+    assert graph.evaluations['columns'] == columns
+
+    graph.update(product_revision=1)
+    graph.get('forecast')
+    assert len(graph.loads) == 2
+
+
+def test_saving_products_bumps_the_revision(app, logged_in_client, user):
+    from app.models import FinancialParams
+
+    logged_in_client.get('/financial-forecast')
+    with app.app_context():
+        revision = FinancialParams.query.filter_by(user_id=user).one().product_revision
+
+    data = {'company_name': 'Acme', 'products': [{'description': 'Widget', 'price': 10, 'sales_volume': 1}], 'expenses': []}
+    logged_in_client.post('/save-product-details', json=data)
+    logged_in_client.get('/financial-forecast')
+    with app.app_context():
+        params = FinancialParams.query.filter_by(user_id=user).one()
+        assert params.product_revision == revision + 1
+        assert params.total_annual_revenue == 120.0
+
+
+def test_concurrent_saves_get_distinct_revisions(app, logged_in_client, user):
+    from app import services
+    from app.extensions import db
+    from app.models import FinancialParams
+
+    logged_in_client.get('/financial-forecast')
+    with app.app_context():
+        stale = FinancialParams.query.filter_by(user_id=user).one()
+        revision = stale.product_revision
+        # Another request saves in between
+        with app.app_context():
+            services.save_product_and_expense_data(user, {'products': [], 'expenses': []})
+        services.bump_product_revision(stale)
+        db.session.commit()
+        assert stale.product_revision == revision + 2
+        assert (user, revision) in app.extensions['forecast_graphs']
+
+        services.delete_users([user])
+        assert not any(key[0] == user for key in app.extensions['forecast_graphs'])
+
+
+@pytest.mark.parametrize('fixed_point', [False, True])
+def test_period_ratios(graph, fixed_point):
+    graph.update(fixed_point=fixed_point, seasonality=[0.0] + [1.0] * 11)
+    forecast = graph.get('forecast')
+    annual = forecast['annual']
+    expected = calculate_key_ratios(
+        net_profit=annual['net_profit'], total_revenue=annual['revenue'], total_assets=5000.0,
+        current_assets=1500.0, current_liabilities=800.0, total_debt=1000.0,
+        net_operating_income=annual['gross_profit'] - 1200.0, interest_expense=200.0, depreciation=300.0
+    )
+    assert {k: annual[k] for k in expected} == expected
+
+    monthly, quarterly = forecast['ratios']['monthly'], forecast['ratios']['quarterly']
+    assert [row['month'] for row in monthly] == list(range(1, 13))
+    # A month without revenue has no margin rather than a division error
+    assert monthly[0]['profit_margin'] == 0
+    january = forecast['monthly'][1]
+    assert monthly[1]['profit_margin'] == pytest.approx(january['net_profit'] / january['revenue'] * 100)
+    assert monthly[1]['interest_coverage_ratio'] == pytest.approx(
+        (january['gross_profit'] - january['operating_expenses'] + 25.0) / (200.0 / 12))
+    assert quarterly[1]['roa'] == pytest.approx(sum(row['net_profit'] for row in forecast['monthly'][3:6]) / 5000.0 * 100)
+    assert quarterly[0]['profit_margin'] < quarterly[1]['profit_margin']
+    assert forecast['quarterly']['roa'] == pytest.approx(annual['roa'] / 4)
+    assert forecast['quarterly']['current_ratio'] == annual['current_ratio'] == 1500.0 / 800.0
+
+
+def test_period_ratios_without_balances():
+    rows = [{'revenue': 0.0, 'net_profit': 0.0, 'gross_profit': 0.0, 'operating_expenses': 0.0}] * 12
+    summary = {'revenue': 0.0, 'net_profit': 0.0, 'gross_profit': 0.0}
+    ratios = calculate_period_ratios(rows, summary, summary, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+    for period in ratios['monthly'] + ratios['quarterly'] + [ratios['average_quarter'], ratios['annual']]:
+        assert all(value == 0 for key, value in period.items() if key not in ('month', 'quarter'))
+
+
+def test_ratios_are_cached_with_the_forecast(graph):
+    graph.get('forecast')
+    graph.update(total_assets=9000.0)
+    forecast = graph.get('forecast')
+    assert graph.evaluations['ratios'] == 2
+    assert forecast['ratios']['quarterly'][0]['roa'] == pytest.approx(
+        sum(row['net_profit'] for row in forecast['monthly'][:3]) / 9000.0 * 100)
+    graph.get('forecast')
+    assert graph.evaluations['ratios'] == 2
@@ -0,0 +1,59 @@
+from flask import render_template_string
+
+from app.fragment_cache import DiskBackend, FragmentCache, LRUBackend
+
+TEMPLATE = "{% cache 'block', key %}{{ render() }}{% endcache %}"
+
+FORECAST_DATA = {
+    'cogs_percentage': 35, 'tax_rate': 8, 'seasonality': [1.0] * 12,
+    'current_assets': 15000, 'current_liabilities': 8000, 'interest_expense': 2000,
+    'depreciation': 3000, 'annual_operating_expenses': 24000, 'assets': [], 'liabilities': [],
+}
+
+
+def test_cache_tag_renders_once_per_key(app):
+    calls = []
+
+    def render():
+        calls.append(1)
+        return f'<b>{len(calls)}</b>'
+
+    with app.test_request_context():
+        assert render_template_string(TEMPLATE, key=1, render=render) == '&lt;b&gt;1&lt;/b&gt;'
+        assert render_template_string(TEMPLATE, key=1, render=render) == '&lt;b&gt;1&lt;/b&gt;'
+        assert render_template_string(TEMPLATE, key=2, render=render) == '&lt;b&gt;2&lt;/b&gt;'
+        app.extensions['fragment_cache'].version = 'next'
+        assert render_template_string(TEMPLATE, key=1, render=render) == '&lt;b&gt;3&lt;/b&gt;'
+    assert len(calls) == 3
+
+
+def test_backends(tmp_path):
+    lru = LRUBackend(max_entries=2)
+    for key in 'abc':
+        lru.set(key, key.upper())
+    assert (lru.get('a'), lru.get('c')) == (None, 'C')
+
+    # Two workers sharing one directory
+    first = FragmentCache(DiskBackend(str(tmp_path), prune_every=1, max_entries=2), 'v1')
+    second = FragmentCache(DiskBackend(str(tmp_path)), 'v1')
+    assert first.get_or_render(['x'], lambda: 'rendered') == 'rendered'
+    assert second.get_or_render(['x'], lambda: 'again') == 'rendered'
+    assert (first.misses, second.hits) == (1, 1)
+    for key in 'yz':
+        first.get_or_render([key], lambda: key)
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_pages_reuse_fragments_until_inputs_change(logged_in_client, app):
+    cache = app.extensions['fragment_cache']
+    assert logged_in_client.get('/library').data == logged_in_client.get('/library').data
+    before = logged_in_client.get('/financial-forecast').data
+    hits = cache.hits
+    assert logged_in_client.get('/financial-forecast').data == before
+    assert cache.hits == hits + 4
+
+    logged_in_client.post('/recalculate-forecast', json={**FORECAST_DATA, 'tax_rate': 20})
+    after = logged_in_client.get('/financial-forecast').data
+    assert after != before
+    # Only the per-user forecast data was rendered again
+    assert cache.hits == hits + 4 + 3
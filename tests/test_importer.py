@@ -0,0 +1,118 @@
+import io
+
+import pytest
+from openpyxl import Workbook
+
+from app.extensions import db
+from app.models import Product, Expense, FinancialParams
+from utils.importer import read_rows, normalize_header
+
+
+def xlsx_file(rows):
+    wb = Workbook()
+    for row in rows:
+        wb.active.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def upload(client, kind, content, filename, **form):
+    data = {'file': (content if hasattr(content, 'read') else io.BytesIO(content), filename), **form}
+    return client.post(f'/product-detail/{kind}/import', data=data, content_type='multipart/form-data')
+
+
+def test_read_rows_normalizes_headers_and_skips_blank_rows():
+    content = io.BytesIO('﻿Product, Price ,Unit\nTea,"1,200.50",Monthly\n,,\nCake,3,\n'.encode('utf-8'))
+    rows = list(read_rows(content, 'catalog.CSV', required_columns=('description',)))
+    assert rows == [
+        (2, {'description': 'Tea', 'price': '1,200.50', 'sales_volume_unit': 'Monthly'}),
+        (4, {'description': 'Cake', 'price': '3', 'sales_volume_unit': ''}),
+    ]
+    assert normalize_header('Sales-Volume  Unit') == 'sales_volume_unit'
+
+    with pytest.raises(ValueError, match='Missing column'):
+        list(read_rows(io.BytesIO(b'name\nTea\n'), 'catalog.csv', required_columns=('price',)))
+    with pytest.raises(ValueError, match='Unsupported'):
+        list(read_rows(io.BytesIO(b''), 'catalog.json'))
+
+
+def test_csv_import_inserts_updates_and_reports_errors(app, logged_in_client, user):
+    existing = 'Green tea'
+    with app.app_context():
+        db.session.add(Product(description=existing, price=1.0, sales_volume=1, sales_volume_unit='monthly', user_id=user))
+        db.session.commit()
+        count = Product.query.filter_by(user_id=user).count()
+        revision = FinancialParams.query.filter_by(user_id=user).one().product_revision
+
+    content = (
+        'description,price,sales_volume,sales_volume_unit\n'
+        f'{existing},9.99,7,quarterly\n'
+        'New tea,"1,250.00",3,Monthly\n'
+        'Bad price,abc,1,monthly\n'
+        'Bad unit,1,1,yearly\n'
+        ',5,5,monthly\n'
+        'New tea,1,1,monthly\n'
+    ).encode('utf-8')
+    response = upload(logged_in_client, 'products', content, 'catalog.csv')
+    assert response.status_code == 200
+    result = response.get_json()
+    assert (result['inserted'], result['updated'], result['error_count']) == (1, 1, 4)
+    assert [e['row'] for e in result['errors']] == [4, 5, 6, 7]
+    assert 'price' in result['errors'][0]['error']
+    assert 'first on row 3' in result['errors'][3]['error']
+    assert result['totals']['products'] == count + 1
+
+    with app.app_context():
+        updated = Product.query.filter_by(user_id=user, description=existing).one()
+        assert (updated.price, updated.sales_volume, updated.sales_volume_unit) == (9.99, 7, 'quarterly')
+        assert Product.query.filter_by(user_id=user, description='New tea').one().price == 1250.0
+        assert FinancialParams.query.filter_by(user_id=user).one().product_revision == revision + 1
+
+
+def test_xlsx_import_and_dry_run(app, logged_in_client, user):
+    rows = [['Item', 'Amount', 'Frequency'], ['Warehouse lease', 1500, 'monthly'], ['Cold storage', 900.5, None]]
+    with app.app_context():
+        count = Expense.query.filter_by(user_id=user).count()
+
+    dry = upload(logged_in_client, 'expenses', xlsx_file(rows), 'expenses.xlsx', dry_run='1').get_json()
+    assert (dry['inserted'], dry['dry_run']) == (2, True)
+    with app.app_context():
+        assert Expense.query.filter_by(user_id=user).count() == count
+
+    assert upload(logged_in_client, 'expenses', xlsx_file(rows), 'expenses.xlsx').status_code == 200
+    with app.app_context():
+        assert Expense.query.filter_by(user_id=user, item='Cold storage').one().frequency == 'monthly'
+        assert Expense.query.filter_by(user_id=user).count() == count + 2
+
+
+def test_import_rejects_unreadable_files(logged_in_client):
+    assert upload(logged_in_client, 'products', b'a,b\n', 'catalog.txt').status_code == 400
+    response = upload(logged_in_client, 'products', b'description,price\nTea,1\n', 'catalog.csv')
+    assert response.status_code == 400
+    assert 'sales_volume' in response.get_json()['error']
+    response = upload(logged_in_client, 'products', b'not a workbook', 'catalog.xlsx')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Not a valid .xlsx file'
+    assert logged_in_client.post('/product-detail/products/import').status_code == 400
+
+
+def test_xlsx_import_rejects_fractional_volumes(app, logged_in_client, user):
+    rows = [['Description', 'Price', 'Sales Volume'], ['Whole tea', 2, 3.0], ['Split tea', 2, 2.7]]
+    result = upload(logged_in_client, 'products', xlsx_file(rows), 'catalog.xlsx').get_json()
+    assert (result['inserted'], result['error_count']) == (1, 1)
+    assert 'whole number' in result['errors'][0]['error']
+    with app.app_context():
+        assert Product.query.filter_by(user_id=user, description='Whole tea').one().sales_volume == 3
+        assert Product.query.filter_by(user_id=user, description='Split tea').first() is None
+
+
+def test_full_save_keeps_rows_with_other_units(app, logged_in_client, user):
+    logged_in_client.post('/save-product-details', json={
+        'products': [{'description': 'Tea', 'price': 2, 'sales_volume': 5, 'sales_volume_unit': 'Monthly'}],
+        'expenses': [{'item': 'Rent', 'amount': 900, 'frequency': 'annually'}],
+    })
+    with app.app_context():
+        assert Product.query.filter_by(user_id=user).one().sales_volume_unit == 'Monthly'
+        assert Expense.query.filter_by(user_id=user).one().frequency == 'annually'
@@ -0,0 +1,74 @@
+import json
+import os
+
+from alembic import command
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from sqlalchemy import event, select
+
+from app import create_app
+from app.database import script_heads, database_revisions, upsert_assessment_messages
+from app.extensions import db
+from app.models import AssessmentMessage
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'migrations')
+
+
+def test_script_heads_match_alembic():
+    assert script_heads(os.path.join(MIGRATIONS_DIR, 'versions')) == set(ScriptDirectory(MIGRATIONS_DIR).get_heads())
+
+
+def test_upsert_assessment_messages(app):
+    with open(os.path.join(os.path.dirname(MIGRATIONS_DIR), 'assessment_messages.json')) as f:
+        messages = json.load(f)
+    with app.app_context():
+        assert upsert_assessment_messages(messages) == len(messages)
+        messages['low_risk'] = {**messages['low_risk'], 'caption': 'Updated caption'}
+        assert upsert_assessment_messages(messages) == 1
+        assert db.session.scalar(select(AssessmentMessage.caption).where(AssessmentMessage.risk_level == 'low_risk')) == 'Updated caption'
+
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda conn, cursor, sql, *args: statements.append(sql))
+        assert upsert_assessment_messages(messages) == 0
+        assert len(statements) == 1
+
+
+def test_init_db_skips_alembic_when_current(tmp_path, monkeypatch):
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'fresh.db'}", 'SQLALCHEMY_ENGINE_OPTIONS': {}})
+    runner = app.test_cli_runner()
+    with app.app_context():
+        result = runner.invoke(args=['init-db'])
+    assert 'migrations applied successfully' in result.output
+    with app.app_context():
+        assert database_revisions() == script_heads(os.path.join(MIGRATIONS_DIR, 'versions'))
+        assert db.session.scalar(select(AssessmentMessage.status).where(AssessmentMessage.risk_level == 'high_risk')) == 'High Risk'
+
+    upgrades = []
+    monkeypatch.setattr('app.command.upgrade', lambda *args: upgrades.append(args))
+    with app.app_context():
+        result = runner.invoke(args=['init-db'])
+        assert 'skipping migrations' in result.output and '0 added or updated' in result.output
+        assert upgrades == []
+        runner.invoke(args=['init-db', '--force'])
+        assert len(upgrades) == 1
+        db.engine.dispose()
+
+
+def test_init_db_upgrades_an_older_database(tmp_path, monkeypatch):
+    monkeypatch.setenv('SQLITE_PROFILE', 'tuned')
+    url = f"sqlite:///{tmp_path / 'old.db'}"
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': url, 'SQLALCHEMY_ENGINE_OPTIONS': {}})
+    # The tuned profile's primary engine holds a single connection
+    assert app.config['SQLALCHEMY_ENGINE_OPTIONS']['pool_size'] == 1
+    runner = app.test_cli_runner()
+    with app.app_context():
+        alembic_cfg = Config(os.path.join(MIGRATIONS_DIR, 'alembic.ini'))
+        alembic_cfg.set_main_option('script_location', MIGRATIONS_DIR)
+        alembic_cfg.set_main_option('sqlalchemy.url', url)
+        command.upgrade(alembic_cfg, 'd6a0e4b93c18')
+        assert database_revisions() == {'d6a0e4b93c18'}
+
+        result = runner.invoke(args=['init-db'])
+        assert 'migrations applied successfully' in result.output
+        assert database_revisions() == script_heads(os.path.join(MIGRATIONS_DIR, 'versions'))
+        db.engine.dispose()
@@ -0,0 +1,45 @@
+from logic.loan import calculate_loan_schedule
+from logic.money import allocate, div_round, to_cents
+from logic.profitability import calculate_profitability
+
+SEASONALITY = [1.0, 1.2, 0.8, 1.0, 1.0, 1.0, 1.0, 1.1, 0.9, 1.0, 1.0, 1.0]
+
+
+def test_allocate_parts_sum_to_total():
+    assert allocate(100, [1, 1, 1]) == [34, 33, 33]
+    assert allocate(-100, [1, 1, 1]) == [-34, -33, -33]
+    parts = allocate(1107556, SEASONALITY)
+    assert sum(parts) == 1107556
+    assert div_round(5, 2) == 3 and div_round(-5, 2) == -3
+
+
+def test_fixed_point_loan_repays_principal_exactly():
+    result = calculate_loan_schedule(10000, 5, 3, fixed_point=True)
+    schedule = result['schedule']
+    assert schedule[-1]['remaining_balance'] == 0
+    assert sum(to_cents(row['principal_payment']) for row in schedule) == to_cents(10000)
+    assert abs(result['monthly_payment'] - calculate_loan_schedule(10000, 5, 3)['monthly_payment']) < 0.01
+
+
+def test_fixed_point_months_add_up_to_annual():
+    products = [
+        {'price': 19.99, 'sales_volume': 37, 'sales_volume_unit': 'monthly'},
+        {'price': 5.5, 'sales_volume': 100, 'sales_volume_unit': 'quarterly'},
+    ]
+    result = calculate_profitability(products, 35, 12000.37, 21, SEASONALITY, fixed_point=True)
+    for key in ('revenue', 'gross_profit', 'net_profit'):
+        monthly_cents = sum(to_cents(month[key]) for month in result['monthly'])
+        assert monthly_cents == to_cents(result['annual'][key])
+    assert result['annual']['revenue'] == 11075.56
+
+
+def test_prices_keep_sub_cent_precision(app, user):
+    from app.extensions import db
+    from app.models import Product
+
+    with app.app_context():
+        product = Product(description='Bolt', price=0.125, sales_volume=1000, sales_volume_unit='monthly', user_id=user)
+        db.session.add(product)
+        db.session.commit()
+        db.session.expire_all()
+        assert db.session.get(Product, product.id).price == 0.125
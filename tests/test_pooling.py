@@ -0,0 +1,87 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.pool import NullPool
+
+from app import create_app
+from app.extensions import db
+from app.pooling import TimedQueuePool, build_engine_options, build_sqlite_options, install_pool_metrics
+
+PG_URL = 'postgresql://user:pw@localhost/bizstarter'
+
+
+def test_default_pool_matches_previous_settings():
+    options = build_engine_options(PG_URL, {})
+    assert options['poolclass'] is TimedQueuePool
+    assert (options['pool_size'], options['max_overflow'], options['pool_recycle']) == (5, 10, 280)
+    assert options['pool_pre_ping'] is True
+
+
+def test_null_and_fixed_pool_modes():
+    null = build_engine_options(PG_URL, {'DB_POOL_MODE': 'null'})
+    assert null['poolclass'] is NullPool
+    assert null['pool_pre_ping'] is False
+    assert 'pool_size' not in null
+
+    fixed = build_engine_options(PG_URL, {'DB_POOL_MODE': 'fixed', 'DB_POOL_SIZE': '3'})
+    assert (fixed['pool_size'], fixed['max_overflow']) == (3, 0)
+
+    with pytest.raises(ValueError):
+        build_engine_options(PG_URL, {'DB_POOL_MODE': 'bogus'})
+
+
+def test_pool_metrics_track_checkouts(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool, pool_size=1, max_overflow=0)
+    metrics = install_pool_metrics(engine)
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+        assert metrics.snapshot(engine.pool)['checked_out'] == 1
+    stats = metrics.snapshot(engine.pool)
+    assert stats['checked_out'] == 0
+    assert stats['checkouts'] == 1
+    assert stats['pool_class'] == 'TimedQueuePool'
+    assert stats['size'] == 1
+
+
+def test_db_health_endpoint(client, monkeypatch):
+    assert client.get('/health/db').status_code == 401
+    monkeypatch.setenv('ADMIN_API_TOKEN', 'admin-token')
+    response = client.get('/health/db', headers={'Authorization': 'Bearer admin-token'})
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'ok'
+    assert 'default' in response.get_json()['pools']
+
+
+def test_sqlite_profiles():
+    url = 'sqlite:////tmp/bizstarter.db'
+    writer, reader = build_sqlite_options(url, {'SQLITE_PROFILE': 'tuned'})
+    assert (writer['pool_size'], writer['max_overflow']) == (1, 0)
+    assert reader['url'] == url and reader['pool_size'] == 4
+    # Opt-in: SQLite's own settings unless SQLITE_PROFILE=tuned
+    assert build_sqlite_options(url, {}) == ({}, None)
+    assert build_sqlite_options('sqlite://', {'SQLITE_PROFILE': 'tuned'}) == ({}, None)
+    with pytest.raises(ValueError):
+        build_sqlite_options(url, {'SQLITE_PROFILE': 'bogus'})
+
+
+def test_tuned_sqlite_engines(tmp_path, monkeypatch):
+    monkeypatch.setenv('SQLITE_PROFILE', 'tuned')
+    app = create_app({'TESTING': True, 'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'tuned.db'}", 'SQLALCHEMY_ENGINE_OPTIONS': {}})
+    with app.app_context():
+        db.create_all(bind_key=None)
+        with db.engine.connect() as conn:
+            assert conn.exec_driver_sql('PRAGMA journal_mode').scalar() == 'wal'
+            assert conn.exec_driver_sql('PRAGMA synchronous').scalar() == 1  # NORMAL
+            assert conn.exec_driver_sql('PRAGMA foreign_keys').scalar() == 1
+            assert conn.exec_driver_sql('PRAGMA busy_timeout').scalar() == 5000
+            # Reads take no write lock; the first write opens BEGIN IMMEDIATE
+            conn.exec_driver_sql('SELECT count(*) FROM user').scalar()
+            assert not conn.connection.dbapi_connection.in_transaction
+            conn.exec_driver_sql("INSERT INTO user (username, password_hash) VALUES ('x', 'x')")
+            assert conn.connection.dbapi_connection.in_transaction
+            conn.rollback()
+        with db.engines['replica'].connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.exec_driver_sql("INSERT INTO user (username, password_hash) VALUES ('x', 'x')")
+        for engine in db.engines.values():
+            engine.dispose()
@@ -0,0 +1,99 @@
+import json
+
+from app.extensions import db
+from app.models import User, Product, Expense, FinancialParams
+
+
+def add_products(app, user, count):
+    with app.app_context():
+        db.session.add_all(
+            Product(description=f'SKU {i:04d}', price=2.0, sales_volume=1, sales_volume_unit='monthly', user_id=user)
+            for i in range(count)
+        )
+        db.session.commit()
+
+
+def product_revision(app, user):
+    with app.app_context():
+        return FinancialParams.query.filter_by(user_id=user).one().product_revision
+
+
+def test_product_detail_embeds_first_page_and_totals(app, logged_in_client, user):
+    add_products(app, user, 150)
+    html = logged_in_client.get('/product-detail').get_data(as_text=True)
+    start = html.index('<script id="page-data" type="application/json">') + len('<script id="page-data" type="application/json">')
+    page_data = json.loads(html[start:html.index('</script>', start)])
+    assert len(page_data['products']) == page_data['page_size'] == 100
+    with app.app_context():
+        assert page_data['totals']['products'] == Product.query.filter_by(user_id=user).count()
+    assert page_data['products_url'] == '/product-detail/products'
+
+
+def test_catalog_page_filters_and_paginates(app, logged_in_client, user):
+    add_products(app, user, 30)
+    page = logged_in_client.get('/product-detail/products?q=sku%20001&offset=5&limit=3').get_json()
+    assert page['total'] == 10
+    assert [p['description'] for p in page['items']] == ['SKU 0015', 'SKU 0016', 'SKU 0017']
+
+    # LIKE wildcards in the query are matched literally
+    assert logged_in_client.get('/product-detail/products?q=%25').get_json()['total'] == 0
+    assert logged_in_client.get('/product-detail/products?offset=x').status_code == 400
+    assert logged_in_client.get('/product-detail/orders').status_code == 404
+
+
+def test_patch_saves_only_changed_rows(app, logged_in_client, user):
+    add_products(app, user, 5)
+    with app.app_context():
+        first, second = [p.id for p in Product.query.filter_by(user_id=user).order_by(Product.id).limit(2)]
+        product_count = Product.query.filter_by(user_id=user).count()
+        expense_count = Expense.query.filter_by(user_id=user).count()
+    revision = product_revision(app, user)
+
+    response = logged_in_client.patch('/save-product-details', json={
+        'products': {
+            'upsert': [
+                {'id': first, 'description': 'Renamed', 'price': '3.5', 'sales_volume': 2, 'sales_volume_unit': 'quarterly'},
+                {'key': 'new-1', 'description': 'Brand new', 'price': 1, 'sales_volume': 1},
+                {'key': 'new-2', 'description': ''},
+            ],
+            'delete': [second],
+        },
+        'company_name': 'Acme',
+    })
+    assert response.status_code == 200
+    body = response.get_json()
+    assert list(body['created']['products']) == ['new-1']
+    assert body['totals']['products'] == product_count
+
+    with app.app_context():
+        renamed = db.session.get(Product, first)
+        assert (renamed.description, renamed.price, renamed.sales_volume_unit) == ('Renamed', 3.5, 'quarterly')
+        assert db.session.get(Product, second) is None
+        assert db.session.get(Product, body['created']['products']['new-1']).description == 'Brand new'
+        assert Expense.query.filter_by(user_id=user).count() == expense_count
+        assert FinancialParams.query.filter_by(user_id=user).one().company_name == 'Acme'
+    assert product_revision(app, user) == revision + 1
+
+    # Expense-only changes leave the product revision, and so the cached forecast, alone
+    logged_in_client.patch('/save-product-details', json={'expenses': {'upsert': [{'item': 'Rent', 'amount': 900}]}})
+    assert product_revision(app, user) == revision + 1
+
+
+def test_patch_cannot_touch_other_users_rows(app, logged_in_client, user):
+    with app.app_context():
+        someone = User(username='bob', password_hash='x')
+        db.session.add(someone)
+        db.session.flush()
+        other = Product(description='Not yours', price=1.0, sales_volume=1, sales_volume_unit='monthly', user_id=someone.id)
+        db.session.add(other)
+        db.session.commit()
+        other_id = other.id
+
+    logged_in_client.patch('/save-product-details', json={
+        'products': {'upsert': [{'id': other_id, 'description': 'Mine now'}], 'delete': [other_id]}
+    })
+    with app.app_context():
+        assert db.session.get(Product, other_id).description == 'Not yours'
+
+    response = logged_in_client.patch('/save-product-details', json={'products': {'delete': ['x']}})
+    assert response.status_code == 400
@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+from app import create_app
+from app.profiling import ProfilingMiddleware, list_profiles
+
+
+@pytest.fixture
+def profiled_app(app, tmp_path):
+    return create_app({
+        'TESTING': True,
+        'SECRET_KEY': 'test',
+        'SQLALCHEMY_DATABASE_URI': app.config['SQLALCHEMY_DATABASE_URI'],
+        'SQLALCHEMY_ENGINE_OPTIONS': {},
+        'PROFILE_MODE': 'cprofile',
+        'PROFILE_DIR': str(tmp_path / 'profiles'),
+        'PROFILE_SAMPLE_RATE': 1.0,
+        'PROFILE_SLOW_MS': 0,
+        'PROFILE_PATHS': ['/login'],
+    })
+
+
+def test_slow_requests_are_saved_and_listed(profiled_app, monkeypatch):
+    client = profiled_app.test_client()
+    response = client.get('/login')
+    response.close()  # The profile is saved once the response is closed
+    [profile] = list_profiles(profiled_app.config['PROFILE_DIR'])
+    assert '-GET-login-' in profile['name'] and profile['name'].endswith('.prof')
+
+    assert client.get('/admin/profiles').status_code == 401
+    monkeypatch.setenv('ADMIN_API_TOKEN', 'admin-token')
+    headers = {'Authorization': 'Bearer admin-token'}
+    listing = client.get('/admin/profiles', headers=headers).get_json()
+    assert listing['mode'] == 'cprofile'
+    name = listing['profiles'][0]['name']
+    assert name == profile['name']
+    download = client.get(f'/admin/profiles/{name}', headers=headers)
+    assert download.status_code == 200 and download.data
+    assert client.get('/admin/profiles/..%2Fsecret.db', headers=headers).status_code == 404
+
+
+def test_sampler_writes_collapsed_stacks(tmp_path):
+    def slow_app(environ, start_response):
+        time.sleep(0.05)
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'ok']
+
+    middleware = ProfilingMiddleware(slow_app, str(tmp_path), mode='sample', slow_ms=10, interval_ms=1)
+    body = middleware({'PATH_INFO': '/export-forecast', 'REQUEST_METHOD': 'GET'}, lambda *args: None)
+    assert list(body) == [b'ok']
+    body.close()
+
+    [profile] = list_profiles(str(tmp_path))
+    assert '-GET-export-forecast-' in profile['name'] and profile['name'].endswith('.folded')
+    content = (tmp_path / profile['name']).read_text()
+    assert 'slow_app' in content
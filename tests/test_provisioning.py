@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import event, func, select
+
+from app import provisioning
+from app.extensions import db
+from app.models import User, Product, Expense, Asset, Liability, FinancialParams, BusinessStartupActivity
+
+MODELS = (FinancialParams, BusinessStartupActivity, Expense, Product, Asset, Liability)
+
+
+def row_counts(user_id):
+    return {m.__name__: db.session.scalar(select(func.count()).select_from(m).where(m.user_id == user_id)) for m in MODELS}
+
+
+def register(client, username):
+    return client.post('/register', data={'username': username, 'password': 'pw'})
+
+
+def test_register_provisions_in_one_transaction(app, client, user):
+    with app.app_context():
+        expected = row_counts(user)
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda conn, cursor, sql, *args: statements.append(sql))
+
+    assert register(client, 'bob').status_code == 302
+    inserts = [sql for sql in statements if sql.startswith('INSERT')]
+    # The user, then one statement per table
+    assert len(inserts) == 1 + len(MODELS)
+    with app.app_context():
+        bob = db.session.scalar(select(User.id).where(User.username == 'bob'))
+        assert row_counts(bob) == expected
+
+
+def test_failed_provisioning_leaves_no_user(app, client, monkeypatch):
+    def broken(user_id):
+        db.session.execute(provisioning.insert(Product), [{'description': 'x', 'user_id': user_id}])
+        raise RuntimeError('seed failed')
+
+    monkeypatch.setattr(provisioning, 'provision_user', broken)
+    with app.app_context(), pytest.raises(RuntimeError):
+        provisioning.create_user('carol', 'x')
+    with app.app_context():
+        assert db.session.scalar(select(func.count()).select_from(User)) == 0
+        assert db.session.scalar(select(func.count()).select_from(Product)) == 0
+
+
+def test_deferred_seeding_on_first_visit(app, client, user):
+    app.config['DEFER_USER_SEEDING'] = True
+    register(client, 'dave')
+    with app.app_context():
+        expected = row_counts(user)
+        dave = db.session.scalar(select(User.id).where(User.username == 'dave'))
+        assert set(row_counts(dave).values()) == {0}
+
+    client.post('/login', data={'username': 'dave', 'password': 'pw'})
+    assert client.get('/product-detail').status_code == 200
+    assert client.get('/financial-forecast').status_code == 200
+    with app.app_context():
+        assert row_counts(dave) == expected
+        assert provisioning.ensure_provisioned(db.session.get(User, dave)) is False
+
+
+def test_partial_data_is_not_reseeded(app, client, user):
+    app.config['DEFER_USER_SEEDING'] = True
+    register(client, 'erin')
+    with app.app_context():
+        erin = db.session.get(User, db.session.scalar(select(User.id).where(User.username == 'erin')))
+        db.session.add(Product(description='Own product', price=5.0, sales_volume=1, sales_volume_unit='monthly', user_id=erin.id))
+        db.session.commit()
+        assert provisioning.ensure_provisioned(erin) is False
+        assert row_counts(erin.id) == {**{m.__name__: 0 for m in MODELS}, 'Product': 1}
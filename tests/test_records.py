@@ -0,0 +1,25 @@
+import pytest
+
+from app.database import user_records
+from app.models import Product, column_keys
+from logic.profitability import calculate_profitability
+
+
+def test_user_records_read_like_dicts(app, user):
+    with app.app_context():
+        records = user_records(Product, user)
+        assert records
+        record = records[0]
+        assert record._fields == column_keys(Product)
+        assert record['price'] == record.price == record.get('price')
+        assert record.get('count', 'missing') == 'missing'
+        with pytest.raises(KeyError):
+            record['count']
+        assert record.to_dict() == Product.query.get(record.id).to_dict()
+
+
+def test_profitability_leaves_products_unchanged():
+    products = [{'price': '12.50', 'sales_volume': '3', 'sales_volume_unit': 'monthly'}]
+    result = calculate_profitability(products)
+    assert products == [{'price': '12.50', 'sales_volume': '3', 'sales_volume_unit': 'monthly'}]
+    assert result['annual']['revenue'] == pytest.approx(450.0)
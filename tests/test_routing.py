@@ -0,0 +1,73 @@
+import shutil
+
+import pytest
+
+from app import create_app
+from app.extensions import db
+from app.models import Product, User
+
+
+@pytest.fixture
+def replica_app(app, user, tmp_path):
+    """An app whose replica is a snapshot of the primary taken after seeding."""
+    primary = tmp_path / 'test.db'
+    replica = tmp_path / 'replica.db'
+    with app.app_context():
+        db.engine.dispose()  # Closing the last connection checkpoints the WAL into the file
+    shutil.copy(primary, replica)
+
+    def make(sticky_seconds):
+        return create_app({
+            'TESTING': True,
+            'SECRET_KEY': 'test',
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{primary}',
+            'SQLALCHEMY_ENGINE_OPTIONS': {},
+            'SQLALCHEMY_BINDS': {'replica': f'sqlite:///{replica}'},
+            'DB_REPLICA_STICKY_SECONDS': sticky_seconds,
+        })
+    return make
+
+
+def _add_product(app, user_id):
+    with app.app_context():
+        db.session.add(Product(description='Widget', price=10.0, sales_volume=5, sales_volume_unit='monthly', user_id=user_id))
+        db.session.commit()
+
+
+def _revenue(client, user_id):
+    return client.get(f'/api/forecast/{user_id}').get_json()['forecast']['annual']['revenue']
+
+
+def test_reads_go_to_replica_without_recent_writes(replica_app, user):
+    app = replica_app(sticky_seconds=0)
+    client = app.test_client()
+    client.post('/login', data={'username': 'alice', 'password': 'secret'})
+    _add_product(app, user)
+
+    # The replica snapshot predates the product, so the GET does not see it.
+    assert _revenue(client, user) == 0
+
+
+def test_provisioned_views_read_from_primary(replica_app, user):
+    app = replica_app(sticky_seconds=0)
+    client = app.test_client()
+    client.post('/login', data={'username': 'alice', 'password': 'secret'})
+    _add_product(app, user)
+
+    page = client.get('/product-detail/products?q=Widget').get_json()
+    assert [row['description'] for row in page['items']] == ['Widget']
+
+
+def test_recent_write_pins_reads_to_primary(replica_app, user):
+    app = replica_app(sticky_seconds=60)
+    client = app.test_client()
+    client.post('/save-product-details', json={})  # unauthenticated: no write, no stickiness
+    client.post('/login', data={'username': 'alice', 'password': 'secret'})
+    client.post('/save-product-details', json={
+        'products': [{'description': 'Widget', 'price': 10, 'sales_volume': 5, 'sales_volume_unit': 'monthly'}],
+        'expenses': [], 'company_name': 'Acme',
+    })
+
+    assert _revenue(client, user) == 600.0
+    with app.app_context():
+        assert db.session.get(User, user).financial_params.company_name == 'Acme'
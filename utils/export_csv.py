@@ -0,0 +1,79 @@
+"""
+Streaming CSV export of the forecast.
+
+For consumers that only need the numbers, this writes the same tables as the
+XLSX exports (utils.export's sheet contents) as CSV files in a ZIP archive,
+without openpyxl. The archive is produced as a generator of byte chunks:
+zipfile writes to an unseekable sink, so each entry carries a data
+descriptor instead of a header patched after the fact, and the chunks can be
+sent as soon as they are compressed. Memory stays bounded by the chunk size
+rather than the archive size.
+"""
+import csv
+import io
+import os
+import zipfile
+
+from utils.export import (
+    has_loan_schedule, product_monthly_revenues, revenue_rows, pnl_rows, loan_schedule_rows, activity_rows,
+)
+
+# Bytes buffered before a chunk is handed to the response
+CHUNK_SIZE = int(os.environ.get('EXPORT_CSV_CHUNK_SIZE', 64 * 1024))
+
+class _Sink(io.RawIOBase):
+    """Write-only, unseekable buffer that zipfile writes into and the generator drains."""
+
+    def __init__(self):
+        self._chunks = []
+        self.pending = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.pending += len(data)
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        self.pending = 0
+        return data
+
+def forecast_tables(products, operating_expenses, cogs_percentage, loan_details, seasonality_factors, depreciation, interest_expense, startup_activities):
+    """Yields (file name, rows) for each CSV, computed as the XLSX sheets are."""
+    if seasonality_factors is None:
+        seasonality_factors = [1.0] * 12
+    monthly_revenues = product_monthly_revenues(products)
+    yield 'quarterly_revenue.csv', revenue_rows(products, seasonality_factors, monthly_revenues)
+    yield 'annual_pnl_summary.csv', pnl_rows(monthly_revenues, operating_expenses, cogs_percentage, loan_details, depreciation, interest_expense)
+    if has_loan_schedule(loan_details):
+        yield 'loan_payment_schedule.csv', loan_schedule_rows(loan_details)
+    yield 'startup_activities.csv', activity_rows(startup_activities)
+
+def stream_forecast_zip(products, operating_expenses, cogs_percentage, loan_details, seasonality_factors, depreciation, interest_expense, startup_activities):
+    """
+    Generates a ZIP of the forecast's CSV tables, chunk by chunk.
+
+    Takes the same arguments as utils.export.create_forecast_spreadsheet,
+    minus the company name, which only appears in the workbook's title.
+    """
+    tables = forecast_tables(products, operating_expenses, cogs_percentage, loan_details,
+                             seasonality_factors, depreciation, interest_expense, startup_activities)
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, rows in tables:
+            with archive.open(name, 'w') as entry:
+                text = io.TextIOWrapper(entry, encoding='utf-8', newline='')
+                writer = csv.writer(text)
+                for row in rows:
+                    writer.writerow(row)
+                    if sink.pending >= CHUNK_SIZE:
+                        yield sink.drain()
+                text.flush()
+                text.detach()
+            if sink.pending:
+                yield sink.drain()
+    yield sink.drain()
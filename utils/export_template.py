@@ -0,0 +1,222 @@
+"""
+Template-based forecast export.
+
+utils.export builds every workbook from scratch: it styles each header cell,
+sets number formats cell by cell, rebuilds the charts and serializes it all
+through openpyxl. Everything except the cell values depends only on the
+workbook's layout, i.e. the number of products (the revenue sheet has one
+column, and its chart one series, per product) and whether there is a loan
+schedule. So for each layout this module builds the workbook once, with
+placeholder values, and keeps the saved package as a skeleton: styles, merged
+titles, column-bound charts, drawings and relationships. An export then only
+renders the values of each sheet's <sheetData>, with the skeleton's style ids,
+and zips them together with the skeleton's other parts.
+
+The result matches utils.export.create_forecast_spreadsheet cell for cell:
+values, styles, number formats, merged cells, column widths and charts.
+"""
+import math
+import os
+import re
+import threading
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils import get_column_letter
+
+from utils.export import (
+    build_forecast_workbook, has_loan_schedule, revenue_title, product_monthly_revenues,
+    revenue_rows, pnl_rows, loan_summary_rows, loan_schedule_rows, activity_rows,
+)
+
+# Skeletons kept per process, one per layout (product count, loan sheet or not)
+SKELETON_CACHE_SIZE = int(os.environ.get('EXPORT_SKELETON_CACHE_SIZE', 32))
+
+_skeletons = OrderedDict()
+_skeletons_lock = threading.Lock()
+
+_NS = {
+    'main': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+_R_ID = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id'
+_SHEET_DATA_RE = re.compile(r'<sheetData\s*/>|<sheetData>.*</sheetData>', re.S)
+_STRIP_RE = re.compile(r'<dimension [^>]*/>|<cols>.*?</cols>', re.S)
+_CORE_DATES_RE = re.compile(r'(<dcterms:(?:created|modified) [^>]*>)[^<]*(</dcterms:(?:created|modified)>)')
+
+class _Skeleton:
+    """A saved workbook split into its fixed parts and per-sheet XML around <sheetData>."""
+
+    def __init__(self, package, styles):
+        self.styles = styles
+        with zipfile.ZipFile(BytesIO(package)) as archive:
+            self.parts = [(info.filename, archive.read(info.filename)) for info in archive.infolist()]
+        parts = dict(self.parts)
+
+        # Sheet title -> part name, from the workbook and its relationships
+        workbook = ET.fromstring(parts['xl/workbook.xml'])
+        rels = ET.fromstring(parts['xl/_rels/workbook.xml.rels'])
+        targets = {rel.get('Id'): rel.get('Target') for rel in rels.findall('rel:Relationship', _NS)}
+        self.sheet_parts = {}
+        for sheet in workbook.iterfind('main:sheets/main:sheet', _NS):
+            target = targets[sheet.get(_R_ID)]
+            self.sheet_parts[sheet.get('name')] = target.lstrip('/') if target.startswith('/') else 'xl/' + target
+
+        # Sheet part -> (XML before <sheetData>, XML after it); dimension and
+        # column widths are dropped here and written per export.
+        self.sheets = {}
+        for name in self.sheet_parts.values():
+            xml = _STRIP_RE.sub('', parts[name].decode('utf-8'))
+            match = _SHEET_DATA_RE.search(xml)
+            self.sheets[name] = (xml[:match.start()], xml[match.end():])
+
+def _placeholder_skeleton(product_count, with_loan):
+    """Builds the workbook for a layout with utils.export and records its style ids."""
+    schedule = [{'month': 1, 'principal_payment': 0, 'interest_payment': 0, 'remaining_balance': 0}]
+    loan_details = {'schedule': schedule} if with_loan else {}
+    wb = build_forecast_workbook(
+        [{'description': ''}] * product_count, [], 0.0, loan_details, None, '', 0, 0, []
+    )
+    revenue, pnl = wb['Quarterly Revenue'], wb['Annual P&L Summary']
+    styles = {
+        'title': revenue['A1'].style_id,
+        'header': revenue['A2'].style_id,
+        'currency': revenue['B3'].style_id,
+        'ratio': pnl['K3'].style_id,
+    }
+    package = BytesIO()
+    wb.save(package)
+    return _Skeleton(package.getvalue(), styles)
+
+def _skeleton(product_count, with_loan):
+    key = (product_count, with_loan)
+    with _skeletons_lock:
+        skeleton = _skeletons.get(key)
+        if skeleton is not None:
+            _skeletons.move_to_end(key)
+            return skeleton
+    # Built outside the lock; a concurrent build of the same layout is harmless
+    skeleton = _placeholder_skeleton(product_count, with_loan)
+    with _skeletons_lock:
+        _skeletons[key] = skeleton
+        while len(_skeletons) > SKELETON_CACHE_SIZE:
+            _skeletons.popitem(last=False)
+    return skeleton
+
+def clear_skeleton_cache():
+    with _skeletons_lock:
+        _skeletons.clear()
+
+# --- Sheet rendering ---
+
+def _cell_xml(ref, value, style):
+    s = f' s="{style}"' if style else ''
+    if value is None or value == '':
+        return f'<c r="{ref}"{s}/>'
+    if isinstance(value, bool):
+        return f'<c r="{ref}"{s} t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)):
+        # Formatted as openpyxl does (compat.safe_string)
+        if math.isnan(value) or math.isinf(value):
+            return f'<c r="{ref}"{s} t="n"/>'
+        return f'<c r="{ref}"{s} t="n"><v>{value:.16g}</v></c>'
+    text = escape(ILLEGAL_CHARACTERS_RE.sub('', str(value)))
+    return f'<c r="{ref}"{s} t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+def _sheet_xml(skeleton, title, rows, style_for):
+    """
+    Renders one sheet: the skeleton's XML with new column widths and cells.
+
+    :param rows: Row values from row 1 down; empty lists are blank rows.
+    :param style_for: (row, column) -> style id, both 1-based.
+    """
+    letters = [get_column_letter(i) for i in range(1, max(map(len, rows)) + 1)]
+    out = []
+    for r, row in enumerate(rows, start=1):
+        cells = []
+        for c, value in enumerate(row, start=1):
+            style = style_for(r, c)
+            if value is not None or style:
+                cells.append(_cell_xml(f'{letters[c - 1]}{r}', value, style))
+        out.append(f'<row r="{r}">{"".join(cells)}</row>' if cells else f'<row r="{r}"/>')
+
+    # Same widths as utils.export._finalize_workbook: the longest str(value)
+    # in the column, counting missing cells as 'None', plus 2.
+    widths = []
+    for c in range(len(letters)):
+        longest = max(len(str(row[c])) if c < len(row) else 4 for row in rows)
+        widths.append(f'<col min="{c + 1}" max="{c + 1}" width="{longest + 2}" customWidth="1"/>')
+
+    head, tail = skeleton.sheets[skeleton.sheet_parts[title]]
+    return f'{head}<cols>{"".join(widths)}</cols><sheetData>{"".join(out)}</sheetData>{tail}'.encode('utf-8')
+
+def _padded(row, width):
+    return list(row) + [None] * (width - len(row))
+
+def create_forecast_spreadsheet_from_template(products, operating_expenses, cogs_percentage, loan_details, seasonality_factors, company_name, depreciation, interest_expense, startup_activities):
+    """
+    Creates the same workbook as utils.export.create_forecast_spreadsheet from
+    a cached skeleton, writing only the cell values.
+    """
+    if seasonality_factors is None:
+        seasonality_factors = [1.0] * 12
+    with_loan = has_loan_schedule(loan_details)
+    skeleton = _skeleton(len(products), with_loan)
+    styles = skeleton.styles
+    title, header, currency, ratio = styles['title'], styles['header'], styles['currency'], styles['ratio']
+    sheets = {}
+
+    # Quarterly Revenue: every column after the first is currency
+    monthly_revenues = product_monthly_revenues(products)
+    table = revenue_rows(products, seasonality_factors, monthly_revenues)
+    sheets['Quarterly Revenue'] = _sheet_xml(
+        skeleton, 'Quarterly Revenue', [[revenue_title(company_name)]] + table,
+        lambda r, c: title if r == 1 and c == 1 else header if r == 2 else currency if r > 2 and c > 1 else 0
+    )
+
+    # Annual P&L Summary: currency in B-J, DSCR in K
+    table = pnl_rows(monthly_revenues, operating_expenses, cogs_percentage, loan_details, depreciation, interest_expense)
+    sheets['Annual P&L Summary'] = _sheet_xml(
+        skeleton, 'Annual P&L Summary', [['Profit & Loss Summary (USD)']] + table,
+        lambda r, c: (title if r == 1 and c == 1 else header if r == 2 else
+                      0 if r < 3 or c == 1 else ratio if c == 11 else currency)
+    )
+
+    if with_loan:
+        # The builder formats B3:B6, one row past the summary in rows 2-5, so
+        # its spacer row lands in row 7 and the schedule's header in row 8.
+        summary_styles = {3: currency, 4: ratio, 5: ratio, 6: currency}
+        rows = [['Loan Payment Schedule']] + loan_summary_rows(loan_details) + [[None, None], []]
+        rows = [_padded(row, 2) if r in summary_styles else row for r, row in enumerate(rows, start=1)]
+        schedule_header = len(rows) + 1
+        rows += loan_schedule_rows(loan_details)
+        sheets['Loan Payment Schedule'] = _sheet_xml(
+            skeleton, 'Loan Payment Schedule', rows,
+            lambda r, c: (title if r == 1 and c == 1 else
+                          summary_styles.get(r, 0) if c == 2 and r < schedule_header else
+                          header if r == schedule_header else
+                          currency if r > schedule_header and c > 1 else 0)
+        )
+
+    sheets['Startup Activities'] = _sheet_xml(
+        skeleton, 'Startup Activities', [['Startup Activities']] + activity_rows(startup_activities),
+        lambda r, c: title if r == 1 and c == 1 else header if r == 2 else 0
+    )
+
+    sheet_xml = {skeleton.sheet_parts[name]: xml for name, xml in sheets.items()}
+    now = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    in_memory_file = BytesIO()
+    with zipfile.ZipFile(in_memory_file, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in skeleton.parts:
+            if name in sheet_xml:
+                data = sheet_xml[name]
+            elif name == 'docProps/core.xml':
+                data = _CORE_DATES_RE.sub(rf'\g<1>{now}\g<2>', data.decode('utf-8')).encode('utf-8')
+            archive.writestr(name, data)
+    in_memory_file.seek(0)
+    return in_memory_file
@@ -0,0 +1,110 @@
+"""
+Streaming readers for catalog imports.
+
+CSV files are read line by line and XLSX files with openpyxl's read-only
+mode, so neither is loaded into memory as a whole. Rows come out as dicts
+keyed by the normalized header, with their 1-based row number in the file,
+for the caller to validate and write in chunks.
+"""
+import csv
+import io
+import os
+import zipfile
+from itertools import islice
+
+from openpyxl import load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+SUPPORTED_EXTENSIONS = ('.csv', '.xlsx')
+
+# Alternative header spellings -> column name
+HEADER_ALIASES = {
+    'product': 'description',
+    'product_description': 'description',
+    'name': 'description',
+    'unit': 'sales_volume_unit',
+    'volume': 'sales_volume',
+    'volume_unit': 'sales_volume_unit',
+    'expense': 'item',
+    'expense_item': 'item',
+    'unit_price': 'price',
+}
+
+def normalize_header(name):
+    """'Sales Volume Unit' -> 'sales_volume_unit', with HEADER_ALIASES applied."""
+    key = '_'.join(str(name or '').strip().lower().replace('-', ' ').split())
+    return HEADER_ALIASES.get(key, key)
+
+def read_rows(stream, filename, required_columns=()):
+    """
+    Yields (row number, row dict) for each non-empty data row of a CSV or
+    XLSX file. The first row is the header.
+
+    :param stream: A binary file object; XLSX needs it to be seekable.
+    :param filename: Used to pick the format from its extension.
+    :param required_columns: Columns the header must contain.
+    :raises ValueError: For an unsupported file type, an unreadable XLSX file
+        or a missing column.
+    """
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension == '.csv':
+        rows = _csv_rows(stream)
+    elif extension == '.xlsx':
+        rows = _xlsx_rows(stream)
+    else:
+        raise ValueError(f"Unsupported file type '{extension or filename}'; use {' or '.join(SUPPORTED_EXTENSIONS)}")
+
+    header = next(rows, None)
+    if header is None:
+        raise ValueError("The file is empty")
+    header = [normalize_header(name) for name in header]
+    missing = [column for column in required_columns if column not in header]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+    for row_number, values in enumerate(rows, start=2):
+        if not any(value not in (None, '') for value in values):
+            continue
+        yield row_number, {key: _clean(value) for key, value in zip(header, values) if key}
+
+def _csv_rows(stream):
+    # utf-8-sig drops the byte order mark Excel writes at the start of CSV exports
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.reader(text)
+    finally:
+        # Leave the underlying upload open for its owner to close
+        text.detach()
+
+def _xlsx_rows(stream):
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as e:
+        # Not a zip, or a zip without the workbook parts
+        raise ValueError("Not a valid .xlsx file") from e
+    try:
+        yield from workbook.worksheets[0].iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+def _clean(value):
+    return value.strip() if isinstance(value, str) else value
+
+def validate_rows(rows, coerce):
+    """
+    Applies `coerce` to each (row number, row dict) pair.
+
+    :param coerce: Returns a column dict, or raises ValueError with a message.
+    :return: An iterator of (row number, column dict or None, error message or None).
+    """
+    for row_number, row in rows:
+        try:
+            yield row_number, coerce(row), None
+        except ValueError as e:
+            yield row_number, None, str(e)
+
+def chunked(iterable, size):
+    """Yields lists of up to `size` items from `iterable`."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk